@@ -0,0 +1,179 @@
+import os
+import io
+import sys
+import random
+import zipfile
+import argparse
+
+import fitz
+
+
+ATTACHMENT_TYPES = ['pdf', 'jpg', 'png', 'zip', 'txt', 'docx']
+DEFAULT_TYPES = ['pdf', 'jpg', 'png', 'zip', 'txt']
+
+DOCX_CONTENT_TYPES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>'''
+DOCX_RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>'''
+DOCX_DOCUMENT = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>{paragraphs}</w:body></w:document>'''
+
+ITEM_PAGE_HTML = '''<html><head><meta charset="utf-8"><link rel="stylesheet" href="../css/style.css"></head><body>
+<div id="content"><table class="hlavicka"><tr><td class="nazevOrganizace">Statutární město Benchmark</td></tr></table>
+<div class="nadpis">{name}</div>
+<div class="prohlaseni">Návrh usnesení</div><div>Rada města schvaluje {name} a ukládá zpracovateli zajistit realizaci.</div>
+<hr class="cela">
+<table class="podpisy"><tr><td>Podpis</td></tr></table>
+<hr class="cela">
+<table cellspacing="10" class="akteri">
+<tr><td class="predkladatelLabel">Předkladatel:</td><td>Jan Novák</td></tr>
+<tr><td>Zpracovatel:</td><td>Petr Svoboda</td></tr>
+<tr><td>Text důvodové zprávy:</td><td>{reason}</td></tr>
+<tr><td>Materiál obsahuje:</td><td>{links}</td></tr>
+</table><hr class="cela"></div></body></html>'''
+
+INDEX_HTML = '''<html><head><meta charset="utf-8"></head><body><div id="content">
+<table class="hlavicka"><tr><td>Statutární město Benchmark</td></tr><tr><td>Rada města</td></tr><tr><td>Pozvánka</td></tr>
+<tr><td>Program</td></tr><tr><td>1. Rady města</td></tr><tr><td>Jednání se koná 3.4.2024 v 16:00</td></tr><tr><td>zasedací místnost</td></tr></table>
+<table class="program"><tr class="popisek"><td>Bod</td><td class="left">Název</td></tr>
+{rows}</table></div></body></html>'''
+
+LOREM = ('Rada města projednala předložený materiál a doporučuje zastupitelstvu jej schválit '
+         'v předloženém znění včetně příloh a finančního krytí z rozpočtu města.')
+
+
+def make_pdf(filepath, pages, landscape, image_size=None, rng=None):
+    doc = fitz.open()
+    width, height = fitz.paper_size('a4')
+    if landscape:
+        width, height = height, width
+    pixmap = make_pixmap(image_size, rng) if image_size else None
+    for i in range(pages):
+        page = doc.new_page(width=width, height=height)
+        page.insert_text((72, 72), f'{os.path.basename(filepath)} strana {i+1}', fontsize=14)
+        page.insert_textbox(fitz.Rect(72, 100, width-72, 300), LOREM, fontsize=11)
+        if pixmap is not None:
+            page.insert_image(fitz.Rect(72, 320, width-72, height-72), pixmap=pixmap, keep_proportion=True)
+    doc.save(filepath, deflate=True)
+    doc.close()
+
+
+def make_pixmap(image_size, rng):
+    # noise does not compress, so the size of image is close to real photos and scans
+    width, height = image_size
+    samples = rng.randbytes(width*height*3)
+    return fitz.Pixmap(fitz.csRGB, width, height, samples, 0)
+
+
+def make_image(filepath, image_size, rng):
+    pixmap = make_pixmap(image_size, rng)
+    if filepath.endswith('.jpg'):
+        pixmap.save(filepath, jpg_quality=85)
+    else:
+        pixmap.save(filepath)
+
+
+def make_docx(filepath, pages):
+    paragraphs = ''.join(f'<w:p><w:r><w:t>{LOREM}</w:t></w:r></w:p>' for _ in range(pages*20))
+    with zipfile.ZipFile(filepath, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', DOCX_CONTENT_TYPES)
+        zf.writestr('_rels/.rels', DOCX_RELS)
+        zf.writestr('word/document.xml', DOCX_DOCUMENT.format(paragraphs=paragraphs))
+
+
+def make_zip(filepath, pages, landscape, image_size, rng):
+    # ZIP with PDF, image, text and folder member, as attachments sent by departments
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    with zipfile.ZipFile(filepath, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        buffer = io.BytesIO()
+        doc = fitz.open()
+        width, height = fitz.paper_size('a4-l' if landscape else 'a4')
+        for i in range(pages):
+            doc.new_page(width=width, height=height).insert_text((72, 72), f'{name} strana {i+1}')
+        doc.save(buffer)
+        zf.writestr(f'{name}/dokument.pdf', buffer.getvalue())
+        zf.writestr(f'{name}/foto.jpg', make_pixmap(image_size, rng).tobytes('jpg'))
+        zf.writestr(f'{name}/poznamka.txt', LOREM)
+
+
+def make_attachment(filepath, kind, pages, landscape, image_size, rng):
+    if kind == 'pdf':
+        make_pdf(filepath, pages, landscape, rng=rng)
+    elif kind in ('jpg', 'png'):
+        make_image(filepath, image_size, rng)
+    elif kind == 'zip':
+        make_zip(filepath, pages, landscape, image_size, rng)
+    elif kind == 'txt':
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write('\n'.join([LOREM]*pages*20))
+    elif kind == 'docx':
+        make_docx(filepath, pages)
+    else:
+        raise ValueError(f'Unknown attachment type {kind}')
+
+
+def generate_export(root, items=10, attachments=3, pages=2, image_size=(800, 600), landscape=0.3,
+                    types=DEFAULT_TYPES, seed=0) -> dict:
+    """Generate synthetic eJednani export with `items` programme items to `root`.
+
+    Every item has `attachments` attachments of `types` in turn, PDFs and ZIPs
+    have `pages` pages, `landscape` is share of landscape PDFs. Content is the
+    same for the same parameters and seed. Returns counts of generated files.
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, 'navrhy-usneseni'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'prilohy'), exist_ok=True)
+    stats = {kind: 0 for kind in types}
+    stats['bytes'] = 0
+    rows = []
+    for i in range(1, items+1):
+        links = []
+        for j in range(attachments):
+            kind = types[(i+j) % len(types)]
+            filename = f'priloha_{i}_{j+1}.{kind}'
+            filepath = os.path.join(root, 'prilohy', filename)
+            make_attachment(filepath, kind, pages, rng.random() < landscape, image_size, rng)
+            stats[kind] += 1
+            stats['bytes'] += os.path.getsize(filepath)
+            links.append(f'<a href="../prilohy/{filename}">Příloha {j+1} ({kind})</a><br>')
+        name = f'Bod {i} - materiál k projednání'
+        page = ITEM_PAGE_HTML.format(name=name, reason=f'{LOREM}<br><b>{LOREM}</b>', links=''.join(links))
+        with open(os.path.join(root, 'navrhy-usneseni', f'navrh-usneseni_{i}.html'), 'w', encoding='utf-8') as f:
+            f.write(page)
+        rows.append(f'<tr><td>{i}.</td><td class="left"><a href="navrhy-usneseni/navrh-usneseni_{i}.html">{name}</a></td></tr>')
+    # last item without own page, as "Různé" in real programmes
+    rows.append(f'<tr><td>{items+1}.</td><td class="left">Různé<br><i>Ústní informace</i><br><i>Předkladatel</i><br>: Jan Novák<br><i>bez písemného materiálu</i></td></tr>')
+    with open(os.path.join(root, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(INDEX_HTML.format(rows='\n'.join(rows)))
+    stats['items'] = items
+    return stats
+
+
+def parse_image_size(value) -> tuple:
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate synthetic eJednani export for benchmarks.')
+    parser.add_argument("output", help = "folder of generated export", type=str)
+    parser.add_argument("--items", help = "number of programme items (default 10)", type=int, default=10)
+    parser.add_argument("--attachments", help = "number of attachments of one item (default 3)", type=int, default=3)
+    parser.add_argument("--pages", help = "pages of PDF, ZIP, TXT and DOCX attachments (default 2)", type=int, default=2)
+    parser.add_argument("--image-size", help = "size of images in pixels (default 800x600)", type=parse_image_size, default=(800, 600))
+    parser.add_argument("--landscape", help = "share of landscape PDFs 0-1 (default 0.3)", type=float, default=0.3)
+    parser.add_argument("--types", help = f"attachment types used in turn (default {','.join(DEFAULT_TYPES)}, available {','.join(ATTACHMENT_TYPES)})",
+                        type=lambda value: value.split(','), default=DEFAULT_TYPES)
+    parser.add_argument("--seed", help = "seed of random content (default 0)", type=int, default=0)
+    args = parser.parse_args()
+    unknown = set(args.types) - set(ATTACHMENT_TYPES)
+    if unknown:
+        parser.error(f'unknown attachment types {",".join(sorted(unknown))}')
+    stats = generate_export(args.output, args.items, args.attachments, args.pages, args.image_size, args.landscape, args.types, args.seed)
+    print(stats, file=sys.stderr)
@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+from datetime import datetime
+
+import fitz
+
+from generate_export import generate_export, parse_image_size, DEFAULT_TYPES
+
+
+RESULTS_VERSION = 1
+DEFAULT_SCALES = [10, 100, 500]
+ROOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# stages shorter than this are not compared, their time is mostly noise
+MIN_COMPARED_TIME = 0.05
+
+
+def run_main(export_path, output_path, report_filepath, main_args) -> dict:
+    # main runs as module of the package from repository folder, as by users
+    command = [sys.executable, '-m', 'vera2pdf.main', '-p', export_path, '-o', output_path,
+               '--profile-report', report_filepath] + main_args
+    subprocess.run(command, cwd=ROOT_PATH, check=True, stdout=subprocess.DEVNULL)
+    with open(report_filepath, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_scale_result(report, stats) -> dict:
+    return {
+        'items': stats['items'],
+        'attachment_bytes': stats['bytes'],
+        'wall_time': report['wall_time'],
+        'cpu_time': report['cpu_time'],
+        'peak_rss': report['peak_rss'],
+        'output_bytes': os.path.getsize(report['info']['output']),
+        'stages': report['stages'],
+    }
+
+
+def run_scale(items, work_path, args) -> dict:
+    export_path = os.path.join(work_path, f'export_{items}')
+    stats = generate_export(export_path, items, args.attachments, args.pages, args.image_size,
+                            args.landscape, args.types, args.seed)
+    best = None
+    for i in range(args.repeat):
+        output_path = os.path.join(work_path, f'output_{items}_{i}')
+        os.makedirs(output_path)
+        report = run_main(export_path, output_path + os.sep, os.path.join(work_path, f'report_{items}_{i}.json'), args.main_args)
+        result = get_scale_result(report, stats)
+        if best is None or result['wall_time'] < best['wall_time']:
+            best = result
+        shutil.rmtree(output_path)
+    return best
+
+
+def compare_results(results, baseline, tolerance) -> list:
+    """Return list of regressions, wall times longer than baseline by more than tolerance."""
+    regressions = []
+    for scale, result in results['scales'].items():
+        base = baseline['scales'].get(scale)
+        if base is None:
+            continue
+        times = [('total', result['wall_time'], base['wall_time'])]
+        for stage, values in result['stages'].items():
+            if stage in base['stages']:
+                times.append((stage, values['wall_time'], base['stages'][stage]['wall_time']))
+        for name, time, base_time in times:
+            if base_time >= MIN_COMPARED_TIME and time > base_time*(1+tolerance):
+                regressions.append(f'{scale} items, {name}: {time:.2f} s, baseline {base_time:.2f} s (+{(time/base_time-1)*100:.0f} %)')
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time stages of vera2pdf on synthetic eJednani exports.')
+    parser.add_argument("--scales", help = "numbers of programme items (default 10 100 500)", type=int, nargs='+', default=DEFAULT_SCALES)
+    parser.add_argument("--attachments", help = "number of attachments of one item (default 3)", type=int, default=3)
+    parser.add_argument("--pages", help = "pages of PDF, ZIP, TXT and DOCX attachments (default 2)", type=int, default=2)
+    parser.add_argument("--image-size", help = "size of images in pixels (default 400x300)", type=parse_image_size, default=(400, 300))
+    parser.add_argument("--landscape", help = "share of landscape PDFs 0-1 (default 0.3)", type=float, default=0.3)
+    parser.add_argument("--types", help = f"attachment types used in turn (default {','.join(DEFAULT_TYPES)})",
+                        type=lambda value: value.split(','), default=DEFAULT_TYPES)
+    parser.add_argument("--seed", help = "seed of random content (default 0)", type=int, default=0)
+    parser.add_argument("--repeat", help = "runs of each scale, the fastest is kept (default 1)", type=int, default=1)
+    parser.add_argument("-o", "--output", help = "JSON file with results (default benchmark.json)", type=str, default='benchmark.json')
+    parser.add_argument("--baseline", help = "JSON results to compare with, exit code is 1 on regression", type=str)
+    parser.add_argument("--tolerance", help = "allowed slowdown against baseline (default 0.25)", type=float, default=0.25)
+    parser.add_argument("main_args", help = "arguments passed to main.py after --, e.g. -- --jobs 4 --renderer fitz", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    if args.main_args[:1] == ['--']:
+        args.main_args = args.main_args[1:]
+
+    results = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pymupdf': fitz.VersionBind,
+        'params': {
+            'attachments': args.attachments,
+            'pages': args.pages,
+            'image_size': list(args.image_size),
+            'landscape': args.landscape,
+            'types': args.types,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'main_args': args.main_args,
+        },
+        'scales': {},
+    }
+    with tempfile.TemporaryDirectory() as work_path:
+        for items in args.scales:
+            result = run_scale(items, work_path, args)
+            results['scales'][str(items)] = result
+            print(f'{items} items: {result["wall_time"]:.2f} s, peak RSS {(result["peak_rss"] or 0)/1024/1024:.0f} MB', file=sys.stderr)
+    with open(args.output, mode='w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['params'] != results['params']:
+            print('Parameters of baseline differ, results may not be comparable.', file=sys.stderr)
+        regressions = compare_results(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
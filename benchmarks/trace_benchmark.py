@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+from generate_export import generate_export
+from run_benchmark import run_main
+
+
+# stages with per-page trace messages
+TRACED_STAGES = ['rotate', 'header', 'links']
+
+
+def get_pages(items, attachments, pages) -> int:
+    return items*attachments*pages
+
+
+def run_variant(export_path, work_path, name, main_args, repeat) -> dict:
+    # the fastest of repeated runs, as in run_benchmark
+    best = None
+    for i in range(repeat):
+        output_path = os.path.join(work_path, f'output_{name}_{i}')
+        os.makedirs(output_path)
+        report = run_main(export_path, output_path + os.sep, os.path.join(work_path, f'report_{name}_{i}.json'), main_args)
+        result = {'wall_time': report['wall_time'],
+                  'stages': {stage: report['stages'].get(stage, {}).get('wall_time', 0) for stage in TRACED_STAGES}}
+        if best is None or result['wall_time'] < best['wall_time']:
+            best = result
+        shutil.rmtree(output_path)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare vera2pdf runs without and with --trace on packet with many attachment pages.')
+    parser.add_argument("--items", help = "number of programme items (default 100)", type=int, default=100)
+    parser.add_argument("--attachments", help = "PDF attachments of one item (default 4)", type=int, default=4)
+    parser.add_argument("--pages", help = "pages of one attachment (default 5, 2000 attachment pages in total)", type=int, default=5)
+    parser.add_argument("--landscape", help = "share of landscape PDFs 0-1 (default 0.3)", type=float, default=0.3)
+    parser.add_argument("--repeat", help = "runs of each variant, the fastest is kept (default 3)", type=int, default=3)
+    parser.add_argument("-o", "--output", help = "JSON file with results (default trace_benchmark.json)", type=str, default='trace_benchmark.json')
+    parser.add_argument("main_args", help = "arguments passed to main.py after --, e.g. -- --renderer fitz", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    if args.main_args[:1] == ['--']:
+        args.main_args = args.main_args[1:]
+
+    results = {'pages': get_pages(args.items, args.attachments, args.pages), 'main_args': args.main_args, 'variants': {}}
+    with tempfile.TemporaryDirectory() as work_path:
+        export_path = os.path.join(work_path, 'export')
+        generate_export(export_path, args.items, args.attachments, args.pages, landscape=args.landscape, types=['pdf'])
+        variants = {
+            'no_trace': args.main_args,
+            'trace': args.main_args + ['--trace', os.path.join(work_path, 'trace.log')],
+        }
+        for name, main_args in variants.items():
+            results['variants'][name] = run_variant(export_path, work_path, name, main_args, args.repeat)
+    base = results['variants']['no_trace']
+    for name, result in results['variants'].items():
+        stages = ', '.join(f'{stage} {result["stages"][stage]:.2f} s ({(result["stages"][stage]/base["stages"][stage]-1)*100 if base["stages"][stage] else 0:+.0f} %)'
+                           for stage in TRACED_STAGES)
+        print(f'{name}: total {result["wall_time"]:.2f} s, {stages}', file=sys.stderr)
+    with open(args.output, mode='w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,25 @@
+import os
+
+import fitz
+
+from vera2pdf.main import convert_programmes_in_batch, find_programme_paths
+from vera2pdf.model import ConversionOptions
+from generate_export import generate_export
+
+
+def test_batch_continues_after_broken_export(tmp_path):
+    generate_export(str(tmp_path / 'exports' / 'ck' / '2024-04-03'), items=1, attachments=1, image_size=(40, 30), types=['pdf'])
+    generate_export(str(tmp_path / 'exports' / 'tabor' / '2024-04-03'), items=2, attachments=1, image_size=(40, 30), types=['pdf'])
+    broken = tmp_path / 'exports' / 'broken'
+    broken.mkdir()
+    (broken / 'index.html').write_text('<html><body>bez programu</body></html>')
+    (tmp_path / 'exports' / 'empty').mkdir()
+    paths = find_programme_paths([str(tmp_path / 'exports' / '*'), str(tmp_path / 'exports' / '*' / '*')])
+    assert [os.path.relpath(path, tmp_path / 'exports') for path in paths] == ['broken', 'ck/2024-04-03', 'tabor/2024-04-03']
+    output = tmp_path / 'out'
+    results = convert_programmes_in_batch(paths, str(output), ConversionOptions(renderer='fitz'))
+    assert [result.error for result in results] == ['WrongProgrammeFormatError', '', '']
+    assert [os.path.relpath(result.output, output) for result in results[1:]] == \
+        ['ck/2024-04-03/RM_2024-04-03_A4.pdf', 'tabor/2024-04-03/RM_2024-04-03_A4.pdf']
+    with fitz.open(results[2].output) as doc:
+        assert len(doc) > len(fitz.open(results[1].output))
@@ -0,0 +1,32 @@
+import os
+import zipfile
+
+import fitz
+from lxml import etree
+
+from vera2pdf.extraction import *
+from generate_export import generate_export, ATTACHMENT_TYPES
+from run_benchmark import compare_results
+
+
+def test_generated_export_is_parsed_without_warnings(tmp_path):
+    stats = generate_export(str(tmp_path), items=2, attachments=len(ATTACHMENT_TYPES), pages=3,
+                            image_size=(40, 30), landscape=1, types=ATTACHMENT_TYPES)
+    assert stats['items'] == 2 and all(stats[kind] == 2 for kind in ATTACHMENT_TYPES)
+    page_path = str(tmp_path / 'navrhy-usneseni' / 'navrh-usneseni_1.html')
+    fields, warnings = extract_item_page_fields(etree.parse(page_path, etree.HTMLParser()).getroot(), page_path)
+    assert warnings == []
+    assert sorted(a.extension for a in fields['attachments']) == sorted(f'.{kind}' for kind in ATTACHMENT_TYPES)
+    pdf_path = next(a.files[0] for a in fields['attachments'] if a.extension == '.pdf')
+    with fitz.open(pdf_path) as doc:
+        assert len(doc) == 3 and doc[0].rect.width > doc[0].rect.height
+    zip_path = next(a.files[0] for a in fields['attachments'] if a.extension == '.zip')
+    assert len(zipfile.ZipFile(zip_path).namelist()) == 3
+
+
+def test_compare_results_reports_slower_stages_only():
+    baseline = {'scales': {'10': {'wall_time': 10.0, 'stages': {'render': {'wall_time': 4.0}, 'parse': {'wall_time': 0.01}}}}}
+    results = {'scales': {'10': {'wall_time': 11.0, 'stages': {'render': {'wall_time': 6.0}, 'parse': {'wall_time': 0.05}}},
+                          '100': {'wall_time': 99.0, 'stages': {}}}}
+    regressions = compare_results(results, baseline, 0.25)
+    assert len(regressions) == 1 and regressions[0].startswith('10 items, render')
@@ -0,0 +1,55 @@
+import os
+
+from vera2pdf.cache import ConversionCache
+
+
+def test_cache_roundtrip(tmp_path):
+    source = tmp_path / 'source.docx'
+    source.write_bytes(b'source document')
+    converted = tmp_path / 'converted.pdf'
+    converted.write_bytes(b'%PDF converted')
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    key = cache.get_key(str(source), 'libreoffice', '7.6')
+    target = str(tmp_path / 'target.pdf')
+    assert not cache.get(key, target)
+    cache.put(key, str(converted))
+    assert cache.get(key, target)
+    assert open(target, 'rb').read() == b'%PDF converted'
+
+
+def test_cache_key_depends_on_converter_version(tmp_path):
+    source = tmp_path / 'source.docx'
+    source.write_bytes(b'source document')
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    assert cache.get_key(str(source), 'libreoffice', '7.6') != cache.get_key(str(source), 'libreoffice', '24.2')
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ConversionCache(str(tmp_path / 'cache'), max_size=25)
+    keys = []
+    for i in range(3):
+        converted = tmp_path / f'converted{i}.pdf'
+        converted.write_bytes(b'x' * 10)
+        keys.append(f'{i:02d}' * 32)
+        cache.put(keys[i], str(converted))
+        entry = cache.get_entry_path(keys[i], 'pdf')
+        if os.path.exists(entry):
+            os.utime(entry, (i, i))
+    assert not cache.get(keys[0], str(tmp_path / 'target.pdf'))
+    assert cache.get(keys[2], str(tmp_path / 'target.pdf'))
+
+
+def test_cache_folder_is_walked_only_over_limit(tmp_path, monkeypatch):
+    cache = ConversionCache(str(tmp_path / 'cache'), max_size=35)
+    walks = []
+    monkeypatch.setattr(cache, 'get_entries', lambda original=cache.get_entries: walks.append(True) or original())
+    converted = tmp_path / 'converted.pdf'
+    converted.write_bytes(b'x' * 10)
+    for i in range(3):
+        cache.put(f'{i:02d}' * 32, str(converted))
+    # replaced entry does not grow the total
+    cache.put('00' * 32, str(converted))
+    assert walks == [] and cache.size == 30
+    cache.put('03' * 32, str(converted))
+    assert walks == [True] and cache.size <= 35
+    assert ConversionCache(str(tmp_path / 'cache')).size == cache.size
@@ -0,0 +1,55 @@
+import os
+import sys
+import subprocess
+import threading
+
+import fitz
+
+from vera2pdf import Converter, ConversionOptions
+from generate_export import generate_export
+
+
+def test_concurrent_conversions_share_warm_converter(tmp_path, monkeypatch):
+    # assets are found next to the package from any working directory
+    monkeypatch.chdir(tmp_path)
+    paths = [str(tmp_path / name) for name in ['ck', 'tabor']]
+    for i, path in enumerate(paths):
+        generate_export(path, items=i+1, attachments=2, image_size=(40, 30), types=['pdf', 'jpg'])
+    results = {}
+    errors = []
+    with Converter(ConversionOptions(renderer='fitz')) as converter:
+        def convert(path):
+            try:
+                results[path] = converter.convert(path, os.path.join(path, 'out'))
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=convert, args=(path,)) for path in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        fitz_pool = converter.fitz_pool
+        again = converter.convert(paths[0], str(tmp_path / 'again'))
+        assert converter.fitz_pool is fitz_pool     # warm between calls
+    assert errors == []
+    assert converter.fitz_pool is None
+    pages = []
+    for path in paths:
+        assert results[path].output == os.path.join(path, 'out', 'RM_2024-04-03_A4.pdf')
+        assert results[path].stages['convert']['count'] > 0
+        with fitz.open(results[path].output) as doc:
+            pages.append(len(doc))
+    assert pages[0] < pages[1]
+    with fitz.open(again.output) as doc:
+        assert len(doc) == pages[0]
+
+
+def test_package_does_not_clash_with_modules_of_application(tmp_path):
+    # application with its own `model` and `service` imports them before and after the package
+    (tmp_path / 'model.py').write_text('NAME = "host model"\n')
+    (tmp_path / 'service.py').write_text('NAME = "host service"\n')
+    code = 'import model, vera2pdf, service; print(model.NAME, service.NAME, vera2pdf.ConversionOptions.__module__, sep=";")'
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=package_root)
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'host model;host service;vera2pdf.model'
@@ -0,0 +1,58 @@
+from lxml import etree
+
+from vera2pdf import main
+from vera2pdf.extraction import *
+from vera2pdf.model import *
+from vera2pdf.profiling import Profiler, current_profiler
+
+
+PAGE = '''<html><body><div class="prohlaseni">Usnesení</div><div>Rada města <b>schvaluje</b></div>
+<table class="akteri">
+<tr><td class="predkladatelLabel">Předkladatel:</td><td> Jan  Novák </td></tr>
+<tr><td>Text důvodové zprávy:</td><td>Důvod <b>jedna</b></td></tr>
+<tr><td>Materiál obsahuje:</td><td><a href="../prilohy/a.pdf">a.pdf</a><br><a href="../prilohy/b.docx">b.docx</a></td></tr>
+<tr><td>Materiál obsahuje:</td><td></td></tr>
+</table></body></html>'''
+
+
+def test_item_page_fields_are_extracted_with_warnings():
+    root = etree.fromstring(PAGE, etree.HTMLParser())
+    fields, warnings = extract_item_page_fields(root, '/export/navrhy-usneseni/navrh.html')
+    assert fields['presenter'] == 'Jan Novák'
+    assert fields['reason_text'] == 'Důvod <br/> jedna'
+    assert fields['resolution'] == ' Rada města schvaluje'
+    assert fields['processor'] == '' and fields['attachments'] == []
+    assert [(w.field, w.message) for w in warnings] == [('processor', 'not found'), ('attachments', 'found 2 times')]
+
+
+LABELS_OUTSIDE_AKTERI = '''<html><body><div class="prohlaseni">Usnesení</div><div>Rada města schvaluje</div>
+<table class="hlavicka"><tr><td>Rada města</td><td class="predkladatelLabel">Předkladatel:</td><td>Jan Novák</td></tr></table>
+<table class="akteri">
+<tr><td>Zpracovatel:</td><td>Petr Svoboda</td></tr>
+<tr><td>Text důvodové zprávy:</td><td>Důvod</td></tr>
+</table>
+<div><table><tr><td>Materiál obsahuje:</td><td><a href="../prilohy/a.pdf">a.pdf</a></td></tr></table></div>
+</body></html>'''
+
+
+def test_labels_are_found_anywhere_in_page():
+    root = etree.fromstring(LABELS_OUTSIDE_AKTERI, etree.HTMLParser())
+    fields, warnings = extract_item_page_fields(root, '/export/navrhy-usneseni/navrh.html')
+    assert fields['presenter'] == 'Jan Novák'
+    assert fields['processor'] == 'Petr Svoboda'
+    assert [attachment.files for attachment in fields['attachments']] == [['/export/prilohy/a.pdf']]
+    assert warnings == []
+
+
+def test_parse_warnings_are_kept_on_item_and_counted(tmp_path):
+    page = tmp_path / 'navrh.html'
+    page.write_text(PAGE, encoding='utf-8')
+    item = ProgrammeItem(id=7, link=str(page))
+    profiler = Profiler(programme='test')
+    token = current_profiler.set(profiler)
+    try:
+        main.parse_item_page(item)
+    finally:
+        current_profiler.reset(token)
+    assert [(w.source, w.field) for w in item.warnings] == [(str(page), 'processor'), (str(page), 'attachments')]
+    assert profiler.get_report()['counters'] == {'parse_warnings': 2}
@@ -0,0 +1,39 @@
+import os
+
+from vera2pdf.incremental import *
+from vera2pdf.model import *
+from vera2pdf.main import convert_programme
+from generate_export import generate_export
+
+
+def test_item_is_rebuilt_only_when_attachment_changes(tmp_path):
+    attachment_path = tmp_path / 'priloha.pdf'
+    attachment_path.write_bytes(b'%PDF first version')
+    header = ProgrammeHeader('Program', '20. Rady města', 'zasedací místnost', 'Jednání se koná 3.4.2024 v 16:00')
+    item = ProgrammeItem('1', 'Bod 1', attachments=[Attachment('uid', 'priloha', '.pdf', [str(attachment_path)])])
+    digest = get_item_digest(item, header, 'assets')
+    assert not is_item_up_to_date(str(tmp_path), item, digest)
+
+    item.pdf_temp_file = get_item_pdf_path(str(tmp_path), item)
+    (tmp_path / 'pitem_1.pdf').write_bytes(b'%PDF item')
+    save_item_manifest(str(tmp_path), item, digest)
+    assert is_item_up_to_date(str(tmp_path), item, get_item_digest(item, header, 'assets'))
+
+    attachment_path.write_bytes(b'%PDF second version')
+    assert not is_item_up_to_date(str(tmp_path), item, get_item_digest(item, header, 'assets'))
+    assert get_item_digest(item, header, 'other assets') != get_item_digest(item, header, 'assets')
+
+
+def test_rebuilds_do_not_leave_scratch_files_in_work_folder(tmp_path):
+    export = tmp_path / 'export'
+    generate_export(str(export), items=2, attachments=3, image_size=(40, 30), types=['zip', 'jpg', 'pdf'])
+    options = ConversionOptions(renderer='fitz', incremental=True, work_dir=str(tmp_path / 'work'))
+    listings = []
+    for i in range(3):
+        # changed attachment rebuilds its item, ZIP and image are extracted and converted again
+        generate_export(str(export), items=2, attachments=3, image_size=(40, 30), types=['zip', 'jpg', 'pdf'], seed=i)
+        convert_programme(str(export), str(tmp_path), options)
+        listings.append(sorted(os.listdir(tmp_path / 'work')))
+    assert listings[0] == listings[1] == listings[2]
+    assert 'attachments' not in listings[0]
+    assert all(not os.path.isdir(tmp_path / 'work' / name) for name in listings[0] if name not in ('html', 'css', 'fonts'))
@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import subprocess
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vera2pdf import libreoffice
+from vera2pdf.exceptions import LibreOfficeDaemonError, ConverterTimeoutError, ConversionError
+from vera2pdf.libreoffice import LibreOfficeDaemon, LibreOfficeWorker, LibreOfficePool
+
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='fake soffice is a POSIX script')
+
+
+class BridgeError(Exception):
+    pass
+
+
+class FakeUno():
+    @staticmethod
+    def systemPathToFileUrl(path):
+        return path
+
+
+class FakeDocument():
+    def __init__(self, url):
+        self.url = url
+        self.closed = False
+
+    def supportsService(self, service):
+        return service == 'com.sun.star.text.TextDocument'
+
+    def storeToURL(self, url, properties):
+        if os.path.basename(self.url).startswith('corrupt'):
+            raise ValueError('General input/output error')
+        with open(url, 'w') as f:
+            f.write('%PDF')
+
+    def close(self, deliver):
+        self.closed = True
+
+
+class FakeDesktop():
+    def __init__(self, process):
+        self.process = process
+        self.documents = []
+
+    def loadComponentFromURL(self, url, frame, flags, properties):
+        if os.path.basename(url).startswith('disconnect'):
+            raise BridgeError('Binary URP bridge disposed during call')
+        self.documents.append(FakeDocument(url))
+        return self.documents[-1]
+
+    def terminate(self):
+        self.process.terminate()
+
+
+def start_fake_listener(daemon):
+    # listener ignoring SIGTERM would stall `stop`, the fake one ends by it
+    daemon.process = subprocess.Popen(['sleep', '30'], start_new_session=True)
+    daemon.desktop = FakeDesktop(daemon.process)
+
+
+@pytest.fixture
+def fake_uno(monkeypatch):
+    monkeypatch.setattr(libreoffice, 'uno', FakeUno())
+    monkeypatch.setattr(libreoffice, 'uno_property', lambda name, value: (name, value))
+    monkeypatch.setattr(libreoffice, 'BRIDGE_ERRORS', (BridgeError,))
+    monkeypatch.setattr(LibreOfficeDaemon, 'start', start_fake_listener)
+
+
+@pytest.fixture
+def fake_soffice(tmp_path):
+    # `soffice --convert-to pdf FILE --outdir DIR` writes DIR/<stem>.pdf, files named `hang*` never finish
+    path = tmp_path / 'soffice'
+    path.write_text(f'''#!{sys.executable}
+import os, sys, time
+filepath = sys.argv[sys.argv.index('--outdir') - 1]
+if os.path.basename(filepath).startswith('hang'):
+    time.sleep(30)
+outdir = sys.argv[sys.argv.index('--outdir') + 1]
+with open(os.path.join(outdir, os.path.splitext(os.path.basename(filepath))[0] + '.pdf'), 'w') as f:
+    f.write('%PDF')
+''')
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_document_error_keeps_listener(fake_uno, tmp_path):
+    with LibreOfficeDaemon('soffice') as daemon:
+        daemon.convert(str(tmp_path / 'a.docx'), str(tmp_path / 'a.pdf'))
+        process = daemon.process
+        with pytest.raises(LibreOfficeDaemonError):
+            daemon.convert(str(tmp_path / 'corrupt.docx'), str(tmp_path / 'corrupt.pdf'))
+        assert daemon.is_alive() and daemon.process is process
+        assert all(doc.closed for doc in daemon.desktop.documents)
+        daemon.convert(str(tmp_path / 'b.docx'), str(tmp_path / 'b.pdf'))
+        assert daemon.restarts == 0
+    assert (tmp_path / 'b.pdf').exists()
+
+
+def test_disconnect_restarts_listener(fake_uno, tmp_path):
+    with LibreOfficeDaemon('soffice') as daemon:
+        daemon.convert(str(tmp_path / 'a.docx'), str(tmp_path / 'a.pdf'))
+        process = daemon.process
+        with pytest.raises(LibreOfficeDaemonError):
+            daemon.convert(str(tmp_path / 'disconnect.docx'), str(tmp_path / 'disconnect.pdf'))
+        assert daemon.desktop is None
+        start = time.monotonic()
+        daemon.convert(str(tmp_path / 'b.docx'), str(tmp_path / 'b.pdf'))
+        # listener without bridge is terminated, not waited for
+        assert time.monotonic() - start < 5
+        assert daemon.restarts == 1 and daemon.process is not process
+        assert process.poll() is not None
+
+
+def test_stop_terminates_disconnected_listener(fake_uno):
+    daemon = LibreOfficeDaemon('soffice')
+    daemon.start()
+    process = daemon.process
+    daemon.desktop = None
+    start = time.monotonic()
+    daemon.stop()
+    assert time.monotonic() - start < 5
+    assert process.poll() is not None and daemon.process is None
+
+
+def test_worker_falls_back_to_process(fake_uno, fake_soffice, tmp_path):
+    worker = LibreOfficeWorker(fake_soffice)
+    try:
+        assert worker.daemon is not None
+        (tmp_path / 'disconnect.docx').write_text('')
+        assert worker.convert(str(tmp_path / 'disconnect.docx'), str(tmp_path / 'disconnect.pdf')) == str(tmp_path / 'disconnect.pdf')
+        assert (tmp_path / 'disconnect.pdf').exists()
+    finally:
+        worker.stop()
+
+
+def test_worker_retries_timed_out_file_once_by_process(fake_uno, fake_soffice, tmp_path, monkeypatch):
+    attempts = []
+
+    def hang(filepath, new_filepath):
+        attempts.append(filepath)
+        raise ConverterTimeoutError('LibreOffice listener did not convert it.')
+
+    worker = LibreOfficeWorker(fake_soffice, timeout=0.5)
+    try:
+        monkeypatch.setattr(worker.daemon, 'convert', hang)
+        (tmp_path / 'a.docx').write_text('')
+        assert worker.convert(str(tmp_path / 'a.docx'), str(tmp_path / 'a.pdf')) == str(tmp_path / 'a.pdf')
+        with pytest.raises(ConversionError):
+            worker.convert(str(tmp_path / 'hang.docx'), str(tmp_path / 'hang.pdf'))
+        assert len(attempts) == 2
+    finally:
+        worker.stop()
+
+
+def test_pool_converts_from_threads(fake_soffice, tmp_path):
+    filepaths = []
+    for i in range(6):
+        filepath = tmp_path / f'file_{i}.docx'
+        filepath.write_text('')
+        filepaths.append(str(filepath))
+    with LibreOfficePool(fake_soffice, size=2, use_daemon=False) as pool:
+        assert len({worker.profile_dir for worker in pool.workers}) == 2
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            outputs = list(executor.map(lambda filepath: pool.convert(filepath, filepath[:-5] + '.pdf'), filepaths))
+        assert pool.idle.qsize() == 2
+    assert outputs == [filepath[:-5] + '.pdf' for filepath in filepaths]
+    assert all(os.path.exists(output) for output in outputs)
+    assert not any(os.path.exists(worker.profile_dir) for worker in pool.workers)
@@ -0,0 +1,30 @@
+import fitz
+
+from vera2pdf.optimize import *
+
+
+def make_gray_image(width, height, line_art):
+    # scattered black strokes on white, or gradient
+    if line_art:
+        rows = [bytes(0x10 if (x//4*7 ^ y//4*13) % 11 < 2 else 0xf0 for x in range(width)) for y in range(height)]
+    else:
+        rows = [bytes(x*255//width for x in range(width)) for y in range(height)]
+    return fitz.Pixmap(fitz.csGRAY, width, height, b''.join(rows), 0).tobytes('jpg', jpg_quality=95)
+
+
+def test_eink_profile_downsamples_images_to_target_dpi():
+    profile = IMAGE_PROFILES['eink']
+    doc = fitz.open()
+    page = doc.new_page()
+    # 2 inches wide at 200 dpi need 400 pixels
+    page.insert_image(fitz.Rect(72, 72, 216, 216), stream=make_gray_image(1200, 1200, line_art=False))
+    page.insert_image(fitz.Rect(72, 300, 216, 444), stream=make_gray_image(1200, 1200, line_art=True))
+    photo_xref, line_art_xref = [image[0] for image in page.get_images()]
+    size_before, size_after = optimize_pdf_images(doc, profile)
+    assert size_after < size_before
+    assert doc.xref_get_key(photo_xref, 'Width')[1] == '400'
+    assert doc.xref_get_key(photo_xref, 'Filter')[1] == '/DCTDecode'
+    assert doc.xref_get_key(line_art_xref, 'Filter')[1] == '/FlateDecode'
+    pix = fitz.Pixmap(doc, line_art_xref)
+    assert (pix.width, pix.height, pix.n) == (400, 400, 1)
+    assert set(pix.samples) == {0, 255}
@@ -0,0 +1,22 @@
+from vera2pdf.pagemap import PageMap, get_link_target
+
+
+def test_page_map_finds_ranges_by_anchor_and_link():
+    page_map = PageMap()
+    page_map.add('pitem_1', 2)
+    first = page_map.add('pitem_1_attachment_1', 3, ['/tmp/work/prilohy/a.pdf'])
+    page_map.add('pitem_1_attachment_2', 1, ['/tmp/work/prilohy/b.zip'])
+    page_map.add('pitem_1_attachment_3', 4, ['/tmp/work/prilohy/b.zip'])
+    empty = page_map.add('pitem_1_attachment_4', 0, ['/tmp/work/prilohy/c.docx'])
+    assert (first.start, first.count) == (2, 3)
+    assert page_map.get('pitem_1_attachment_3').start == 6
+    assert page_map.find_link({'kind': 5, 'file': '/tmp/work/html/../prilohy/a.pdf'}) is first
+    assert page_map.find_link({'kind': 2, 'uri': 'file:///tmp/work/prilohy/b.zip'}).anchor == 'pitem_1_attachment_2'
+    assert page_map.find_link({'kind': 2, 'uri': 'https://example.com/prilohy/a.pdf'}) is None
+    assert page_map.get_target_page(empty) == 9
+
+
+def test_link_target_of_escaped_file_uri():
+    assert get_link_target({'uri': 'file:///tmp/work/prilohy/p%C5%99%C3%ADloha%201.pdf#page=2'}) == '/tmp/work/prilohy/příloha 1.pdf'
+    assert get_link_target({'kind': 5, 'file': '/tmp/work/prilohy/p%C5%99%C3%ADloha%201.pdf'}) == '/tmp/work/prilohy/příloha 1.pdf'
+    assert get_link_target({'kind': 4, 'name': 'NextPage'}) is None
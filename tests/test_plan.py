@@ -0,0 +1,37 @@
+import zipfile
+
+import fitz
+
+from vera2pdf.main import estimate_programme_jobs
+from vera2pdf.model import *
+from vera2pdf.plan import get_makespan, get_longest_first_order, get_plan_summary
+
+
+def test_longest_first_makespan():
+    costs = [1, 1, 1, 1, 4]
+    assert get_longest_first_order(costs) == [4, 0, 1, 2, 3]
+    # the long job started last would end at 2 + 4
+    assert get_makespan(costs, 2) == 4
+    assert get_makespan(costs, 1) == 8
+
+
+def test_programme_jobs_are_estimated_without_extraction(tmp_path):
+    pdf_path = str(tmp_path / 'sken.pdf')
+    doc = fitz.open()
+    for i in range(30):
+        doc.new_page()
+    doc.save(pdf_path)
+    zip_path = str(tmp_path / 'prilohy.zip')
+    with zipfile.ZipFile(zip_path, 'w') as zf:
+        zf.writestr('dir/', b'')
+        zf.writestr('rozpocet.xlsx', b'x' * 1024 * 1024)
+        zf.writestr('foto.jpg', b'x' * 1024)
+    attachments = [Attachment('1', 'Sken', '.pdf', [pdf_path], [pdf_path]),
+                   Attachment('2', 'Prilohy', '.zip', [zip_path], [zip_path])]
+    estimates = estimate_programme_jobs([ProgrammeItem('1', 'Bod 1', attachments=attachments)])
+    assert [(e.name, e.converter, e.pages) for e in estimates] == \
+        [('Sken', 'none', 30), ('Prilohyrozpocet.xlsx', 'libreoffice', 51), ('Prilohyfoto.jpg', 'pymupdf', 1)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['prilohy.zip', 'sken.pdf']
+    summary = get_plan_summary(estimates, 1, workers=2)
+    assert summary['converters']['libreoffice']['files'] == 1
+    assert summary['convert_time'] == estimates[1].convert_time > estimates[2].convert_time
@@ -0,0 +1,34 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from vera2pdf.profiling import Profiler, current_profiler, profile_stage, tag_stage, submit_in_context
+
+
+def convert(name):
+    with profile_stage('convert', file=name) as record:
+        tag_stage(cached=False)
+        record['output_bytes'] = 10
+
+
+def test_profile_report_sums_stages_from_threads(tmp_path):
+    profiler = Profiler(programme='test')
+    token = current_profiler.set(profiler)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for i in range(3):
+                submit_in_context(pool, convert, f'{i}.docx')
+        with profile_stage('save', pages=4):
+            pass
+    finally:
+        current_profiler.reset(token)
+    with profile_stage('save', pages=1):      # no current profiler, not recorded
+        pass
+    report_filepath = tmp_path / 'run.json'
+    profiler.write_report(report_filepath)
+    report = json.loads(report_filepath.read_text(encoding='utf-8'))
+    assert report['info'] == {'programme': 'test'}
+    assert report['stages']['convert']['count'] == 3
+    assert report['stages']['convert']['output_bytes'] == 30
+    assert report['stages']['save']['count'] == 1
+    assert report['stages']['save']['pages'] == 4
+    assert all(record['cached'] is False for record in report['records'] if record['stage'] == 'convert')
@@ -0,0 +1,117 @@
+import re
+import shutil
+import threading
+
+import fitz
+import pytest
+
+from vera2pdf import main
+from vera2pdf import render
+from vera2pdf.cache import ConversionCache
+from vera2pdf.exceptions import LibreOfficeNotFoundError
+from vera2pdf.main import convert_programme
+from vera2pdf.model import ConversionOptions
+from generate_export import generate_export
+
+
+def describe_pdf(filepath) -> dict:
+    # pages by attachments they show and internal links by target page, what must not depend on the way of build
+    with fitz.open(filepath) as doc:
+        pages = []
+        for page in doc:
+            names = re.findall(r'priloha_\d+_\d+', page.get_text())
+            links = sorted((link['kind'], link.get('page'), tuple(round(x) for x in link['from'])) for link in page.get_links())
+            pages.append((names[0] if names else None, links))
+        return {'pages': pages, 'toc': doc.get_toc(simple=True)}
+
+
+def convert_export(tmp_path, name, **options) -> str:
+    (tmp_path / name).mkdir()
+    return convert_programme(str(tmp_path / 'export'), str(tmp_path / name), ConversionOptions(renderer='fitz', **options))
+
+
+def test_parallel_conversion_keeps_order_of_attachments(tmp_path):
+    generate_export(str(tmp_path / 'export'), items=4, attachments=4, image_size=(40, 30), types=['pdf', 'jpg', 'zip', 'png', 'txt'])
+    sequential = describe_pdf(convert_export(tmp_path, 'sequential'))
+    parallel = describe_pdf(convert_export(tmp_path, 'parallel', jobs=4))
+    assert parallel == sequential
+    names = [name for name, links in parallel['pages'] if name is not None]
+    order = [tuple(int(n) for n in name.split('_')[1:]) for name in names]
+    assert order == sorted(order) and {item for item, attachment in order} == {1, 2, 3, 4}
+
+
+def test_index_links_item_without_page_by_its_number(tmp_path):
+    generate_export(str(tmp_path / 'export'), items=2, attachments=1, image_size=(40, 30), types=['pdf'])
+    index = tmp_path / 'export' / 'index.html'
+    index.write_text(index.read_text(encoding='utf-8').replace('<td>3.</td>', '<td>9.</td>'), encoding='utf-8')
+    output = convert_export(tmp_path, 'out')
+    with fitz.open(output) as doc:
+        # index follows the cover page
+        links = [link for link in doc[1].get_links() if link['from'].x0 < 300]
+        assert [link['kind'] for link in links] == [fitz.LINK_GOTO]*3
+        titles = [' '.join(doc[link['page']].get_text().split()) for link in links]
+        assert 'Bod 1 - materiál' in titles[0] and 'Bod 2 - materiál' in titles[1] and 'Různé' in titles[2]
+
+
+def test_missing_libre_office_gives_placeholder_pages(tmp_path, monkeypatch):
+    def not_found():
+        raise LibreOfficeNotFoundError
+    monkeypatch.setattr(main, 'get_libre_office_path', not_found)
+    generate_export(str(tmp_path / 'export'), items=2, attachments=2, image_size=(40, 30), types=['pdf', 'docx', 'txt'])
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    output = convert_programme(str(tmp_path / 'export'), str(tmp_path), ConversionOptions(renderer='fitz'), cache=cache)
+    with fitz.open(output) as doc:
+        text = ' '.join(' '.join(page.get_text().split()) for page in doc)
+    assert text.count('nemohla být převedena do PDF') == 3
+    assert 'priloha_2_2.pdf strana 2' in text
+
+
+def test_fitz_links_point_to_pages_of_items_and_attachments(tmp_path):
+    generate_export(str(tmp_path / 'export'), items=2, attachments=2, image_size=(40, 30), types=['pdf'])
+    # names with spaces and diacritics are escaped by renderers
+    (tmp_path / 'export' / 'prilohy' / 'priloha_1_1.pdf').rename(tmp_path / 'export' / 'prilohy' / 'příloha 1.pdf')
+    page = tmp_path / 'export' / 'navrhy-usneseni' / 'navrh-usneseni_1.html'
+    page.write_text(page.read_text(encoding='utf-8').replace('priloha_1_1.pdf', 'příloha 1.pdf'), encoding='utf-8')
+    output = convert_export(tmp_path, 'out')
+    with fitz.open(output) as doc:
+        index_links = [link for link in doc[1].get_links() if link['from'].x0 < 300]
+        item_page = index_links[0]['page']
+        assert 'Bod 1 - materiál' in doc[item_page].get_text()
+        # links of attachments under the label, navigation links are at the top of page
+        links = [link for link in doc[item_page].get_links() if link['from'].y0 > 150]
+        assert [link['kind'] for link in links] == [fitz.LINK_GOTO]*2
+        texts = [' '.join(doc[link['page']].get_text().split()) for link in sorted(links, key=lambda link: link['from'].y0)]
+        assert 'priloha_1_1.pdf strana 1' in texts[0] and 'priloha_1_2.pdf strana 1' in texts[1]
+
+
+def test_pipeline_builds_the_same_programme_as_sequential_run(tmp_path):
+    generate_export(str(tmp_path / 'export'), items=3, attachments=3, image_size=(40, 30), types=['pdf', 'zip', 'jpg', 'txt'])
+    sequential = describe_pdf(convert_export(tmp_path, 'sequential'))
+    pipeline = describe_pdf(convert_export(tmp_path, 'pipeline', pipeline=True, jobs=2))
+    assert len(pipeline['pages']) == len(sequential['pages'])
+    assert pipeline['pages'] == sequential['pages']
+    assert pipeline['toc'] == sequential['toc']
+
+
+@pytest.mark.skipif(shutil.which('wkhtmltopdf') is None, reason='wkhtmltopdf is not installed')
+def test_pipeline_splits_batch_in_pymupdf_thread(tmp_path, monkeypatch):
+    generate_export(str(tmp_path / 'export'), items=2, attachments=2, image_size=(40, 30), types=['pdf', 'jpg'])
+    threads = {}
+
+    def record(name, fn):
+        def wrapper(*args, **kwargs):
+            threads.setdefault(name, set()).add(threading.get_ident())
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(render, 'split_pdf_by_anchors', record('split', render.split_pdf_by_anchors))
+    monkeypatch.setattr(main, 'assemble_programme_item_pdf', record('assemble', main.assemble_programme_item_pdf))
+    outputs = {}
+    for name, pipeline in [('sequential', False), ('pipeline', True)]:
+        (tmp_path / name).mkdir()
+        options = ConversionOptions(batch_render=True, pipeline=pipeline, jobs=2)
+        outputs[name] = describe_pdf(convert_programme(str(tmp_path / 'export'), str(tmp_path / name), options))
+        if pipeline:
+            assert threads['split'] == threads['assemble'] and len(threads['split']) == 1
+        threads.clear()
+    assert outputs['pipeline'] == outputs['sequential']
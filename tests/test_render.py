@@ -0,0 +1,62 @@
+import fitz
+
+from vera2pdf.render import render_pdf_by_fitz, set_named_destinations, split_pdf_by_anchors
+from vera2pdf.pagemap import get_link_target
+
+
+PAGE = '''<html><body><div id="pitem_7"></div><div id="content">
+<p>Bod 7</p>
+{paragraphs}
+<table class="akteri"><tr><td><div id="pitem_7_attachments"></div>Materiál obsahuje:</td>
+<td><a href="../prilohy/příloha a.pdf">Příloha a</a><br><a href="https://example.com/b.pdf">Příloha b</a></td></tr></table>
+</div></body></html>'''
+
+
+def test_fitz_renderer_writes_anchors_and_file_links(tmp_path):
+    (tmp_path / 'html').mkdir()
+    html_filepath = tmp_path / 'html' / 'pitem_7.html'
+    html_filepath.write_text(PAGE.format(paragraphs='<p>odstavec</p>'*80), encoding='utf-8')
+    pdf_filepath = render_pdf_by_fitz(str(html_filepath), str(tmp_path / 'pitem_7.pdf'))
+    with fitz.open(pdf_filepath) as doc:
+        assert len(doc) > 1
+        names = doc.resolve_names()
+        assert names['pitem_7']['page'] == 0
+        assert names['pitem_7_attachments']['page'] == len(doc)-1
+        assert 'Materiál obsahuje:' in doc[len(doc)-1].get_text()
+        links = doc[len(doc)-1].get_links()
+    # one link per line of anchor, relative href of escaped name points to the file as wkhtmltopdf link
+    assert [get_link_target(link) for link in links] == [str(tmp_path / 'prilohy' / 'příloha a.pdf'), None]
+    assert links[1]['uri'] == 'https://example.com/b.pdf'
+
+
+def write_batch(filepath, page_count, anchors):
+    doc = fitz.open()
+    for i in range(page_count):
+        doc.new_page().insert_text((72, 72), f'strana {i+1}')
+    set_named_destinations(doc, {name: (pno, fitz.Point(36, 36)) for name, pno in anchors.items()})
+    doc.save(str(filepath))
+    doc.close()
+
+
+def get_page_texts(filepath) -> list:
+    with fitz.open(str(filepath)) as doc:
+        return [page.get_text().strip() for page in doc]
+
+
+def test_batch_is_split_by_anchors_up_to_last_page(tmp_path):
+    write_batch(tmp_path / 'batch.pdf', 5, {'pitem_1': 0, 'pitem_2': 2, 'cover': 4})
+    pages = [('pitem_1.html', tmp_path / 'pitem_1.pdf', 'pitem_1'),
+             ('pitem_2.html', tmp_path / 'pitem_2.pdf', 'pitem_2'),
+             ('cover.html', tmp_path / 'cover.pdf', 'cover')]
+    assert split_pdf_by_anchors(str(tmp_path / 'batch.pdf'), [(html, str(pdf), anchor) for html, pdf, anchor in pages])
+    assert get_page_texts(tmp_path / 'pitem_1.pdf') == ['strana 1', 'strana 2']
+    assert get_page_texts(tmp_path / 'pitem_2.pdf') == ['strana 3', 'strana 4']
+    # anchor on the last page gets the one page
+    assert get_page_texts(tmp_path / 'cover.pdf') == ['strana 5']
+
+
+def test_batch_with_missing_anchor_is_not_split(tmp_path):
+    write_batch(tmp_path / 'batch.pdf', 3, {'pitem_1': 0, 'cover': 2})
+    pages = [(f'{anchor}.html', str(tmp_path / f'{anchor}.pdf'), anchor) for anchor in ['pitem_1', 'pitem_2', 'cover']]
+    assert not split_pdf_by_anchors(str(tmp_path / 'batch.pdf'), pages)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['batch.pdf']
@@ -0,0 +1,53 @@
+from lxml import etree
+
+from vera2pdf.rewrite import *
+from vera2pdf.model import *
+
+
+PAGE = '''<html><body><div id="content">
+<div class="nadpis">Bod název</div>
+<hr class="cela">
+<table class="podpisy" style="color: red"><tr><td>Podpis</td></tr></table>
+<hr class="cela">
+<table class="akteri"><tr><td><font color="blue">Předkladatel:</font></td><td>Jan Novák</td></tr>
+<tr><td>Materiál obsahuje:</td><td><a href="../prilohy/a.pdf">a.pdf</a></td></tr></table>
+<hr class="cela">
+</div></body></html>'''
+
+
+def test_programme_item_page_is_edited_in_one_pass():
+    root = etree.fromstring(PAGE, etree.HTMLParser())
+    edit_programme_item_tree(root, ProgrammeItem('7', 'Bod název'))
+    assert root.xpath('string(//div[@class="nadpis"])') == '7. Bod název'
+    assert len(root.xpath('//table[@class="podpisy"]')) == 2
+    assert root.xpath('//*[@style or @color]') == []
+    assert root.xpath('//body/div[1]/@id') == ['pitem_7']
+    assert root.xpath('//td[div/@id="pitem_7_attachments"]/text()') == ['Materiál obsahuje:']
+    # notes follow the last line of page
+    assert root.xpath('string(//hr[@class="cela"][last()]/following-sibling::table[1])') == 'Poznámky:'
+    assert 'Hlasování:' in tree_to_html(root)
+
+
+INDEX = '''<html><body><table class="program"><tr class="popisek"><td>Bod</td><td class="left">Název</td></tr>
+<tr><td>1.</td><td class="left"><a href="navrhy-usneseni/navrh-usneseni_1.html">Bod 1</a></td></tr>
+<tr><td>3.</td><td class="left" style="color: red">Informace<br><i>Předkladatel</i></td></tr>
+<tr><td>9.</td><td class="left"><i>Různé</i><br><i>Předkladatel</i></td></tr>
+</table></body></html>'''
+
+
+def test_index_links_items_by_their_numbers():
+    root = etree.fromstring(INDEX, etree.HTMLParser())
+    items = [ProgrammeItem('1', 'Bod 1'), ProgrammeItem('3', 'Informace'), ProgrammeItem('9', 'Různé')]
+    edit_index_tree(root, items)
+    assert root.xpath('//td[@class="left"]//a/@href') == \
+        ['navrhy-usneseni/navrh-usneseni_1.html', 'html/pitem_3.html', 'html/pitem_9.html']
+    assert root.xpath('string(//a[@href="html/pitem_3.html"])') == 'Informace'
+    assert root.xpath('string(//a[@href="html/pitem_9.html"])') == 'Různé'
+    assert root.xpath('//*[@style]') == []
+    assert root.xpath('//body/div[1]/@id') == ['programme_index']
+
+
+def test_links_are_written_as_in_export():
+    root = etree.fromstring('<html><body><a href="../prilohy/příloha 1.pdf">Příloha</a><img src="obrázek a.png"></body></html>', etree.HTMLParser())
+    html = tree_to_html(root)
+    assert 'href="../prilohy/příloha 1.pdf"' in html and 'src="obrázek a.png"' in html
@@ -0,0 +1,38 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vera2pdf.scheduler import TaskGraph
+
+
+def test_task_starts_when_its_dependencies_finish():
+    graph = TaskGraph()
+    order = []
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as pool, ThreadPoolExecutor(max_workers=1) as serial:
+        slow = graph.submit(pool, lambda: release.wait(5) and order.append('slow'))
+        fast = graph.submit(pool, lambda: order.append('fast') or 'converted')
+        # independent of slow task, so it does not wait for it
+        assembled = graph.submit(serial, lambda: order.append(fast.result()), deps=[fast])
+        joined = graph.submit(serial, lambda: order.append('joined') or len(order), deps=[slow, assembled])
+        assembled.result(timeout=5)
+        assert not joined.done()
+        release.set()
+        graph.wait()
+    assert order == ['fast', 'converted', 'slow', 'joined']
+    assert joined.result() == 4
+
+
+def test_failed_task_fails_its_dependents_only():
+    graph = TaskGraph()
+    calls = []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        failed = graph.submit(pool, lambda: 1/0)
+        skipped = graph.submit(pool, calls.append, 'skipped', deps=[failed])
+        other = graph.submit(pool, calls.append, 'other')
+        with pytest.raises(ZeroDivisionError):
+            graph.wait()
+    assert calls == ['other'] and other.result() is None
+    assert isinstance(skipped.exception(), ZeroDivisionError)
@@ -0,0 +1,91 @@
+import io
+import os
+import json
+import time
+import zipfile
+import threading
+import urllib.request
+import urllib.error
+
+import fitz
+import pytest
+
+from vera2pdf.converter import Converter
+from vera2pdf.exceptions import UnsafeArchiveError, ServiceBusyError
+from vera2pdf.model import ConversionOptions
+from vera2pdf.service import ConversionService, create_server, extract_export_zip
+from generate_export import generate_export
+
+
+def zip_folder(path, prefix='') -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                filepath = os.path.join(root, name)
+                zf.write(filepath, prefix + os.path.relpath(filepath, path))
+    return buffer.getvalue()
+
+
+def request(url, data=None, method=None):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, method=method)) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def test_uploaded_export_is_converted_and_downloaded(tmp_path):
+    generate_export(str(tmp_path / 'export'), items=2, attachments=2, image_size=(40, 30), types=['pdf', 'jpg'])
+    upload = zip_folder(tmp_path / 'export', '2024-04-03/')
+    with Converter(ConversionOptions(renderer='fitz')) as converter, \
+         ConversionService(converter, str(tmp_path / 'jobs'), workers=2, queue_size=2) as service:
+        server = create_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}'
+        try:
+            status, body = request(f'{url}/jobs', upload)
+            assert status == 202
+            job = json.loads(body)
+            while job['status'] in ('queued', 'running'):
+                time.sleep(0.2)
+                job = json.loads(request(f'{url}/jobs/{job["id"]}')[1])
+            assert job['status'] == 'done', job['error']
+            status, pdf = request(f'{url}{job["pdf"]}')
+            assert status == 200
+            with fitz.open('pdf', pdf) as doc:
+                assert len(doc) > 2
+            assert request(f'{url}/jobs/{job["id"]}', method='DELETE')[0] == 200
+            assert request(f'{url}/jobs/{job["id"]}')[0] == 404
+            status, body = request(f'{url}/jobs', b'not a zip')
+            job = json.loads(body)
+            while job['status'] in ('queued', 'running'):
+                time.sleep(0.2)
+                job = json.loads(request(f'{url}/jobs/{job["id"]}')[1])
+            assert job['status'] == 'failed'
+            assert request(f'{url}/jobs/{job["id"]}/pdf')[0] == 409
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def test_export_zip_member_outside_of_folder_is_rejected(tmp_path):
+    zip_filepath = tmp_path / 'export.zip'
+    with zipfile.ZipFile(zip_filepath, 'w') as zf:
+        zf.writestr('index.html', '<html></html>')
+        zf.writestr('../evil.txt', 'x')
+    with pytest.raises(UnsafeArchiveError):
+        extract_export_zip(str(zip_filepath), str(tmp_path / 'export'))
+    assert not (tmp_path / 'evil.txt').exists()
+    assert not (tmp_path / 'export' / 'index.html').exists()
+
+
+def test_full_queue_rejects_job(tmp_path):
+    # workers are not started, the first job stays queued
+    service = ConversionService(None, str(tmp_path / 'jobs'), queue_size=1)
+    service.submit(service.create_job())
+    job = service.create_job()
+    with pytest.raises(ServiceBusyError):
+        service.submit(job)
+    assert not os.path.exists(job.path)
+    assert service.is_busy()
@@ -0,0 +1,18 @@
+import fitz
+
+from vera2pdf.stamp import Stamp, STAMP_FONT_PATH
+
+
+def test_stamp_is_drawn_at_displayed_bottom_of_rotated_pages():
+    doc = fitz.open()
+    for width, height, rotation in [(595, 842, 0), (842, 595, 270), (842, 595, 0)]:
+        page = doc.new_page(width=width, height=height)
+        page.set_rotation(rotation)
+    stamp = Stamp(doc, 'Bod 1 - Rozpočtové opatření # Příloha č. 1', font_path=STAMP_FONT_PATH)
+    for page in doc:
+        stamp.apply(page, page.number+1)
+    doc = fitz.open('pdf', doc.tobytes(garbage=3))
+    for page in doc:
+        assert ' '.join(page.get_text().split()) == f'Strana {page.number+1} z 3 # Bod 1 - Rozpočtové opatření # Příloha č. 1'
+        assert (page.search_for('Strana')[0] * page.rotation_matrix).y1 > page.rect.height-18
+    assert len({font[0] for page in doc for font in page.get_fonts()}) == 1
@@ -0,0 +1,46 @@
+import sys
+import time
+
+import pytest
+
+from vera2pdf.exceptions import ConverterTimeoutError, ConversionError
+from vera2pdf.profiling import Profiler, current_profiler
+from vera2pdf.supervise import run_supervised, convert_supervised
+
+
+def python_command(code):
+    return [sys.executable, '-c', code]
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='process groups are POSIX')
+def test_timeout_kills_process_group(tmp_path):
+    marker = tmp_path / 'marker'
+    # child of the converter would write marker after its parent is killed
+    command = ['/bin/sh', '-c', f'(sleep 2; touch {marker}) & sleep 30']
+    start = time.monotonic()
+    with pytest.raises(ConverterTimeoutError):
+        run_supervised(command, timeout=0.5)
+    assert time.monotonic() - start < 5
+    time.sleep(2.5)
+    assert not marker.exists()
+
+
+def test_failed_conversion_is_retried_once_and_counted(tmp_path):
+    output = tmp_path / 'out.pdf'
+    retries = []
+    profiler = Profiler()
+    token = current_profiler.set(profiler)
+    try:
+        with pytest.raises(ConversionError):
+            convert_supervised(python_command('import time; time.sleep(30)'), str(output), timeout=0.5,
+                               before_retry=lambda: retries.append(True))
+    finally:
+        current_profiler.reset(token)
+    assert retries == [True]
+    assert profiler.get_report()['counters'] == {'timeouts': 2, 'retries': 1}
+
+
+def test_output_is_accepted_despite_exit_code(tmp_path):
+    output = tmp_path / 'out.pdf'
+    command = python_command(f'import sys; open({str(output)!r}, "w").write("%PDF"); sys.exit(1)')
+    assert convert_supervised(command, str(output), timeout=10) == str(output)
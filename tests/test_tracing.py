@@ -0,0 +1,23 @@
+from loguru import logger
+
+from vera2pdf.tracing import lazy_logger, setup_logging
+
+
+def test_trace_arguments_are_evaluated_only_with_trace_sink(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    def describe():
+        calls.append(1)
+        return 'rect'
+
+    try:
+        setup_logging()
+        lazy_logger.trace('Page {}', describe)
+        assert calls == []
+        setup_logging(str(tmp_path / 'trace.log'))
+        lazy_logger.trace('Page {}', describe)
+        assert calls == [1]
+    finally:
+        logger.remove()
+    assert 'Page rect' in (tmp_path / 'trace.log').read_text()
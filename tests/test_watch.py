@@ -0,0 +1,24 @@
+import threading
+
+from vera2pdf.watch import ProgrammeWatcher
+
+
+def test_burst_of_changes_is_reported_once_without_excluded_folder(tmp_path):
+    (tmp_path / 'index.html').write_text('program')
+    (tmp_path / 'out').mkdir()
+    watcher = ProgrammeWatcher(str(tmp_path), debounce=0.5, interval=0.05, excluded=[str(tmp_path / 'out'), str(tmp_path.parent)], use_watchdog=False)
+
+    def change():
+        for i in range(3):
+            (tmp_path / 'index.html').write_text(f'program {i}')
+            (tmp_path / 'prilohy').mkdir(exist_ok=True)
+            (tmp_path / 'prilohy' / f'priloha_{i}.pdf').write_bytes(b'%PDF')
+            (tmp_path / 'out' / 'RM.pdf').write_bytes(b'%PDF' * i)
+            threading.Event().wait(0.1)
+
+    thread = threading.Thread(target=change)
+    thread.start()
+    assert watcher.wait_for_changes() == ['index.html', 'prilohy/priloha_0.pdf', 'prilohy/priloha_1.pdf', 'prilohy/priloha_2.pdf']
+    thread.join()
+    threading.Timer(0.2, watcher.stop).start()
+    assert watcher.wait_for_changes() is None
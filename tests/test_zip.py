@@ -0,0 +1,58 @@
+import zipfile
+
+import pytest
+
+from vera2pdf.main import extract_zip_file, extract_zip_files, read_archive_member
+from vera2pdf.exceptions import *
+from vera2pdf.model import *
+
+
+def create_zip(path, members):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+def test_nested_zip_is_extracted_without_dirs_and_empty_files(tmp_path):
+    inner = create_zip(tmp_path / 'inner.zip', {'priloha.pdf': b'%PDF inner'})
+    outer = create_zip(tmp_path / 'prilohy.zip', {'dir/': b'', 'empty.txt': b'', 'zprava.txt': b'text',
+                                                   'vnorene.zip': open(inner, 'rb').read()})
+    out_path = tmp_path / 'out'
+    out_path.mkdir()
+    attachment = Attachment('uid', 'prilohy.zip', '.zip', [outer], [outer])
+    items = extract_zip_files([ProgrammeItem('1', 'Bod 1', attachments=[attachment])], str(out_path))
+    attachments = items[0].attachments
+    assert [a.name for a in attachments] == ['prilohy.zipzprava.txt', 'prilohy.zipvnorene.zip/priloha.pdf']
+    assert all(a.orig_files == [outer] for a in attachments)
+    # PDF stays in nested ZIP, only text for LibreOffice and nested ZIP are written
+    assert sorted(p.name for p in out_path.rglob('*') if p.is_file()) == ['vnorene.zip', 'zprava.txt']
+    member = attachments[1].files[0]
+    assert isinstance(member, ArchiveMember) and member.name == 'priloha.pdf'
+    assert read_archive_member(member) == b'%PDF inner'
+
+
+def test_zip_bomb_is_refused(tmp_path):
+    bomb = create_zip(tmp_path / 'bomb.zip', {'zeros.txt': bytes(8*1024*1024)})
+    attachment = Attachment('uid', 'bomb.zip', '.zip', [bomb], [bomb])
+    with pytest.raises(ZipLimitExceededError):
+        extract_zip_file(bomb, attachment, str(tmp_path))
+    with pytest.raises(ZipLimitExceededError):
+        extract_zip_file(bomb, attachment, str(tmp_path), max_size=1024, max_ratio=10000)
+    items = extract_zip_files([ProgrammeItem('1', 'Bod 1', attachments=[attachment])], str(tmp_path))
+    assert items[0].attachments == []
+
+
+def test_nested_zips_share_limits_of_attachment(tmp_path):
+    inner = create_zip(tmp_path / 'inner.zip', {'zeros.txt': bytes(900_000)})
+    outer = create_zip(tmp_path / 'outer.zip', {f'vnorene_{i}.zip': open(inner, 'rb').read() for i in range(10)})
+    attachment = Attachment('uid', 'outer.zip', '.zip', [outer], [outer])
+    for name in ['size', 'ratio', 'all']:
+        (tmp_path / name).mkdir()
+    with pytest.raises(ZipLimitExceededError, match='size'):
+        extract_zip_file(outer, attachment, str(tmp_path / 'size'), max_size=2_000_000, max_ratio=10**9)
+    assert sum(p.stat().st_size for p in (tmp_path / 'size').rglob('*.txt')) <= 2_000_000
+    # ratio of nested ZIPs is checked against the small outer file
+    with pytest.raises(ZipLimitExceededError, match='ratio'):
+        extract_zip_file(outer, attachment, str(tmp_path / 'ratio'), max_size=10**9, max_ratio=100)
+    assert len(extract_zip_file(outer, attachment, str(tmp_path / 'all'), max_size=10**9, max_ratio=10**9)) == 10
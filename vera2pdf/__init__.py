@@ -0,0 +1,10 @@
+from .model import ConversionOptions, ConversionResult
+from .exceptions import AppError
+
+
+def __getattr__(name):
+    # converter imports main, which must not be imported before `python -m vera2pdf.main` runs it
+    if name == 'Converter':
+        from .converter import Converter
+        return Converter
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,30 +1,33 @@
 #!/bin/env bash
 
+# modules of the package are run from repository folder
+cd "$(dirname "$0")/.."
+
 # python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram1RM09-01-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram2RM23-01-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram3RM02-02-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram4RM13-02-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram5RM27-02-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram6RM13-03-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram7RM27-03-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram8RM12-04-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram10RM10-05-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram11RM22-05-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram12RM05-06-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram13RM19-06-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram14RM10-07-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram15RM31-07-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram16RM28-08-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram17RM11-09-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram18RM25-09-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram19RM10-10-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram20RM24-10-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram1RM09-01-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram2RM23-01-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram3RM02-02-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram4RM13-02-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram5RM27-02-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram6RM13-03-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram7RM27-03-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram8RM12-04-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram10RM10-05-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram11RM22-05-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram12RM05-06-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram13RM19-06-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram14RM10-07-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram15RM31-07-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram16RM28-08-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram17RM11-09-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram18RM25-09-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram19RM10-10-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/rada/programy/OneDrive_2023-11-04/exportProgram20RM24-10-2023
 
 # python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram4ZM22-02-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram5ZM26-04-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram6ZM28-06-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram7ZM23-08-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram8ZM06-09-2023
-python main.py -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram9ZM01-11-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram4ZM22-02-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram5ZM26-04-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram6ZM28-06-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram7ZM23-08-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram8ZM06-09-2023
+python -m vera2pdf.main -o /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04 -p /Users/ales/Documents/_komunita/zastupitelstvo2022-26/zastupitelstvo/zasedani/OneDrive_2023-11-04/exportProgram9ZM01-11-2023
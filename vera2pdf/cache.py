@@ -0,0 +1,101 @@
+import os
+import hashlib
+import shutil
+import tempfile
+import threading
+
+from loguru import logger
+
+
+def update_hash_from_file(h, filepath):
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024*1024), b''):
+            h.update(chunk)
+    return h
+
+
+class ConversionCache():
+    """On-disk cache of converted attachments shared between runs.
+
+    Entries are addressed by hash of the source bytes, converter name and converter
+    version. When the cache grows over `max_size` bytes, least recently used
+    entries are removed.
+    """
+
+    def __init__(self, directory, max_size=1024*1024*1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        # running total, the folder is walked again only when it exceeds max_size
+        self.size = sum(size for mtime, size, path in self.get_entries())
+
+    def get_key(self, source, converter, version) -> str:
+        # source is path to file or bytes of archive member
+        if isinstance(source, bytes):
+            h = hashlib.sha256(source)
+        else:
+            h = update_hash_from_file(hashlib.sha256(), source)
+        h.update(f'\0{converter}\0{version}'.encode('utf-8'))
+        return h.hexdigest()
+
+    def get_entry_path(self, key, ext) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.{ext}')
+
+    def get(self, key, new_filepath) -> bool:
+        ext = new_filepath.rsplit('.', 1)[-1]
+        entry = self.get_entry_path(key, ext)
+        try:
+            shutil.copyfile(entry, new_filepath)
+            os.utime(entry)     # mark as recently used
+        except FileNotFoundError:
+            return False
+        logger.trace(f'Cache hit {key} for {os.path.basename(new_filepath)}.')
+        return True
+
+    def put(self, key, filepath):
+        ext = filepath.rsplit('.', 1)[-1]
+        entry = self.get_entry_path(key, ext)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # copy under temporary name first, concurrent readers never see half written entry
+        fd, tmp_entry = tempfile.mkstemp(dir=os.path.dirname(entry), suffix='.tmp')
+        os.close(fd)
+        shutil.copyfile(filepath, tmp_entry)
+        size = os.path.getsize(tmp_entry)
+        with self.lock:
+            try:
+                self.size -= os.path.getsize(entry)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_entry, entry)
+            self.size += size
+            if self.size > self.max_size:
+                self.evict()
+
+    def get_entries(self) -> list:
+        entries = []
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        # called under lock, the total is recounted as other processes may share the folder
+        entries = self.get_entries()
+        self.size = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if self.size <= self.max_size:
+                break
+            logger.debug(f'\tRemoving {os.path.basename(path)} from conversion cache...')
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
@@ -0,0 +1,89 @@
+import os
+import threading
+import dataclasses
+
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from loguru import logger
+
+from .model import ConversionOptions, ConversionResult
+from .profiling import Profiler, current_profiler
+from .main import convert_programme, create_office_pool, create_image_pool
+
+
+class Converter():
+    """Warm conversion context for use of vera2pdf as library.
+
+    LibreOffice workers, image processes and the PyMuPDF thread are started
+    by the first conversion and kept until `close`, templates are loaded once
+    by the process. `convert` may be called from more threads at once,
+    conversions share the pools and `cache`. PyMuPDF is not thread-safe, so
+    all its work of concurrent conversions runs in the one thread and
+    programmes are always built by the pipeline (see `--pipeline`).
+    """
+
+    def __init__(self, options=None, cache=None):
+        self.options = dataclasses.replace(options or ConversionOptions(), pipeline=True)
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.office = None
+        self.image_pool = None
+        self.fitz_pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self):
+        with self.lock:
+            if self.fitz_pool is None:
+                logger.info('Starting conversion workers...')
+                self.office = create_office_pool(self.options)
+                self.image_pool = create_image_pool(self.options.jobs) if self.options.jobs > 1 else None
+                self.fitz_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='vera2pdf_fitz')
+            return self.office, self.image_pool, self.fitz_pool
+
+    def replace_image_pool(self, image_pool):
+        # crashed image worker, next conversions get a new pool
+        with self.lock:
+            if image_pool is not None and self.image_pool is image_pool:
+                image_pool.shutdown(wait=False)
+                self.image_pool = create_image_pool(self.options.jobs)
+
+    def convert(self, programme_path, output_path) -> ConversionResult:
+        """Convert eJednani export in `programme_path` to one PDF in `output_path` folder.
+
+        Exports converted at once need own `output_path`, with incremental
+        build also own work folder. Raises the errors of `convert_programme`.
+        Counters of timeouts, retries and placeholder pages and summary of
+        stages are returned with the path of PDF.
+        """
+        office, image_pool, fitz_pool = self.start()
+        profiler = Profiler(programme=programme_path)
+        token = current_profiler.set(profiler)
+        try:
+            os.makedirs(output_path, exist_ok=True)
+            output = convert_programme(programme_path, output_path, self.options, office, self.cache, image_pool, fitz_pool)
+        except BrokenProcessPool:
+            self.replace_image_pool(image_pool)
+            raise
+        finally:
+            current_profiler.reset(token)
+        report = profiler.get_report()
+        return ConversionResult(programme_path, output, report['wall_time'], report['counters'], report['stages'])
+
+    def close(self):
+        """Stop workers, the next conversion starts them again."""
+        with self.lock:
+            if self.fitz_pool is not None:
+                self.fitz_pool.shutdown()
+                self.fitz_pool = None
+            if self.image_pool is not None:
+                self.image_pool.shutdown()
+                self.image_pool = None
+            if self.office is not None:
+                self.office.stop()
+                self.office = None
@@ -25,8 +25,8 @@ from jinja2 import Environment, FileSystemLoader
 from bs4 import BeautifulSoup as bs
 from unidecode import unidecode
 
-from exceptions import *
-from model import *
+from .exceptions import *
+from .model import *
 
 
 environment = Environment(loader=FileSystemLoader("../files/"))
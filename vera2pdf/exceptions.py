@@ -10,4 +10,28 @@ class WrongProgrammeFormatError(AppError):
     pass
 
 class LibreOfficeNotFoundError(AppError):
-    pass
\ No newline at end of file
+    pass
+
+# LibreOffice listener could not be started or crashed/hung during conversion
+class LibreOfficeDaemonError(AppError):
+    pass
+
+# ZIP attachment exceeds size or compression ratio limits (zip bomb)
+class ZipLimitExceededError(AppError):
+    pass
+
+# external converter (LibreOffice, wkhtmltopdf) did not finish in time and was killed
+class ConverterTimeoutError(AppError):
+    pass
+
+# external converter failed even after retry
+class ConversionError(AppError):
+    pass
+
+# uploaded archive has member outside of its folder
+class UnsafeArchiveError(AppError):
+    pass
+
+# job queue of conversion service is full
+class ServiceBusyError(AppError):
+    pass
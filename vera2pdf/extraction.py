@@ -0,0 +1,100 @@
+import os
+import pathlib
+import uuid
+
+from lxml import etree
+
+from .model import *
+
+
+def remove_spaces(txt:str) -> str:
+    if txt is not None:
+        return ' '.join(txt.strip().replace('\\t',' ').replace('\\n',' ').split())
+    return ""
+
+
+# selectors are compiled once for all parsed pages
+HEADER_CELLS = etree.XPath('//table[@class="hlavicka"]/tr/td | //table[@class="hlavicka"]/tbody/tr/td')
+PROGRAMME_ROWS = etree.XPath('//table[@class="program"]/tr | //table[@class="program"]/tbody/tr')
+# label cells anywhere in the page and heading of resolution, in document order
+ITEM_PAGE_LABELS = etree.XPath('//td[@class="predkladatelLabel"]'
+                               ' | //td[text()="Zpracovatel:" or text()="Text důvodové zprávy:" or text()="Materiál obsahuje:"]'
+                               ' | //div[@class="prohlaseni"]')
+
+
+def get_label(el) -> str:
+    if el.tag == 'div':
+        return 'prohlaseni'
+    if el.get('class') == 'predkladatelLabel':
+        return 'Předkladatel:'
+    # cell is matched by one of its text nodes
+    return next((text for text in el.xpath('text()') if text in ITEM_PAGE_FIELDS), remove_spaces(el.text))
+
+
+def get_value_cell(label):
+    siblings = list(label.itersiblings())
+    if len(siblings) != 1:
+        raise ValueError(f'expected one value cell, found {len(siblings)}')
+    return siblings[0]
+
+
+def get_cell_text(label, path) -> str:
+    return remove_spaces(get_value_cell(label).text)
+
+
+def get_cell_alltext(label, path) -> str:
+    return remove_spaces('<br/> '.join(get_value_cell(label).itertext()))
+
+
+def get_cell_attachments(label, path) -> list:
+    attachments = []
+    for tag in get_value_cell(label):
+        if tag.tag == 'a':
+            full_path = os.path.normpath(os.path.join(os.path.dirname(path), tag.attrib["href"]))
+            ext = pathlib.Path(full_path).suffix.lower()
+            attachments.append(Attachment(uuid.uuid4(), tag.text, ext, [full_path], [full_path]))
+    return attachments
+
+
+def get_resolution(heading, path) -> str:
+    txt = ''
+    for el in heading.itersiblings():
+        if el.tag == 'div':
+            txt += ' ' + remove_spaces(' '.join(el.itertext()))
+    return txt
+
+
+# label: (field of ProgrammeItem, extraction from label element, factory of value when missing)
+ITEM_PAGE_FIELDS = {
+    'Předkladatel:': ('presenter', get_cell_text, str),
+    'Zpracovatel:': ('processor', get_cell_text, str),
+    'Text důvodové zprávy:': ('reason_text', get_cell_alltext, str),
+    'prohlaseni': ('resolution', get_resolution, str),
+    'Materiál obsahuje:': ('attachments', get_cell_attachments, list),
+}
+
+
+def extract_item_page_fields(root, path):
+    """Extract fields of programme item from its parsed page in one pass.
+
+    Returns dict of ProgrammeItem fields and list of ParseWarning for fields
+    which are missing, repeated or changed.
+    """
+    found = {}
+    for el in ITEM_PAGE_LABELS(root):
+        label = get_label(el)
+        if label in ITEM_PAGE_FIELDS:
+            found.setdefault(label, []).append(el)
+    fields = {}
+    warnings = []
+    for label, (field, extract, default) in ITEM_PAGE_FIELDS.items():
+        fields[field] = default()
+        elements = found.get(label, [])
+        if len(elements) != 1:
+            warnings.append(ParseWarning(path, field, 'not found' if len(elements) == 0 else f'found {len(elements)} times'))
+            continue
+        try:
+            fields[field] = extract(elements[0], path)
+        except ValueError as e:
+            warnings.append(ParseWarning(path, field, str(e)))
+    return fields, warnings
@@ -0,0 +1,84 @@
+import os
+import json
+import hashlib
+
+from loguru import logger
+
+from .cache import update_hash_from_file
+
+
+MANIFEST_VERSION = 1
+
+
+def get_assets_digest(files_path) -> str:
+    # templates, css and fonts used for rendering of programme items
+    h = hashlib.sha256()
+    filepaths = [os.path.join(root, name) for root, dirs, files in os.walk(files_path) for name in files]
+    for filepath in sorted(filepaths):
+        h.update(os.path.relpath(filepath, files_path).encode('utf-8'))
+        update_hash_from_file(h, filepath)
+    return h.hexdigest()
+
+
+def get_item_digest(item, header, assets_digest, options='') -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps([MANIFEST_VERSION, assets_digest, options,
+                         header.no_council_meeting, header.title, header.time,
+                         item.id, item.name, item.presenter, item.processor,
+                         item.reason_text, item.resolution]).encode('utf-8'))
+    if len(item.link) > 1 and os.path.exists(item.link):
+        update_hash_from_file(h, item.link)
+    for attachment in item.attachments:
+        h.update(f'\0{attachment.name}'.encode('utf-8'))
+        for filepath in attachment.files:
+            if os.path.exists(filepath):
+                update_hash_from_file(h, filepath)
+            else:
+                h.update(f'\0missing {filepath}'.encode('utf-8'))
+    return h.hexdigest()
+
+
+def get_item_manifest_path(work_path, item) -> str:
+    return os.path.join(work_path, f'pitem_{item.id}.json')
+
+
+def get_item_pdf_path(work_path, item) -> str:
+    return os.path.join(work_path, f'pitem_{item.id}.pdf')
+
+
+def is_item_up_to_date(work_path, item, digest) -> bool:
+    try:
+        with open(get_item_manifest_path(work_path, item), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    return manifest.get('digest') == digest and os.path.exists(manifest.get('pdf', ''))
+
+
+def save_item_manifest(work_path, item, digest):
+    if item.placeholders > 0:
+        # item with placeholder pages is built again by next run
+        logger.trace(f'Manifest of programme item {item.id} with placeholder pages not saved.')
+        return
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'id': item.id,
+        'digest': digest,
+        'pdf': item.pdf_temp_file,
+    }
+    with open(get_item_manifest_path(work_path, item), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    logger.trace(f'Manifest of programme item {item.id} saved.')
+
+
+def split_items_to_rebuild(work_path, header, items, assets_digest, options=''):
+    digests = {}
+    dirty = []
+    for item in items:
+        digest = get_item_digest(item, header, assets_digest, options)
+        digests[item.id] = digest
+        if is_item_up_to_date(work_path, item, digest):
+            item.pdf_temp_file = get_item_pdf_path(work_path, item)
+        else:
+            dirty.append(item)
+    return dirty, digests
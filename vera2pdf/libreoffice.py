@@ -0,0 +1,281 @@
+import os
+import functools
+import pathlib
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from contextlib import contextmanager
+
+from loguru import logger
+
+from .exceptions import *
+from .profiling import count_event
+from .supervise import convert_supervised, kill_process_group, RETRIES
+
+try:
+    # UNO bridge is shipped with LibreOffice (python3-uno on Linux, bundled python on MacOS/Windows)
+    import uno
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.lang import DisposedException
+    from com.sun.star.uno import RuntimeException as UnoRuntimeException
+    # listener crashed or the bridge to it is broken, errors of loaded document are not among them
+    BRIDGE_ERRORS = (DisposedException, UnoRuntimeException)
+except ImportError:
+    uno = None
+    BRIDGE_ERRORS = ()
+
+
+CONVERT_TIMEOUT = 300     # seconds of one conversion before LibreOffice is killed
+
+PDF_EXPORT_FILTERS = {
+    'com.sun.star.text.TextDocument': 'writer_pdf_Export',
+    'com.sun.star.sheet.SpreadsheetDocument': 'calc_pdf_Export',
+    'com.sun.star.presentation.PresentationDocument': 'impress_pdf_Export',
+    'com.sun.star.drawing.DrawingDocument': 'draw_pdf_Export',
+}
+
+
+def is_uno_available() -> bool:
+    return uno is not None
+
+
+@functools.lru_cache
+def get_libre_office_version(soffice_path) -> str:
+    result = subprocess.run([soffice_path, '--version'], capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def uno_property(name, value):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class LibreOfficeDaemon():
+    """Headless LibreOffice listener reused for all conversions of one run.
+
+    The process is started lazily on the first conversion and restarted when it
+    dies or does not finish a conversion within `timeout` seconds.
+    """
+
+    def __init__(self, soffice_path, timeout=CONVERT_TIMEOUT, start_timeout=60):
+        self.soffice_path = soffice_path
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.timed_out = False
+        self.process = None
+        self.desktop = None
+        self.profile_dir = None
+        self.pipe_name = None
+        self.restarts = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None and self.desktop is not None
+
+    def start(self):
+        if not is_uno_available():
+            raise LibreOfficeDaemonError('Python UNO bridge is not available.')
+        self.profile_dir = tempfile.mkdtemp(prefix='vera2pdf_lo_')
+        self.pipe_name = f'vera2pdf_{uuid.uuid4().hex}'
+        logger.debug(f'\tStarting LibreOffice listener on pipe {self.pipe_name}...')
+        self.process = subprocess.Popen([self.soffice_path,
+                                         '--headless', '--invisible', '--nologo', '--norestore',
+                                         '--nodefault', '--nolockcheck',
+                                         f'-env:UserInstallation={pathlib.Path(self.profile_dir).as_uri()}',
+                                         f'--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext']
+                                        , stdout=subprocess.DEVNULL
+                                        , stderr=subprocess.STDOUT
+                                        , start_new_session=True)
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver', local_context)
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            try:
+                context = resolver.resolve(f'uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext')
+                break
+            except Exception as e:
+                returncode = self.process.poll()
+                if returncode is not None:
+                    self.stop()
+                    raise LibreOfficeDaemonError(f'LibreOffice listener exited with code {returncode}.') from e
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise LibreOfficeDaemonError(f'LibreOffice listener did not start in {self.start_timeout} s.') from e
+                time.sleep(0.25)
+        self.desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+
+    def stop(self):
+        terminated = False
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+                terminated = True
+            except Exception:
+                # listener is already dead or hung, it is killed below
+                pass
+            self.desktop = None
+        if self.process is not None:
+            if not terminated and self.process.poll() is None:
+                # listener without working bridge would not end by itself
+                kill_process_group(self.process, terminate=True)
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                kill_process_group(self.process)
+                self.process.wait()
+            self.process = None
+        if self.profile_dir is not None:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def restart(self):
+        logger.warning(f'\tRestarting LibreOffice listener...')
+        self.restarts += 1
+        self.stop()
+        self.start()
+
+    def kill(self):
+        if self.process is not None and self.process.poll() is None:
+            logger.warning(f'\tLibreOffice listener did not finish conversion in {self.timeout} s, killing it...')
+            self.timed_out = True
+            kill_process_group(self.process)
+
+    def is_crash(self, e) -> bool:
+        # listener is restarted only when it is dead, killed or disconnected, not for bad document
+        return self.timed_out or isinstance(e, BRIDGE_ERRORS) or self.process is None or self.process.poll() is not None
+
+    def convert(self, filepath, new_filepath) -> str:
+        with self.lock:
+            if not self.is_alive():
+                if self.process is not None:
+                    self.restart()
+                else:
+                    self.start()
+            self.timed_out = False
+            watchdog = threading.Timer(self.timeout, self.kill)
+            watchdog.start()
+            doc = None
+            try:
+                doc = self.desktop.loadComponentFromURL(uno.systemPathToFileUrl(os.path.abspath(filepath)), '_blank', 0,
+                                                        (uno_property('Hidden', True),
+                                                         uno_property('ReadOnly', True),
+                                                         uno_property('UpdateDocMode', 0)))
+                if doc is None:
+                    raise LibreOfficeDaemonError(f'LibreOffice could not load {os.path.basename(filepath)}.')
+                export_filter = 'writer_pdf_Export'
+                for service, name in PDF_EXPORT_FILTERS.items():
+                    if doc.supportsService(service):
+                        export_filter = name
+                        break
+                doc.storeToURL(uno.systemPathToFileUrl(os.path.abspath(new_filepath)),
+                               (uno_property('FilterName', export_filter),))
+            except LibreOfficeDaemonError:
+                raise
+            except Exception as e:
+                if not self.is_crash(e):
+                    raise LibreOfficeDaemonError(f'LibreOffice could not convert {os.path.basename(filepath)}: {e}') from e
+                # crashed, killed by watchdog or broken bridge - next conversion gets fresh listener
+                self.desktop = None
+                if self.timed_out:
+                    count_event('timeouts')
+                    raise ConverterTimeoutError(f'LibreOffice listener did not convert {os.path.basename(filepath)} in {self.timeout} s.') from e
+                raise LibreOfficeDaemonError(f'Conversion of {os.path.basename(filepath)} failed: {e}') from e
+            finally:
+                watchdog.cancel()
+                if doc is not None and self.desktop is not None:
+                    try:
+                        doc.close(True)
+                    except Exception:
+                        pass
+        return new_filepath
+
+
+class LibreOfficeWorker():
+    """One LibreOffice slot with its own user profile.
+
+    Conversions go through the listener when UNO bridge is available, otherwise
+    (or when the listener fails) by `soffice --convert-to` process using the same
+    private profile, so parallel workers never fight over the profile lock.
+    Conversion killed after `timeout` seconds is retried once with fresh profile.
+    """
+
+    def __init__(self, soffice_path, use_daemon=True, timeout=CONVERT_TIMEOUT):
+        self.soffice_path = soffice_path
+        self.timeout = timeout
+        self.daemon = LibreOfficeDaemon(soffice_path, timeout) if use_daemon and is_uno_available() else None
+        self.profile_dir = tempfile.mkdtemp(prefix='vera2pdf_lo_')
+
+    def reset_profile(self):
+        # profile of killed LibreOffice may be locked or broken
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+        os.makedirs(self.profile_dir, exist_ok=True)
+
+    def convert_by_process(self, filepath, new_filepath, retries=RETRIES) -> str:
+        return convert_supervised([self.soffice_path,
+                                   f'-env:UserInstallation={pathlib.Path(self.profile_dir).as_uri()}',
+                                   '--headless', '--convert-to', 'pdf', filepath, '--outdir', os.path.dirname(new_filepath)],
+                                  new_filepath, self.timeout, 'LibreOffice', self.reset_profile, retries)
+
+    def convert(self, filepath, new_filepath) -> str:
+        if self.daemon is not None:
+            try:
+                return self.daemon.convert(filepath, new_filepath)
+            except ConverterTimeoutError as e:
+                # the hung file gets one more attempt, not two more of full timeout
+                logger.warning(f'\t{e} Retrying by LibreOffice process with fresh profile...')
+                count_event('retries')
+                self.reset_profile()
+                return self.convert_by_process(filepath, new_filepath, retries=0)
+            except LibreOfficeDaemonError as e:
+                logger.warning(f'\t{e} Falling back to LibreOffice process...')
+        return self.convert_by_process(filepath, new_filepath)
+
+    def stop(self):
+        if self.daemon is not None:
+            self.daemon.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class LibreOfficePool():
+    """Bounded set of LibreOffice workers shared by conversion threads."""
+
+    def __init__(self, soffice_path, size=1, use_daemon=True, timeout=CONVERT_TIMEOUT):
+        self.workers = [LibreOfficeWorker(soffice_path, use_daemon, timeout) for i in range(max(1, size))]
+        self.idle = queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @contextmanager
+    def acquire(self):
+        worker = self.idle.get()
+        try:
+            yield worker
+        finally:
+            self.idle.put(worker)
+
+    def convert(self, filepath, new_filepath) -> str:
+        with self.acquire() as worker:
+            return worker.convert(filepath, new_filepath)
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
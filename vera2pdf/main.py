@@ -8,37 +8,69 @@ import platform
 import subprocess
 import zipfile
 import sys
+import glob
+import time
+import signal
 import argparse
+import functools
 import shutil
+import dataclasses
+import multiprocessing
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-import pdfkit
 import fitz
 
 from io import StringIO, BytesIO
+from contextlib import nullcontext
 from datetime import datetime
 
 from loguru import logger
 from lxml import etree
 from jinja2 import Environment, FileSystemLoader
 from unidecode import unidecode
-from bs4 import BeautifulSoup as bs
-
-from exceptions import *
-from model import *
-
 
-def get_programme_path():
-    global input_path
-    if len(input_path) > 0:
-        return input_path
+from .exceptions import *
+from .model import *
+from .extraction import *
+from .libreoffice import LibreOfficePool, LibreOfficeWorker, get_libre_office_version, CONVERT_TIMEOUT
+from .cache import ConversionCache
+from .incremental import get_assets_digest, split_items_to_rebuild, save_item_manifest
+from .render import render_pdf, render_pdfs_in_batch, render_batch, split_batch, render_timeout, RENDERERS, RENDER_TIMEOUT
+from .rewrite import edit_programme_item_tree, edit_index_tree, tree_to_html
+from .stamp import Stamp, STAMP_FONT_PATH, FILES_PATH
+from .pagemap import PageMap
+from .scheduler import TaskGraph
+from .plan import estimate_job, get_conversion_time, get_longest_first_order, get_plan_summary
+from .optimize import optimize_pdf_images, IMAGE_PROFILES
+from .watch import ProgrammeWatcher, DEBOUNCE
+from .tracing import lazy_logger, setup_logging, TRACE_FILEPATH
+from .profiling import Profiler, current_profiler, profile_stage, tag_stage, count_event, submit_in_context, get_file_size
+
+
+def get_programme_path(programme=''):
+    if len(programme) > 0:
+        return programme
     env_var_name = 'VERA_PROGRAMME_PATH'
     if os.environ.get(env_var_name) != None:
         return str(os.environ.get(env_var_name))
     raise NoInputParameterError
 
 
+html_parsers = threading.local()
+
+
+def get_html_parser():
+    # parser is reused by all pages parsed in the same thread
+    if not hasattr(html_parsers, 'parser'):
+        html_parsers.parser = etree.HTMLParser()
+    return html_parsers.parser
+
+
 def get_html_root(filepath) -> etree:
-    parser = etree.HTMLParser()
+    parser = get_html_parser()
     text = None
     with open(filepath, encoding = 'utf-8') as f:
         text = html.unescape(f.read())
@@ -47,18 +79,10 @@ def get_html_root(filepath) -> etree:
     return root
 
 
-def remove_spaces(txt:str) -> str:
-    if txt is not None:
-        return ' '.join(txt.strip().replace('\\t',' ').replace('\\n',' ').split())
-    return ""
-
-
 def parse_programme_header(root) -> ProgrammeHeader:
     header = ProgrammeHeader()
-    rows = root.xpath('//table[@class="hlavicka"]/tr/td')
-    if rows == None:
-        rows = root.xpath('//table[@class="hlavicka"]/tbody/tr/td')
-    if len(rows) < 5:
+    rows = HEADER_CELLS(root)
+    if len(rows) < 7:
         raise WrongProgrammeFormatError
     # logger.error(f'Header rows: {[x.text for x in rows]}')
     header.title = remove_spaces(rows[3].text)
@@ -68,127 +92,255 @@ def parse_programme_header(root) -> ProgrammeHeader:
     return header
 
 
-def get_element_text_from_html(root, xpath) -> str:
-    rows = root.xpath(xpath)
-    if len(rows) == 1:
-        siblings = list(rows[0].itersiblings())
-        if len(siblings) == 1:
-            return remove_spaces(siblings[0].text)
-    return ""
-
-
-def get_element_alltext_from_html(root, xpath) -> str:
-    rows = root.xpath(xpath)
-    if len(rows) == 1:
-        siblings = list(rows[0].itersiblings())
-        if len(siblings) == 1:
-            return remove_spaces('<br/> '.join(siblings[0].itertext()))
-    return ""
-
-
-def get_element_statements_text_from_html(root, xpath) -> str:
-    rows = root.xpath(xpath)
-    if len(rows) == 1:
-        siblings = list(rows[0].itersiblings())
-        txt = ''
-        for item in siblings:
-            if item.tag == 'div':
-                txt += ' ' + remove_spaces(' '.join(item.itertext()))
-        return txt
-    return ""
-
-
 def get_libre_office_path():
     if platform.system() == 'Darwin':
         path = '/Applications/LibreOffice.app/Contents/MacOS/soffice'
     elif platform.system() == 'Windows':
         path = 'C:\Program Files\LibreOffice\program\soffice.exe'
     elif platform.system() == 'Linux':
-        path = '/usr/lib/libreoffice/program/'
+        path = '/usr/lib/libreoffice/program/soffice'
     if not os.path.exists(path):
         raise LibreOfficeNotFoundError
     return path
 
 
-def convert_file_to_supported_type(old_filepath, tmp_path) -> str:
+OFFICE_EXTENSIONS = ['.docx', '.doc', '.odt', 
+                     '.xls', '.xlsx', '.ods',
+                     '.ppt', '.pptx', '.odp',
+                     '.txt'
+                     ]
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff','.psd']
+PLAN_TOP_FILES = 10
+PLACEHOLDER_MARGIN = 72
+PLACEHOLDER_FONTSIZE = 14
+
+
+def get_converter_version(converter) -> str:
+    if converter == 'libreoffice':
+        return get_libre_office_version(get_libre_office_path())
+    return fitz.VersionBind     # PyMuPDF conversions and repairs
+
+
+def get_file_path(file) -> str:
+    # path of attachment file, members of ZIP as if ZIP was folder
+    if isinstance(file, ArchiveMember):
+        return os.path.join(file.archive, file.name)
+    return file
+
+
+def read_archive_member(member) -> bytes:
+    with zipfile.ZipFile(member.archive, 'r') as zipobject:
+        return zipobject.read(member.name)
+
+
+def open_attachment_file(file):
+    if isinstance(file, ArchiveMember):
+        return fitz.open(stream=read_archive_member(file), filetype=pathlib.Path(file.name).suffix[1:].lower())
+    return fitz.open(file)
+
+
+def get_attachment_file_size(file):
+    if isinstance(file, ArchiveMember):
+        return file.size
+    return get_file_size(file)
+
+
+def get_attachments_path(tmp_path) -> str:
+    # extracted, converted and repaired files of one run, persistent work folder does not keep them
+    return os.path.join(tmp_path, "attachments")
+
+
+def get_unique_filepath(path, filename):
+    # own folder for each file, same names from different ZIPs or conversions never collide
+    unique_path = os.path.join(path, uuid.uuid4().hex[:8])
+    os.makedirs(unique_path, exist_ok=True)
+    return os.path.join(unique_path, filename)
+
+
+def get_cache_key(cache, file, converter):
+    if cache is None:
+        return None
+    if isinstance(file, ArchiveMember):
+        source = read_archive_member(file)
+    elif os.path.exists(file):
+        source = file
+    else:
+        return None
+    try:
+        version = get_converter_version(converter)
+    except LibreOfficeNotFoundError:
+        # missing converter converts nothing to cache
+        return None
+    return cache.get_key(source, converter, version)
+
+
+def convert_by_libre_office(old_filepath, new_filepath, office=None):
+    if office is not None:
+        return office.convert(old_filepath, new_filepath)
+    # one-off process with private profile, supervised as workers of pool
+    try:
+        soffice_path = get_libre_office_path()
+    except LibreOfficeNotFoundError as e:
+        raise ConversionError('LibreOffice not found.') from e
+    worker = LibreOfficeWorker(soffice_path, use_daemon=False)
+    try:
+        return worker.convert(old_filepath, new_filepath)
+    finally:
+        worker.stop()
+
+
+def convert_image_to_pdf(old_file, new_filepath):
+    doc = fitz.open()
+    img = open_attachment_file(old_file)  # open pic as document
+    rect = img[0].rect  # pic dimension
+    pdfbytes = img.convert_to_pdf()  # make a PDF stream
+    img.close()  # no longer needed
+    imgPDF = fitz.open("pdf", pdfbytes)  # open stream as PDF
+    width, height = fitz.paper_size("a4")  # A4 portrait output page format
+    page = doc.new_page(width = width, height = height)
+    insert_rect = fitz.Rect(18,18,page.rect.br[0]-18,page.rect.br[1]-18)    # 18 points margin around page
+    mat = rect.torect(insert_rect)  # create Matrix to scale image to A4 page
+    page.show_pdf_page(rect * mat, imgPDF)  # image fills the page with scale (mat)
+    doc.save(new_filepath, garbage=4, deflate=True)
+    doc.close()
+    return new_filepath
+
+
+def convert_file_to_supported_type(old_file, tmp_path, office=None, image_pool=None, cache=None) -> str:
+    old_filepath = get_file_path(old_file)
     ext = pathlib.Path(old_filepath).suffix.lower()
     filename = pathlib.Path(old_filepath).stem
     new_filename = '.'.join([filename,'pdf'])
-    tmp_attachments_path = os.path.join(tmp_path, "attachments")
-    if not os.path.exists(tmp_attachments_path):
-        os.makedirs(tmp_attachments_path)
-    new_filepath = os.path.join(tmp_attachments_path, new_filename)
-    new_path = os.path.dirname(new_filepath)
-    if ext in ['.docx', '.doc', '.odt', 
-               '.xls', '.xlsx', '.ods',
-               '.ppt', '.pptx', '.odp',
-               '.txt'
-               ]:
+    tmp_attachments_path = get_attachments_path(tmp_path)
+    if ext in OFFICE_EXTENSIONS:
+        new_filepath = get_unique_filepath(tmp_attachments_path, new_filename)
+        key = get_cache_key(cache, old_file, 'libreoffice')
+        if key is not None and cache.get(key, new_filepath):
+            logger.info(f'\tUsing cached {os.path.basename(new_filepath)} converted from {os.path.basename(old_filepath)}...')
+            tag_stage(cached=True)
+            return new_filepath, 'pdf'
         logger.info(f'\tConverting {os.path.basename(old_filepath)} to {os.path.basename(new_filepath)} by LibreOffice...')
         if not os.path.exists(old_filepath):
             logger.error(f'File to convert {new_filepath} does not exists.')
-        subprocess.call([get_libre_office_path(), '--headless', '--convert-to', 'pdf', old_filepath, '--outdir', new_path]
-                        , stdout=subprocess.DEVNULL 
-                        , stderr=subprocess.STDOUT)
+        try:
+            convert_by_libre_office(old_filepath, new_filepath, office)
+        except ConversionError as e:
+            # placeholder page takes place of the attachment when its item is assembled
+            logger.error(f'Attachment {os.path.basename(old_filepath)} was not converted. {e}')
+            tag_stage(failed=True)
+            return new_filepath, 'pdf'
         if os.path.exists(new_filepath):
+            if key is not None:
+                cache.put(key, new_filepath)
             return new_filepath, 'pdf'
         else:
             logger.error(f'Converted file {new_filepath} does not exists.')
             return new_filepath, 'pdf'
-    elif ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff','.psd']:
+    elif ext in IMAGE_EXTENSIONS:
+        new_filepath = get_unique_filepath(tmp_attachments_path, new_filename)
+        key = get_cache_key(cache, old_file, 'pymupdf')
+        if key is not None and cache.get(key, new_filepath):
+            logger.info(f'\tUsing cached {os.path.basename(new_filepath)} converted from {os.path.basename(old_filepath)}...')
+            tag_stage(cached=True)
+            return new_filepath, 'pdf'
         logger.info(f'\tConverting {os.path.basename(old_filepath)} to {os.path.basename(new_filepath)} by PyMuPDF...')
-        doc = fitz.open()
-        img = fitz.open(old_filepath)  # open pic as document
-        rect = img[0].rect  # pic dimension
-        pdfbytes = img.convert_to_pdf()  # make a PDF stream
-        img.close()  # no longer needed
-        imgPDF = fitz.open("pdf", pdfbytes)  # open stream as PDF
-        width, height = fitz.paper_size("a4")  # A4 portrait output page format
-        page = doc.new_page(width = width, height = height)
-        insert_rect = fitz.Rect(18,18,page.rect.br[0]-18,page.rect.br[1]-18)    # 18 points margin around page
-        mat = rect.torect(insert_rect)  # create Matrix to scale image to A4 page
-        page.show_pdf_page(rect * mat, imgPDF)  # image fills the page with scale (mat)
-        doc.save(new_filepath, garbage=4, deflate=True)
-        doc.close()
+        if image_pool is not None:
+            image_pool.submit(convert_image_to_pdf, old_file, new_filepath).result()
+        else:
+            convert_image_to_pdf(old_file, new_filepath)
+        if key is not None:
+            cache.put(key, new_filepath)
         return new_filepath, 'pdf'
     else:
-        new_filename = '.'.join([filename,ext[1:]])
-        new_filepath = os.path.join(tmp_attachments_path, new_filename)
-        logger.info(f'\tCopying {os.path.basename(old_filepath)} to temp folder...')
-        shutil.copyfile(old_filepath, new_filepath)
-        return new_filepath, ext[1:]
-
-
-def get_attachments_from_html(root, xpath, path) -> str:
-    rows = root.xpath(xpath)
-    attachments = []
-    if len(rows) == 1:
-        siblings = list(rows[0].itersiblings())
-        if len(siblings) == 1:
-            el = siblings[0]
-            a_tags =  list(filter(lambda x: (x.tag == 'a'), el))
-            for tag in a_tags:
-                full_path = os.path.normpath(os.path.join(os.path.dirname(path), tag.attrib["href"]))
-                ext = pathlib.Path(full_path).suffix.lower()
-                attachments.append(Attachment(uuid.uuid4(),tag.text, ext, [full_path], [full_path]))
-            return attachments
-    return ""
+        # PDFs and other files are opened in place, in export folder or in ZIP
+        logger.trace(f'Using {old_filepath} without conversion.')
+        return old_file, ext[1:]
+
+
+def get_converter_name(file) -> str:
+    ext = pathlib.Path(get_file_path(file)).suffix.lower()
+    if ext in OFFICE_EXTENSIONS:
+        return 'libreoffice'
+    if ext in IMAGE_EXTENSIONS:
+        return 'pymupdf'
+    return 'none'
+
+
+def get_file_conversion_time(file) -> float:
+    return get_conversion_time(get_converter_name(file), get_attachment_file_size(file) or 0, pathlib.Path(get_file_path(file)).suffix)
+
+
+def get_pdf_page_count(file):
+    # only page tree is read, pages are not loaded; PDFs in ZIP and broken PDFs are estimated by size
+    if isinstance(file, ArchiveMember) or not os.path.exists(file):
+        return None
+    try:
+        with fitz.open(file) as doc:
+            return doc.page_count
+    except (RuntimeError, ValueError):
+        return None
+
+
+def estimate_file_job(item_id, file, name) -> JobEstimate:
+    ext = pathlib.Path(get_file_path(file)).suffix.lower()
+    pages = get_pdf_page_count(file) if ext == '.pdf' else None
+    return estimate_job(item_id, file, name, get_converter_name(file), get_attachment_file_size(file) or 0, pages, ext)
+
+
+def estimate_zip_file_jobs(item_id, zip_filepath, name) -> list:
+    # members are listed without extraction, nested ZIPs are estimated as one file
+    estimates = []
+    try:
+        with zipfile.ZipFile(zip_filepath, 'r') as zipobject:
+            for info in zipobject.infolist():
+                if info.is_dir() or info.file_size == 0:
+                    continue
+                member = ArchiveMember(zip_filepath, info.filename, info.file_size)
+                estimates.append(estimate_file_job(item_id, member, name + info.filename))
+    except zipfile.BadZipFile as e:
+        logger.error(f'Skipping attachment {name} of item {item_id}: {e}')
+    return estimates
+
+
+def estimate_programme_jobs(items) -> list:
+    """Return JobEstimate of each attachment file of `items`, files are not converted nor extracted."""
+    estimates = []
+    for item in items:
+        for attachment in item.attachments:
+            for file in attachment.files:
+                if pathlib.Path(get_file_path(file)).suffix.lower() == '.zip' and not isinstance(file, ArchiveMember):
+                    estimates += estimate_zip_file_jobs(item.id, file, attachment.name)
+                else:
+                    estimates.append(estimate_file_job(item.id, file, attachment.name))
+    return estimates
 
 
-def parse_item_page(item):
-    root = get_html_root(item.link)
-    item.presenter = get_element_text_from_html(root, '//td[@class="predkladatelLabel"]')
-    item.processor = get_element_text_from_html(root, '//td[text()="Zpracovatel:"]')
-    item.reason_text = get_element_alltext_from_html(root, '//td[text()="Text důvodové zprávy:"]')
-    item.resolution = get_element_statements_text_from_html(root, '//div[@class="prohlaseni"]')
-    item.attachments = get_attachments_from_html(root, '//td[text()="Materiál obsahuje:"]', item.link)
+def convert_attachment_file(old_file, tmp_path, office=None, image_pool=None, cache=None):
+    with profile_stage('convert', file=os.path.basename(get_file_path(old_file)), converter=get_converter_name(old_file)) as record:
+        new_file, ext = convert_file_to_supported_type(old_file, tmp_path, office, image_pool, cache)
+        record['input_bytes'] = get_attachment_file_size(old_file)
+        record['output_bytes'] = get_attachment_file_size(new_file)
+    return new_file, ext
 
 
-def process_item_w_link(el, item):
+def parse_item_page(item):
+    root = get_html_root(item.link)
+    fields, warnings = extract_item_page_fields(root, item.link)
+    for field, value in fields.items():
+        setattr(item, field, value)
+    for warning in warnings:
+        logger.warning(f'\tItem {item.id}: {warning.field} {warning.message} in {os.path.basename(warning.source)}.')
+        count_event('parse_warnings')
+    item.warnings = warnings
+    item.html_root = root
+    return warnings
+
+
+def process_item_w_link(el, item, programme_path):
     for x in el:
         if x.tag == 'a':
             item.name = remove_spaces(x.text)
-            item.link = os.path.normpath(os.path.join(get_programme_path(),x.attrib['href']))
+            item.link = os.path.normpath(os.path.join(programme_path,x.attrib['href']))
     parse_item_page(item)
 
 
@@ -199,7 +351,7 @@ def process_item_wo_link(el, item):
     item.presenter = remove_spaces(list(el.itertext())[3]).replace(": ","")
 
 
-def parse_programme_item(el) -> ProgrammeItem:
+def parse_programme_item(el, programme_path) -> ProgrammeItem:
     item = ProgrammeItem()
     if len(el) != 2: # old 3: # older 4:
         logger.error(f'Wrong programme Format. el: {el}')
@@ -209,7 +361,7 @@ def parse_programme_item(el) -> ProgrammeItem:
 
     # name
     if el[1].text == None:  # with href link to more info
-        process_item_w_link(el[1], item)
+        process_item_w_link(el[1], item, programme_path)
     else:   # no link to more info
         process_item_wo_link(el[1], item)
     
@@ -219,21 +371,22 @@ def parse_programme_item(el) -> ProgrammeItem:
     return item
 
 
-def parse_programme_items(root) -> list:
-    p_list = []
-    rows = root.xpath('//table[@class="program"]/tr')
-    for row in rows:
-        if len(rows) > 0 and row == rows[0]:
-            continue
-        item = parse_programme_item(row)
-        p_list.append(item)
-    return p_list
+def parse_programme_items(root, programme_path, jobs=1) -> list:
+    rows = PROGRAMME_ROWS(root)[1:]
+    if jobs > 1:
+        # pages of items are parsed in parallel, results are kept in programme order
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [submit_in_context(pool, parse_programme_item, row, programme_path) for row in rows]
+            return [future.result() for future in futures]
+    return [parse_programme_item(row, programme_path) for row in rows]
 
 
-def parse_programme(filepath:str):
-    root = get_html_root(filepath)
-    p_header = parse_programme_header(root)
-    p_list_items = parse_programme_items(root)
+def parse_programme(filepath:str, jobs=1):
+    with profile_stage('parse', file=os.path.basename(filepath)) as record:
+        root = get_html_root(filepath)
+        p_header = parse_programme_header(root)
+        p_list_items = parse_programme_items(root, os.path.dirname(filepath), jobs)
+        record['items'] = len(p_list_items)
     return p_header, p_list_items
 
 
@@ -253,7 +406,67 @@ def get_zipped_normalized_filename(filename):
     return '_'.join(new_paths)
 
 
-def extract_zip_files(items, tmp_dir):
+ZIP_MAX_SIZE = 2048*1024*1024   # uncompressed size of all members of one ZIP attachment
+ZIP_MAX_RATIO = 100             # uncompressed size to size of ZIP file
+ZIP_MIN_RATIO_SIZE = 1024*1024  # small archives are not checked for ratio
+ZIP_MAX_DEPTH = 3               # nested ZIPs
+ZIP_BUFFER_SIZE = 1024*1024
+
+
+def extract_zip_file(zip_filepath, attachment, tmp_path, max_size=ZIP_MAX_SIZE, max_ratio=ZIP_MAX_RATIO) -> list:
+    # members are streamed to disk, sizes are checked from ZipInfo before anything is written,
+    # nested ZIPs share the limits of the attachment, ratio is checked against the attachment file
+    zip_name = os.path.basename(zip_filepath)
+    max_ratio_size = max(max_ratio * os.path.getsize(zip_filepath), ZIP_MIN_RATIO_SIZE)
+    total_size = 0
+
+    def extract_members(zip_filepath, prefix, depth):
+        nonlocal total_size
+        attachments = []
+        with zipfile.ZipFile(zip_filepath, 'r') as zipobject:
+            for info in zipobject.infolist():
+                file = info.filename
+                if info.is_dir() or info.file_size == 0:
+                    continue
+                total_size += info.file_size
+                if total_size > max_size:
+                    raise ZipLimitExceededError(f'Uncompressed size of {zip_name} exceeds {max_size} bytes.')
+                if total_size > max_ratio_size:
+                    raise ZipLimitExceededError(f'Compression ratio of {zip_name} exceeds {max_ratio}.')
+                ext_extract = pathlib.Path(file).suffix.lower()
+                if ext_extract == '.pdf' or ext_extract in IMAGE_EXTENSIONS:
+                    # PyMuPDF opens these directly from ZIP
+                    attachments.append(Attachment(
+                                uuid.uuid4(),
+                                attachment.name + prefix + file,
+                                ext_extract,
+                                [ArchiveMember(zip_filepath, file, info.file_size)],
+                                list(attachment.orig_files)))
+                    continue
+                logger.trace(f'Extracting {file} from {zip_filepath}..')
+                zip_filename = encode_charset(prefix + file)
+                filename = get_zipped_normalized_filename(zip_filename)
+                filepath_extract = get_unique_filepath(tmp_path, filename)
+                with zipobject.open(info) as src, open(filepath_extract, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, ZIP_BUFFER_SIZE)
+                if ext_extract == '.zip':
+                    if depth+1 < ZIP_MAX_DEPTH:
+                        attachments += extract_members(filepath_extract, f'{prefix}{file}/', depth+1)
+                    else:
+                        logger.warning(f'\tSkipping {file} in {os.path.basename(zip_filepath)}, ZIPs nested too deep.')
+                    continue
+                attachments.append(Attachment(
+                            uuid.uuid4(),
+                            attachment.name + prefix + file,
+                            ext_extract,
+                            [filepath_extract],
+                            list(attachment.orig_files)))
+        return attachments
+
+    return extract_members(zip_filepath, '', 0)
+
+
+def extract_zip_files(items, tmp_path, max_size=ZIP_MAX_SIZE, max_ratio=ZIP_MAX_RATIO):
     updated_p_items = []
     for p_item in items:
         upd_attachments = []
@@ -262,73 +475,63 @@ def extract_zip_files(items, tmp_dir):
                 filepath = attachment.files[0]
                 ext = pathlib.Path(filepath).suffix.lower()
                 if ext == '.zip':
-                    with zipfile.ZipFile(filepath, 'r') as zipobject:
-                        extract_list = zipobject.namelist()
-                        for file in extract_list:
-                            logger.trace(f'Extracting {file} from {filepath}..')
-                            zip_filename = encode_charset(file)
-                            filename = get_zipped_normalized_filename(zip_filename)
-                            filepath_extract = os.path.normpath(os.path.join(tmp_dir.name, filename))
-                            with open(filepath_extract, 'wb') as f:
-                                f.write(zipobject.read(file))
-                            if os.path.isdir(filepath_extract):
-                                continue
-                            if os.stat(filepath_extract).st_size == 0:
-                                continue
-                            # zipobject.extract(file, filepath_extract)
-                            ext_extract = pathlib.Path(filepath_extract).suffix.lower()
-                            upd_attachments.append(Attachment(
-                                        uuid.uuid4(),
-                                        attachment.name + file,
-                                        ext_extract,
-                                        [filepath_extract]))
+                    try:
+                        with profile_stage('extract_zip', file=os.path.basename(filepath), input_bytes=get_file_size(filepath)) as record:
+                            extracted = extract_zip_file(filepath, attachment, get_attachments_path(tmp_path), max_size=max_size, max_ratio=max_ratio)
+                            record['files'] = len(extracted)
+                        upd_attachments += extracted
+                    except (ZipLimitExceededError, zipfile.BadZipFile) as e:
+                        logger.error(f'Skipping attachment {attachment.name} of item {p_item.id}: {e}')
                 else:
                     upd_attachments.append(attachment)
-        upd_p_item = ProgrammeItem(p_item.id,
-                                    p_item.name,
-                                    p_item.time,
-                                    p_item.resolution,
-                                    p_item.presenter,
-                                    p_item.processor,
-                                    p_item.reason_text,
-                                    upd_attachments,
-                                    p_item.link)
-        updated_p_items.append(upd_p_item)
+        updated_p_items.append(dataclasses.replace(p_item, attachments=upd_attachments))
     return updated_p_items
 
 
-def convert_files_to_pdf(items, tmp_path):
-    updated_p_items = []
-    for p_item in items:
-        upd_attachments = []
-        for attachment in p_item.attachments:
-            if len(attachment.files) == 1:
-                full_path = attachment.files[0]
-                new_path, ext = convert_file_to_supported_type(full_path, tmp_path)
-                upd_attachments.append(Attachment(
-                                        uuid.uuid4(),
-                                        attachment.name,
-                                        ext,
-                                        [new_path],
-                                        attachment.orig_files))
-        upd_p_item = ProgrammeItem(p_item.id,
-                                    p_item.name,
-                                    p_item.time,
-                                    p_item.resolution,
-                                    p_item.presenter,
-                                    p_item.processor,
-                                    p_item.reason_text,
-                                    upd_attachments,
-                                    p_item.link)
-        updated_p_items.append(upd_p_item)
-    return updated_p_items
+def create_image_pool(jobs):
+    # spawn - forking while converting threads are running may deadlock on locks held by these threads
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn'))
+
+
+def convert_files_to_pdf(items, tmp_path, office=None, jobs=1, cache=None, image_pool=None):
+    # conversions are independent, with more jobs they run in pools but results are kept in programme order
+    files = [attachment.files[0] for p_item in items for attachment in p_item.attachments if len(attachment.files) == 1]
+    if jobs > 1:
+        own_pool = create_image_pool(jobs) if image_pool is None else None
+        try:
+            with ThreadPoolExecutor(max_workers=jobs) as thread_pool:
+                # the longest conversions start first, so they do not keep one worker busy at the end
+                futures = {i: submit_in_context(thread_pool, convert_attachment_file, files[i], tmp_path, office, image_pool or own_pool, cache)
+                           for i in get_longest_first_order([get_file_conversion_time(file) for file in files])}
+                converted = iter([futures[i].result() for i in range(len(files))])
+        finally:
+            if own_pool is not None:
+                own_pool.shutdown()
+    else:
+        converted = iter([convert_attachment_file(full_path, tmp_path, office, cache=cache) for full_path in files])
+    return [get_converted_item(p_item, converted) for p_item in items]
+
+
+def get_converted_item(p_item, converted):
+    # attachments of item with files converted, `converted` iterates over results in order of attachments
+    upd_attachments = []
+    for attachment in p_item.attachments:
+        if len(attachment.files) == 1:
+            new_path, ext = next(converted)
+            upd_attachments.append(Attachment(
+                                    uuid.uuid4(),
+                                    attachment.name,
+                                    ext,
+                                    [new_path],
+                                    attachment.orig_files))
+    return dataclasses.replace(p_item, attachments=upd_attachments)
 
 
 def debug_print_items_attachments(items):
     for p_item in items:
-        logger.trace(f'DEBUG attachments {p_item.id}')
+        lazy_logger.trace('DEBUG attachments {}', lambda: p_item.id)
         for attachment in p_item.attachments:
-            logger.trace(f'\t{attachment}')
+            lazy_logger.trace('\t{}', lambda: attachment)
 
 # ====================== single PDF output file ======================
 
@@ -350,9 +553,14 @@ def get_pdf_ebook_name(header) -> str:
         return f'{prefix}{date_of_meeting[2]}-{month}-{day}_A4.pdf'
 
 
+@functools.lru_cache
+def get_template_environment():
+    # templates are loaded once for all pages and programmes of the process
+    return Environment(loader=FileSystemLoader(FILES_PATH))
+
+
 def create_html_page(item, filepath, header):
-    environment = Environment(loader=FileSystemLoader("../files/"))
-    template = environment.get_template("programme_item.html.j2")
+    template = get_template_environment().get_template("programme_item.html.j2")
     content = template.render(
         id=item.id,
         no_council_meeting=header.no_council_meeting,
@@ -375,21 +583,21 @@ def copy_html_to_temp_folder(tmp_path, items, header):
     fonts_filepath = os.path.join(tmp_path, 'fonts')
     # if not os.path.exists(fonts_filepath):
     #     os.makedirs(fonts_filepath)
-    shutil.copytree('../files/fonts', fonts_filepath)
+    shutil.copytree(os.path.join(FILES_PATH, 'fonts'), fonts_filepath, dirs_exist_ok=True)
     css_file_path = os.path.join(css_filepath, "style.css")
-    logger.trace(f'CSS sample source: {os.path.exists("../files/css/style.css")}')
+    logger.trace(f'CSS sample source: {os.path.exists(os.path.join(FILES_PATH, "css", "style.css"))}')
     logger.trace(f'CSS sample target: {css_filepath} {os.path.exists(css_filepath)}')
     logger.trace(f'CSS sample file target: {css_file_path}')
-    shutil.copyfile("../files/css/style.css", css_file_path)
+    shutil.copyfile(os.path.join(FILES_PATH, "css", "style.css"), css_file_path)
     for item in items:
         if len(item.link) > 1:
+            # edited page is written by edit_programme_item_html
             filename = os.path.basename(item.link)
-            filepath = os.path.join(html_filepath, filename)
-            shutil.copyfile(item.link, filepath)
-        else:
-            filename = f"pitem_{item.id}.html"
-            filepath = os.path.join(html_filepath, filename)
-            create_html_page(item, filepath, header)
+            item.temp_link = os.path.join(html_filepath, filename)
+            continue
+        filename = f"pitem_{item.id}.html"
+        filepath = os.path.join(html_filepath, filename)
+        create_html_page(item, filepath, header)
         item.temp_link = filepath
         if os.path.exists(filepath):
             logger.trace(f"Html of programme item written to {filepath}.")
@@ -397,75 +605,28 @@ def copy_html_to_temp_folder(tmp_path, items, header):
             logger.error(f'Error in copying programme item html to temp dir to {filepath}.')
 
 
-def edit_programme_item_html(item):
-    html = open(item.temp_link)
-    soup = bs(html, 'html.parser')
+def edit_programme_item_html(item, write_html=True):
+    # tree from parsing phase is edited, file is written only for renderers reading it from disk
     logger.trace(f'Editing html in {item.temp_link} in {item.id}')
-    # change podpisy to voting
-    element = soup.find("table", {"class": "podpisy"})
-    new_content = bs('<table class="podpisy"><tr><td>Hlasování:</td><td>Pro ____ </td><td>Proti ____ </td><td>Zdržel se: ____ </td><td>Nehlasoval: ____ </td></tr></table><table class="podpisy"><tr><td width="30%">Usnesení přijato:</td><td width="20%">&#9634; ANO</td><td width="20%">&#9634; NE</td><td width="30%">&#9634; Staženo</td></tr></table><hr class="cela">', 'html.parser')
-    if element is None:
-        logger.error(f'Table class podpisy not found in item {item.id} in file {os.path.basename(item.temp_link)}.')
-    else:
-        element.replace_with(new_content)
-    # add notes to the end
-    # element = soup.find("table", {"class": "akteri"})
-    element = soup.find_all("hr", {"class": "cela"})[-1]
-    new_content = bs('<table cellspacing="10" class="akteri"><tr><td style="vertical-align:top;color: blue;">Pozn&aacute;mky:</td><td><br><br><br></td></tr></table>', 'html.parser')
-    element.insert_after(new_content)
-    # add programme item number to tile
-    element = soup.find("div", {"class": "nadpis"})
-    element.string.replace_with(f'{item.id}. {element.string}')
-    # add bookmark to top of page
-    element = soup.find("div", {"id": "content"})
-    bookmark1 = bs(f'<div id="pitem_{item.id}"></div>', 'html.parser')
-    element.insert_before(bookmark1)
-    # add bookmark to attachment section
-    element = soup.find("table", {"class": "akteri"})
-    logger.trace(f'ELEMENT text AKTERI: {element.find_all(string=True)}')
-    text = element.find(string="Materiál obsahuje:")
-    if text is None:
-        logger.error(f'Could not find Přílohy part of page. Skipping adding bookmark.')
-    else:
-        bookmark2 = bs(f'<div id="pitem_{item.id}_attachments"></div>', 'html.parser')
-        text.insert_after(bookmark2)
-    # remove style attributes
-    remove_attributes = ['style','font','face','size','color']    
-    for tag in soup.descendants:
-        try:
-            # logger.error(f'tag.attrs type {type(tag.attrs), {tag}}')
-            tag.attrs = dict((key,value) for key,value in tag.attrs.items()
-                        if key not in remove_attributes)
-        except AttributeError: 
-            # 'NavigableString' object has no attribute 'attrs'
-            pass    
-
-    # close and save
-    html.close()
-    content = soup.prettify("utf-8")
-    with open(item.temp_link, "wb") as file:
-        file.write(content)
-
-
-def print_programme_item(item, tmp_path):
-    filepath_pdf = os.path.join(tmp_path, f"pitem_{item.id}.pdf")
-    options = {
-        'page-size': 'A4',
-        'margin-top': '0.5in',
-        'margin-right': '0.5in',
-        'margin-bottom': '0.5in',
-        'margin-left': '0.5in',
-        'encoding': "UTF-8",
-        'enable-local-file-access': None,
-        'no-outline': None,
-        'orientation': 'Portrait',
-        'header-font-name': 'Literata, Times New Roman',
-        'header-font-size': 13,    
-    }
-    pdfkit.from_file(item.temp_link, 
-                     filepath_pdf, 
-                     options=options,
-                     verbose=False)
+    if item.html_root is None:
+        item.html_root = get_html_root(item.link)
+    edit_programme_item_tree(item.html_root, item)
+    if write_html:
+        with open(item.temp_link, mode="w", encoding="utf-8") as file:
+            file.write(tree_to_html(item.html_root))
+
+
+def get_programme_item_pdf_path(item, tmp_path):
+    return os.path.join(tmp_path, f"pitem_{item.id}.pdf")
+
+
+def print_programme_item(item, tmp_path, renderer='wkhtmltopdf'):
+    filepath_pdf = get_programme_item_pdf_path(item, tmp_path)
+    try:
+        render_pdf(item.temp_link, filepath_pdf, renderer, item.html_root)
+    except ConversionError as e:
+        # page which can't be printed is replaced by placeholder when item is assembled
+        logger.error(f'Programme item {item.id} was not printed. {e}')
     if os.path.exists(filepath_pdf):
         logger.info(f"\tProgramme item written in {os.path.basename(filepath_pdf)}.")
     else:
@@ -473,166 +634,169 @@ def print_programme_item(item, tmp_path):
     return filepath_pdf
 
 
-def rotate_landscape_pdf_file(attachment):
-    if len(attachment.files) == 1:
+def get_page_description(page) -> str:
+    # diagnostics of page geometry for trace log
+    return (f'page {page.number}, rotation {page.rotation} deg, mediabox: {page.mediabox_size}, cropbox: {page.cropbox} '
+            f'WxH {page.cropbox.width}x{page.cropbox.height}, rect: {page.rect}, top-left corner at {fitz.Point(0,0) * page.rotation_matrix}')
+
+
+def rotate_landscape_pdf_file(attachment, doc):
+    if len(attachment.files) > 0:
         flag = 0
-        filepath = attachment.files[0]
+        filepath = get_file_path(attachment.files[0])
         ext = pathlib.Path(filepath).suffix.lower()
         if ext == '.pdf':
-            doc = fitz.open(filepath)
             for page in doc:
-                logger.trace(f'File {os.path.basename(filepath)}, page {page.number}, rotation {page.rotation} deg, mediabox: {page.mediabox_size}, cropbox: {page.cropbox} WxH {page.cropbox.width}x{page.cropbox.height}, rect: {page.rect}, width={page.rect.width}, height={page.rect.height}, top-left corner at {fitz.Point(0,0) * page.rotation_matrix}')
+                lazy_logger.trace('File {}, {}', lambda: os.path.basename(filepath), lambda: get_page_description(page))
                 if page.rect.width > page.rect.height:    # landscape
                     if flag == 0:
                         logger.debug(f'\tRotating {filepath}')
                         flag = 1                      
-                    logger.trace(f'Rotating {os.path.basename(filepath)}, page {page.number}, rect: {page.rect}, width={page.rect.width}, height={page.rect.height}, top-left corner at {fitz.Point(0,0) * page.rotation_matrix}')                    
+                    lazy_logger.trace('Rotating {}, {}', lambda: os.path.basename(filepath), lambda: get_page_description(page))
                     if page.rotation in (90,270):
                         page.set_rotation(0)
                     else:
                         page.set_rotation(270)
-                    logger.trace(f'After rotation of {os.path.basename(filepath)}, page {page.number}, rect: {page.rect}, width={page.rect.width}, height={page.rect.height}, top-left corner at {fitz.Point(0,0) * page.rotation_matrix}')
-            doc.save(filepath, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
-            doc.close()
+                    lazy_logger.trace('After rotation of {}, {}', lambda: os.path.basename(filepath), lambda: get_page_description(page))
 
 
-def repair_pdf_if_needed(attachment, tmp_path):
-    filepath = os.path.join(tmp_path, "attachments")
+def repair_pdf_if_needed(attachment, tmp_path, cache=None):
+    filepath = get_attachments_path(tmp_path)
     if not os.path.exists(filepath):
         os.makedirs(filepath)
 
     for i in range(len(attachment.files)):
-        logger.trace(f'Attachment {attachment}')
-        logger.trace(f'Attachment files list, list item {attachment.files[i]}')
-        att_doc = fitz.open(attachment.files[i])
+        lazy_logger.trace('Attachment {}', lambda: attachment)
+        lazy_logger.trace('Attachment files list, list item {}', lambda: attachment.files[i])
+        att_doc = open_attachment_file(attachment.files[i])
         if not att_doc.can_save_incrementally():
+            filename = pathlib.Path(get_file_path(attachment.files[i])).stem
+            new_filename = f'{filename}_{i}.pdf'
+            new_filepath = get_unique_filepath(filepath, new_filename)
+            key = get_cache_key(cache, attachment.files[i], 'repair')
+            if key is not None and cache.get(key, new_filepath):
+                logger.trace(f'Attachment {attachment.files[i]} repaired from cache.')
+                att_doc.close()
+                attachment.files[i] = new_filepath
+                continue
             # logger.trace(f'Attachment {attachment.files[i]} had been repaired by PyMuPDF. Warnings: {fitz.Tools.mupdf_warnings()}')
             logger.trace(f'Attachment {attachment.files[i]} had been repaired by PyMuPDF.')
-            c = att_doc.tobytes(garbage=3, deflate=True)
-            del att_doc
-            filename = pathlib.Path(attachment.files[i]).stem
-            new_filename = f'{filename}_{i}.pdf'
-            att_doc_new = fitz.Document(stream=BytesIO(c))
-            new_filepath = os.path.join(filepath, new_filename)
-            att_doc_new.save(new_filepath)
+            with profile_stage('repair', file=os.path.basename(new_filepath), input_bytes=get_attachment_file_size(attachment.files[i])) as record:
+                c = att_doc.tobytes(garbage=3, deflate=True)
+                del att_doc
+                att_doc_new = fitz.Document(stream=BytesIO(c))
+                att_doc_new.save(new_filepath)
+                record['output_bytes'] = len(c)
+            if key is not None:
+                cache.put(key, new_filepath)
             attachment.files[i] = new_filepath
 
 
-def join_attachment_pdf_files(attachment, tmp_path):
-    if len(attachment.files) > 1:
-        doc = fitz.open(attachment.files[0])
-        for i in range(1, len(attachment.files)):
-            att_doc = fitz.open(attachment.files[i])
-            doc.insert_pdf(att_doc)
-            att_doc.close()
-        doc.save(attachment.files[0], incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
-        pages_no = len(doc)
-        doc.close()
-        attachment.files = [attachment.files[0]]
-        return pages_no
-    elif len(attachment.files) == 1:
-        doc = fitz.open(attachment.files[0])
-        pages_no = len(doc)
-        doc.close()
-        return pages_no
-    else:
-        return 0
+def create_placeholder_pdf(filepath, text):
+    # A4 page in place of file which could not be converted or printed, so the packet is complete anyway
+    doc = fitz.open()
+    width, height = fitz.paper_size("a4")
+    page = doc.new_page(width=width, height=height)
+    page.insert_textbox(fitz.Rect(PLACEHOLDER_MARGIN, PLACEHOLDER_MARGIN, width-PLACEHOLDER_MARGIN, height-PLACEHOLDER_MARGIN), text,
+                        fontsize=PLACEHOLDER_FONTSIZE, fontname='placeholder', fontfile=STAMP_FONT_PATH, align=fitz.TEXT_ALIGN_CENTER)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    doc.save(filepath, garbage=3, deflate=True)
+    doc.close()
+    count_event('placeholders')
+    return filepath
 
 
-def add_header_to_attachment(item, attachment):
+def replace_unconverted_files(item, attachment):
+    # converted file is missing when its converter failed or was killed
     for f in attachment.files:
+        if isinstance(f, str) and not os.path.exists(f):
+            logger.warning(f'\tUsing placeholder page for {os.path.basename(f)} of attachment {attachment.name}.')
+            create_placeholder_pdf(f, f'Příloha „{attachment.name}“ bodu {item.id} nemohla být převedena do PDF.')
+            item.placeholders += 1
+
+
+def join_attachment_pdf_files(attachment):
+    # files of attachment are joined in memory, files in temp folder stay untouched
+    if len(attachment.files) == 0:
+        return None
+    doc = open_attachment_file(attachment.files[0])
+    if not doc.is_pdf:
+        doc = fitz.open('pdf', doc.convert_to_pdf())
+    for i in range(1, len(attachment.files)):
+        att_doc = open_attachment_file(attachment.files[i])
+        doc.insert_pdf(att_doc)
+        att_doc.close()
+    return doc
+
+
+def add_header_to_attachment(item, attachment, doc):
+    if len(attachment.files) > 0:
+        f = get_file_path(attachment.files[0])
         logger.info(f"\t\tAdding header to attachment {os.path.basename(f)}.")
-        doc = fitz.open(f)
-        page_count = doc.page_count
-        for i in range(page_count):
-            page = doc[i]
-            if not page.is_wrapped:
-                page.wrap_contents()
-            # r = fitz.Rect(36,18,536,36)  # rectangle
-            page = doc[i]
-            # get scale to A4
-            a4_height = fitz.paper_size('a4')[1]    # get height from (width, height) tuple
-            page_height = page.rect.height
-            scale = page_height/a4_height
-            # positioning and drawing
-            r = fitz.Rect(0, page.rect.height-(18*scale), page.rect.width, page.rect.height)  # rectangle shape
-            r2 = fitz.Rect((36*scale), page.rect.height-(18*scale), page.rect.width-(36*scale), page.rect.height)  # rectangle text
-            r_rot = r * page.derotation_matrix
-            r_rot2 = r2 * page.derotation_matrix
-            shape = page.new_shape()  # create Shape
-            shape.draw_rect(r_rot)  # draw rectangles
-            shape.finish(width = 0.0, color = (0,0,0), fill = (1,1,1))
-            logger.trace(f'Header placement: file {os.path.basename(f)}, page {page.number}, rotation={page.rotation}, page.rect={page.rect}, r={r}, r_rot={r_rot}')
-            rotate_text = 0
-            if r2 != r_rot2:
-                rotate_text = page.rotation
-            fontsize = 11*scale
-            text = f'{item.name} # {attachment.name}'
-            if len(text) > 105:
-                text = f'{item.name[:25]} # {attachment.name[:80]}'
-            t = unidecode(f'Strana {page.number+1} z {len(doc)} # Bod {item.id} - {text}')
-            rc = shape.insert_textbox(r_rot2, t, color = (0,0,0), encoding=fitz.TEXT_ENCODING_LATIN, fontname='TiRo', fontsize=fontsize, rotate=rotate_text)
-            shape.commit()  # write all stuff to page /Contents
-
-            doc.save(f, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
-        doc.close()
+        text = f'{item.name} # {attachment.name}'
+        if len(text) > 105:
+            text = f'{item.name[:25]} # {attachment.name[:80]}'
+        stamp = Stamp(doc, f'Bod {item.id} - {text}')
+        for page in doc:
+            lazy_logger.trace('Header placement: file {}, page {}, rotation={}, page.rect={}', lambda: os.path.basename(f), lambda: page.number, lambda: page.rotation, lambda: page.rect)
+            stamp.apply(page, page.number+1)
+
+
+def join_with_programme_item(att_doc, pitem_pdf):
+    if att_doc is not None:
+        pitem_pdf.insert_pdf(att_doc)
+        att_doc.close()
+
+
+def get_attachment_link_targets(item, attachment) -> list:
+    # links of printed page point to attachments relatively to the page copy in temp folder
+    if len(item.link) < 2:
+        return []
+    source_dir = os.path.dirname(item.link)
+    printed_dir = os.path.dirname(item.temp_link)
+    return [os.path.join(printed_dir, os.path.relpath(get_file_path(f), source_dir)) for f in attachment.orig_files]
+
+
+def insert_back_links(page, target_page):
+    # get scale to A4
+    a4_height = fitz.paper_size('a4')[1]    # get height from (width, height) tuple
+    scale = page.rect.height/a4_height
+    r = fitz.Rect(page.rect.width-(200*scale), page.rect.height-(118*scale), page.rect.width, page.rect.height)  # rectangle
+    page.insert_link({'kind': fitz.LINK_GOTO, 'from': r * page.derotation_matrix, 'page': target_page})
+    link_rect = fitz.Rect(page.rect.bl[0],page.rect.bl[1]-118,page.rect.bl[0]+200,page.rect.bl[1]) * page.rotation_matrix
+    page.insert_link({'kind': fitz.LINK_GOTO, 'from': link_rect, 'page': target_page})
+
+
+def update_programme_item_links_to_local(doc, item, page_map):
+    lazy_logger.trace('Linking programme item file {} with inserted attachments. Doc pages: {}', lambda: item.id, lambda: len(doc))
+    pitem = page_map.get(f'pitem_{item.id}')
+    for p_index in range(pitem.start, pitem.start + pitem.count):
+        page = doc[p_index]
+        for link_dict in page.get_links():
+            target = page_map.find_link(link_dict)
+            if target is None:
+                logger.warning(f'\tLink to {link_dict.get("file") or link_dict.get("uri")} in programme item {item.id} does not match any attachment.')
+                continue
+            link_dict['kind'] = fitz.LINK_GOTO
+            link_dict['page'] = page_map.get_target_page(target)
+            lazy_logger.trace('Update link dict: {}, doc pages: {}', lambda: link_dict, lambda: len(doc))
+            page.update_link(link_dict)
+    for attachment in page_map:
+        if attachment is pitem:
+            continue
+        for p_index in range(attachment.start, attachment.start + attachment.count):
+            lazy_logger.trace('Adding "Zpet" link.. p_index: {}, attachment: {}, doc pages: {}', lambda: p_index, lambda: attachment, lambda: len(doc))
+            insert_back_links(doc[p_index], pitem.start)
 
 
-def join_with_programme_item(attachment, pitem_pdf, pdf_file):
-    if len(attachment.files) > 0:
-        doc = fitz.open(attachment.files[0])
-        pitem_pdf.insert_pdf(doc)
-        doc.close()
-        pitem_pdf.save(pdf_file, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
-
-        # main_doc = fitz.open(pdf_file)
-        # doc = attachment.files[0]
-        # main_doc.insert_pdf(doc)
-        # doc.close()
-        # main_doc.save(pdf_file, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
-        # main_doc.close()
-
-
-def update_programme_item_links_to_local(pitem_pages_no, doc, pdf_file, item, attachments_pages_no):
-    used = 0
-    logger.trace(f'Linking programme item file {item.id} with inserted attachments. Doc pages: {len(doc)}')
-    for p_index in range(pitem_pages_no):
-        links = doc[p_index].get_links()
-        logger.trace(f'LINKS in programme item {item.id}, page {doc[p_index]} {p_index}: {doc[p_index].get_links()}')
-        for i in range(len(links)):
-            link_dict = links[i]
-            link_dict['kind'] = fitz.LINK_GOTO
-            link_dict['page'] = min(pitem_pages_no + sum(attachments_pages_no[:used]), len(doc)-1)
-            logger.trace(f'Update link dict: {link_dict}, doc pages: {len(doc)}')
-            used += 1
-            doc[p_index].update_link(link_dict)
-    for p_index in range(pitem_pages_no, min(pitem_pages_no + sum(attachments_pages_no), len(doc))):
-        logger.trace(f'Adding "Zpet" link.. p_index: {p_index}, pitem_pages_no: {pitem_pages_no}, whole pages: {pitem_pages_no + sum(attachments_pages_no)}, doc pages: {len(doc)}')
-        page = doc[p_index]
-        # get scale to A4
-        a4_height = fitz.paper_size('a4')[1]    # get height from (width, height) tuple
-        page_height = page.rect.height
-        scale = page_height/a4_height
-        # drawing back link
-        rect = page.bound() # get page dimensions
-        r = fitz.Rect(page.rect.width-(200*scale), page.rect.height-(118*scale), page.rect.width, page.rect.height)  # rectangle
-        r_rot = r * page.derotation_matrix
-        # shape = page.new_shape()  # create Shape
-        # shape.draw_rect(r_rot)  # draw rectangles
-        # shape.finish(width = 0.6, color = (0,1,0))
-        # shape.commit()  # write all stuff to page /Contents
-        link_dict = {'kind': fitz.LINK_GOTO, 'from': r_rot, 'page': 0}
-        page.insert_link(link_dict)
-        
-        link_rect = fitz.Rect(page.rect.bl[0],page.rect.bl[1]-118,page.rect.bl[0]+200,page.rect.bl[1]) * page.rotation_matrix
-        logger.trace(f'2nd link rect: {link_rect}')
-        link_dict = {'kind': fitz.LINK_GOTO, 'from': link_rect, 'page': 0}
-        page.insert_link(link_dict)
-
-    doc.save(pdf_file, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
-
-
-def create_programme_item_pdfs(header, items, tmp_dir):
+def prepare_programme_item_htmls(header, items, tmp_dir, write_html=True):
+    copy_html_to_temp_folder(tmp_dir, items, header)
+    for item in items:
+        if len(item.link) > 1:
+            edit_programme_item_html(item, write_html)
+
+
+def create_programme_item_pdfs(header, items, tmp_dir, cache=None, renderer='wkhtmltopdf', printed=False, image_profile=None, image_pool=None):
     # zkopírovat html s navrhy usneseni a upravit cesty v seznamu
     # pres polozky
     #   upravit obsah pro hlasovani a poznamky
@@ -647,80 +811,68 @@ def create_programme_item_pdfs(header, items, tmp_dir):
     #       na strany priloh doplnit odkaz na stranu 1 programoveho bodu
     #       na stranu seznamu priloh doplnit odkaz na prilohu
     #       aktualizovat stranku na pdf_start_page
-    copy_html_to_temp_folder(tmp_dir, items, header)
+    if not printed:
+        # in-process renderer takes edited pages from memory
+        prepare_programme_item_htmls(header, items, tmp_dir, renderer != 'fitz')
     for item in items:  # over programme items
-        if len(item.link) > 1:
-            edit_programme_item_html(item)
-        pdf_file = print_programme_item(item, tmp_dir)
-        item.pdf_temp_file = pdf_file
-        doc = fitz.open(pdf_file)
-        pdf_pitem_pages_no = doc.page_count
-        attachments_pages_no = []
-        for attachment in item.attachments:
-            repair_pdf_if_needed(attachment, tmp_dir)
-            pdf_att_pages_no = join_attachment_pdf_files(attachment, item)
-            attachments_pages_no.append(pdf_att_pages_no)
-            rotate_landscape_pdf_file(attachment)            
-            add_header_to_attachment(item, attachment)
-            join_with_programme_item(attachment, doc, pdf_file)
-        # update links in joined programme item with attachments
-        update_programme_item_links_to_local(pdf_pitem_pages_no, doc, pdf_file, item, attachments_pages_no)
-        doc.close()
-    logger.trace(f'Programme items pdfs: {[item.pdf_temp_file for item in items]}')
+        if printed:     # already printed in batch
+            pdf_file = get_programme_item_pdf_path(item, tmp_dir)
+        else:
+            pdf_file = print_programme_item(item, tmp_dir, renderer)
+        assemble_programme_item_pdf(item, pdf_file, tmp_dir, cache, image_profile, image_pool)
+    lazy_logger.trace('Programme items pdfs: {}', lambda: [item.pdf_temp_file for item in items])
+
+
+def assemble_programme_item_pdf(item, pdf_file, tmp_dir, cache=None, image_profile=None, image_pool=None):
+    # printed page of item in `pdf_file` is joined with attachments and overwritten
+    item.pdf_temp_file = pdf_file
+    item.placeholders = 0
+    if not os.path.exists(pdf_file):
+        logger.warning(f'\tUsing placeholder page for programme item {item.id}.')
+        create_placeholder_pdf(pdf_file, f'Stránka bodu {item.id} „{item.name}“ nemohla být vytištěna.')
+        item.placeholders += 1
+    # item is assembled in memory and written once
+    doc = fitz.open(stream=pathlib.Path(pdf_file).read_bytes())
+    page_map = PageMap()
+    page_map.add(f'pitem_{item.id}', doc.page_count)
+    for i, attachment in enumerate(item.attachments):
+        replace_unconverted_files(item, attachment)
+        repair_pdf_if_needed(attachment, tmp_dir, cache)
+        with profile_stage('load', item=item.id, file=attachment.name) as record:
+            att_doc = join_attachment_pdf_files(attachment)
+            record['input_bytes'] = sum(get_attachment_file_size(f) or 0 for f in attachment.files)
+        page_map.add(f'pitem_{item.id}_attachment_{i+1}', len(att_doc) if att_doc is not None else 0,
+                     get_attachment_link_targets(item, attachment))
+        if att_doc is not None and image_profile is not None:
+            with profile_stage('optimize', item=item.id, file=attachment.name, pages=len(att_doc)) as record:
+                record['input_bytes'], record['output_bytes'] = optimize_pdf_images(att_doc, image_profile, image_pool)
+        if att_doc is not None:
+            with profile_stage('rotate', item=item.id, file=attachment.name, pages=len(att_doc)):
+                rotate_landscape_pdf_file(attachment, att_doc)
+            with profile_stage('header', item=item.id, file=attachment.name, pages=len(att_doc)):
+                add_header_to_attachment(item, attachment, att_doc)
+        with profile_stage('merge', item=item.id, file=attachment.name, pages=page_map.ranges[-1].count):
+            join_with_programme_item(att_doc, doc)
+    # update links in joined programme item with attachments
+    with profile_stage('links', item=item.id, pages=len(doc)):
+        update_programme_item_links_to_local(doc, item, page_map)
+    with profile_stage('save_item', item=item.id, pages=len(doc)) as record:
+        doc.save(pdf_file, deflate=True)
+        record['output_bytes'] = get_file_size(pdf_file)
+    doc.close()
 
 
 def update_index_html(index_filepath, tmp_path, header, items):
     tmp_index_filepath = os.path.join(tmp_path, os.path.basename(index_filepath))
-    shutil.copyfile(index_filepath, tmp_index_filepath)
-    html = open(tmp_index_filepath)
-    soup = bs(html, 'html.parser')
-    elmnts = soup.find("tr", {"class": "popisek"}).find_all_next("td", {"class": "left"})
-    for i in range(len(elmnts)):
-        if i == 0:
-            continue
-        if elmnts[i].a == None:
-            tag = soup.new_tag('a')
-            tag.string = elmnts[i].contents[0]
-            tag.attrs['href'] = f"html/pitem_{i}.html"
-            elmnts[i].contents[0].replace_with(tag)
-    # remove style attributes
-    remove_attributes = ['style','font','face','size','color']    
-    for tag in soup.descendants:
-        try:
-            # logger.error(f'tag.attrs type {type(tag.attrs), {tag}}')
-            tag.attrs = dict((key,value) for key,value in tag.attrs.items()
-                        if key not in remove_attributes)
-        except AttributeError: 
-            # 'NavigableString' object has no attribute 'attrs'
-            pass    
-    html.close()
-    content = soup.prettify("utf-8")
-    with open(tmp_index_filepath, "wb") as file:
-        file.write(content)
-    # logger.trace(f'Index - elements: {[e.contents[0] for e in elmnts]}')
-    # logger.trace(f'Index - elements.a: {[e.a for e in elmnts]}')
+    root = edit_index_tree(get_html_root(index_filepath), items)
+    with open(tmp_index_filepath, mode="w", encoding="utf-8") as file:
+        file.write(tree_to_html(root))
     return tmp_index_filepath
 
 
-def print_programme(header, tmp_path, tmp_index_filepath):
+def print_programme(header, tmp_path, tmp_index_filepath, renderer='wkhtmltopdf'):
     filepath_pdf = os.path.join(tmp_path, "index.pdf")
-    options = {
-        'page-size': 'A4',
-        'margin-top': '0.5in',
-        'margin-right': '0.5in',
-        'margin-bottom': '0.5in',
-        'margin-left': '0.5in',
-        'encoding': "UTF-8",
-        'enable-local-file-access': None,
-        'no-outline': None,
-        'orientation': 'Portrait',
-        'header-font-name': 'Literata, Times New Roman',
-        'header-font-size': 13,    
-    }
-    pdfkit.from_file(tmp_index_filepath, 
-                     filepath_pdf,
-                     options=options,
-                     verbose=False)
+    render_pdf(tmp_index_filepath, filepath_pdf, renderer)
     if os.path.exists(filepath_pdf):
         logger.info(f"\tProgramme written in {os.path.basename(filepath_pdf)}.")
     else:
@@ -728,20 +880,24 @@ def print_programme(header, tmp_path, tmp_index_filepath):
     return filepath_pdf
 
 
-def join_pdf_programme_with_items(index_pdf, header, items, tmp_path):
-    joined_pdf = os.path.join(tmp_path, get_pdf_ebook_name(header))
+def get_item_link_targets(item, tmp_path, programme_path) -> list:
+    # links of printed index point to item pages relatively to the index copy in temp folder
+    if len(item.link) > 1:
+        return [os.path.join(tmp_path, os.path.relpath(item.link, programme_path))]
+    return [os.path.join(tmp_path, 'html', f'pitem_{item.id}.html')]
+
+
+def join_pdf_programme_with_items(index_pdf, header, items, tmp_path, programme_path):
     index_pdf = fitz.open(index_pdf)
-    pages = []
-    pages.append(len(index_pdf))
+    page_map = PageMap()
+    page_map.add('programme_index', len(index_pdf))
     for item in items:
         doc = fitz.open(item.pdf_temp_file)
-        pages.append(len(doc))
+        page_map.add(f'pitem_{item.id}', len(doc), get_item_link_targets(item, tmp_path, programme_path))
         index_pdf.insert_pdf(doc)
         doc.close()
-    index_pdf.save(joined_pdf, encryption=fitz.PDF_ENCRYPT_KEEP)
-    index_pdf.close()
-    logger.trace(f'Pages counts: {pages}')
-    return joined_pdf, pages
+    lazy_logger.trace('Page map: {}', lambda: page_map.ranges)
+    return index_pdf, page_map
 
 
 def create_pdf_shape_link(page, width, pos_y, text):
@@ -757,7 +913,7 @@ def create_pdf_shape_link(page, width, pos_y, text):
     #               pos_y,
     #               width+margin_left,
     #               pos_y+size)  # rectangle
-    logger.trace(f'Inserting shape for link {text} on page {page.number} with rectangle {page.rect}. Page bounds: ({rect.width}, {rect.height}). Result rect({r.x0},{r.y0},{r.x1},{r.y1}).')
+    lazy_logger.trace('Inserting shape for link {} on page {} with rectangle {}. Page bounds: ({}, {}). Result rect {}.', lambda: text, lambda: page.number, lambda: page.rect, lambda: rect.width, lambda: rect.height, lambda: r)
     shape = page.new_shape()  # create Shape
     shape.draw_rect(r)  # draw rectangles
     shape.finish(width = 0.3, color = (0,0,0), fill = (0.8,0.8,0.8))
@@ -767,77 +923,70 @@ def create_pdf_shape_link(page, width, pos_y, text):
     return r
 
 
-def update_links_in_joined_pdf(joined_pdf, pages):
+def update_links_in_joined_pdf(doc, page_map):
     link_height = 128
-    doc = fitz.open(joined_pdf)
-    logger.trace(f'Linking programme to programme items pages. Pages: {pages}, sums: {[sum(pages[:i]) for i in range(len(pages))]}')
-    idx = 0
-    for p_index in range(pages[0]):
-        links = doc[p_index].get_links()
-        logger.trace(f'LINKS in index page {p_index}: {doc[p_index].get_links()}')
-        for i in range(len(links)):
-            link_dict = links[i]
+    index = page_map.get('programme_index')
+    lazy_logger.trace('Linking programme to programme items pages. Page map: {}', lambda: page_map.ranges)
+    back_linked = set()
+    for p_index in range(index.start, index.start + index.count):
+        page = doc[p_index]
+        for link_dict in page.get_links():
+            pitem = page_map.find_link(link_dict)
+            if pitem is None:
+                logger.warning(f'\tLink to {link_dict.get("file") or link_dict.get("uri")} in programme does not match any programme item.')
+                continue
             link_dict['kind'] = fitz.LINK_GOTO
-            link_dict['page'] = sum(pages[:idx+i+1])
-            logger.trace(f'Update link dict: {link_dict}')
-            doc[p_index].update_link(link_dict)
-            # insert backlink
-            page = doc[sum(pages[:idx+i+1])]
-            p = fitz.Point(0, 0)
-            logger.trace(f'Program link. Page bounds: {page.rect}. Top-left (0,0): {p * page.rotation_matrix}')
-            # link to programme page from top-center
-            link_dict2 = {'kind': fitz.LINK_GOTO, 'from': fitz.Rect(200,0,400,link_height), 'page': p_index}
-            page.insert_link(link_dict2)
-        idx += len(links)
-    doc.save(joined_pdf, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+            link_dict['page'] = page_map.get_target_page(pitem)
+            lazy_logger.trace('Update link dict: {}', lambda: link_dict)
+            page.update_link(link_dict)
+            if pitem.anchor not in back_linked and pitem.count > 0:
+                # link to programme page from top-center
+                back_linked.add(pitem.anchor)
+                doc[pitem.start].insert_link({'kind': fitz.LINK_GOTO, 'from': fitz.Rect(200,0,400,link_height), 'page': p_index})
     logger.trace(f'Linking programme items to other programme items (prev/next).')
-    for i in range(len(pages)-1):
-        # if i == len(pages) - 2:
-        #     page = doc[sum(pages[:i+1])-1]
-        # else:
-        page = doc[sum(pages[:i+1])]
-        if i == 0:
-            # Next
-            link_dict = {'kind': fitz.LINK_GOTO, 'from': fitz.Rect(420,0,page.rect.width,link_height), 'page': sum(pages[:i+2])}
+    pitems = [page_range for page_range in page_map if page_range is not index]
+    for i, pitem in enumerate(pitems):
+        if pitem.count == 0:
+            continue
+        page = doc[pitem.start]
+        # Next, the last item links to the last page
+        page_number = pitems[i+1].start if i+1 < len(pitems) else page_map.page_count-1
+        if page_number > page.number:
+            link_dict = {'kind': fitz.LINK_GOTO, 'from': fitz.Rect(420,0,page.rect.width,link_height), 'page': page_number}
+            lazy_logger.trace('Programme item Next link dict: {} from page {}', lambda: link_dict, lambda: page.number)
             page.insert_link(link_dict)
-        else:
-            if len(doc)-1 > page.number:
-                # Next
-                page_number = sum(pages[:i+2])
-                if page_number > len(doc)-1:
-                    page_number = len(doc)-1
-                link_dict = {'kind': fitz.LINK_GOTO, 'from': fitz.Rect(420,0,page.rect.width,link_height), 'page': page_number}
-                logger.trace(f'Programme item Next link dict: {link_dict} from page {page.number}')
-                page.insert_link(link_dict)
+        if i > 0:
             # Previous
-            link_dict2 = {'kind': fitz.LINK_GOTO, 'from': fitz.Rect(0,0,180,link_height), 'page': sum(pages[:i])}
-            page.insert_link(link_dict2)
-    doc.save(joined_pdf, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
-    doc.close()
+            page.insert_link({'kind': fitz.LINK_GOTO, 'from': fitz.Rect(0,0,180,link_height), 'page': pitems[i-1].start})
 
 
-def create_programme_index_pdf(index_filepath, tmp_path, header, items):
-    logger.info(f'\tUpdating HTML programme in index.html, inserting links to programme items...')
-    tmp_index_filepath = update_index_html(index_filepath, tmp_path, header, items)
-    logger.info(f'\tPrinting programme to PDF...')
-    index_pdf = print_programme(header, tmp_path, tmp_index_filepath)
+def create_programme_index_pdf(index_filepath, tmp_path, header, items, renderer='wkhtmltopdf', printed=False):
+    if printed:     # already printed in batch
+        index_pdf = os.path.join(tmp_path, "index.pdf")
+    else:
+        logger.info(f'\tUpdating HTML programme in index.html, inserting links to programme items...')
+        tmp_index_filepath = update_index_html(index_filepath, tmp_path, header, items)
+        logger.info(f'\tPrinting programme to PDF...')
+        index_pdf = print_programme(header, tmp_path, tmp_index_filepath, renderer)
     logger.info(f'\tJoining programme with programme items in PDF...')
-    joined_pdf, pages = join_pdf_programme_with_items(index_pdf, header, items, tmp_path)
+    with profile_stage('merge', file=get_pdf_ebook_name(header)) as record:
+        joined_doc, page_map = join_pdf_programme_with_items(index_pdf, header, items, tmp_path, os.path.dirname(index_filepath))
+        record['pages'] = len(joined_doc)
     logger.info('\tUpdating link in joined PDF..')
-    update_links_in_joined_pdf(joined_pdf, pages)
-    return joined_pdf
+    with profile_stage('links', file=get_pdf_ebook_name(header), pages=len(joined_doc)):
+        update_links_in_joined_pdf(joined_doc, page_map)
+    return joined_doc
 
 
-def insert_title_pdf_page(joined_pdf, output_path, tmp_path, header):
+def create_cover_html(tmp_path, header):
     logger.info(f'\tCopying custom css for frontpage to temp dir...')
     css_filepath = os.path.join(tmp_path, "css")
     if not os.path.exists(css_filepath):
         os.makedirs(css_filepath)
     css_file_path = os.path.join(css_filepath, "style_fp.css")
-    shutil.copyfile("../files/css/style_fp.css", css_file_path)
+    shutil.copyfile(os.path.join(FILES_PATH, "css", "style_fp.css"), css_file_path)
     logger.info(f'\tCreating HTML cover page...')
-    environment = Environment(loader=FileSystemLoader("../files/"))
-    template = environment.get_template("front_page.html.j2")
+    template = get_template_environment().get_template("front_page.html.j2")
     content = template.render(
         no_council_meeting=header.no_council_meeting,
         title=header.title,
@@ -847,64 +996,421 @@ def insert_title_pdf_page(joined_pdf, output_path, tmp_path, header):
     filepath = os.path.join(tmp_path, "cover.html")
     with open(filepath, mode="w", encoding="utf-8") as message:
         message.write(content)
-    logger.info(f'\tPrinting HTML cover page to PDF...')
+    return filepath
+
+
+def save_pdf_atomically(doc, filepath, **options):
+    # readers of the output never see half-written file, temp file in the same folder is renamed over it
+    tmp_filepath = os.path.join(os.path.dirname(filepath), f'.{os.path.basename(filepath)}.{os.getpid()}.tmp')
+    try:
+        doc.save(tmp_filepath, **options)
+        os.replace(tmp_filepath, filepath)
+    finally:
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+
+
+def insert_title_pdf_page(joined_doc, output_path, tmp_path, header, renderer='wkhtmltopdf', printed=False):
     filepath_pdf = os.path.join(tmp_path, "cover.pdf")
-    options = {
-        'page-size': 'A4',
-        'margin-top': '0.5in',
-        'margin-right': '0.5in',
-        'margin-bottom': '0.5in',
-        'margin-left': '0.5in',
-        'encoding': "UTF-8",
-        'enable-local-file-access': None,
-        'no-outline': None,
-        'orientation': 'Portrait',
-        'header-font-name': 'Literata, Times New Roman',
-        'header-font-size': 13,    
-    }
-    pdfkit.from_file(filepath, 
-                     filepath_pdf,
-                     options=options,
-                     verbose=False)
+    if not printed:
+        filepath = create_cover_html(tmp_path, header)
+        logger.info(f'\tPrinting HTML cover page to PDF...')
+        render_pdf(filepath, filepath_pdf, renderer)
     if os.path.exists(filepath_pdf):
         logger.info(f"\tCover page written in {os.path.basename(filepath_pdf)}.")
     else:
         logger.error(f'Something wrong during cover page writing to {filepath_pdf}.')
     logger.info(f'\tJoining PDF cover with programme PDF...')
-    output_filepath = os.path.join(output_path, os.path.basename(joined_pdf))
-    doc = fitz.open(joined_pdf)
+    output_filepath = os.path.join(output_path, get_pdf_ebook_name(header))
     cover = fitz.open(filepath_pdf)
-    doc.insert_pdf(cover, start_at=0)
-    doc.save(output_filepath, garbage=4, deflate=True, linear=True) # save the document    
-    doc.close()
+    joined_doc.insert_pdf(cover, start_at=0)
+    with profile_stage('save', file=os.path.basename(output_filepath), pages=len(joined_doc)) as record:
+        save_pdf_atomically(joined_doc, output_filepath, garbage=4, deflate=True, linear=True) # save the document
+        record['output_bytes'] = get_file_size(output_filepath)
+    joined_doc.close()
     cover.close()
     return output_filepath
 
 
-if __name__ == "__main__":
+def print_pages_in_batch(header, items, index_filepath, tmp_path, renderer='wkhtmltopdf', all_items=None):
+    # programme items, index and cover are printed by one renderer invocation, index links all items
+    prepare_programme_item_htmls(header, items, tmp_path)
+    tmp_index_filepath = update_index_html(index_filepath, tmp_path, header, all_items or items)
+    cover_filepath = create_cover_html(tmp_path, header)
+    print_pages(get_pages_to_print(items, tmp_index_filepath, cover_filepath, tmp_path), tmp_path, renderer)
+
+
+def get_pages_to_print(items, tmp_index_filepath, cover_filepath, tmp_path) -> list:
+    pages = [(item.temp_link, get_programme_item_pdf_path(item, tmp_path), f'pitem_{item.id}') for item in items]
+    pages.append((tmp_index_filepath, os.path.join(tmp_path, "index.pdf"), 'programme_index'))
+    pages.append((cover_filepath, os.path.join(tmp_path, "cover.pdf"), 'cover'))
+    return pages
+
+
+def print_pages(pages, tmp_path, renderer='wkhtmltopdf'):
+    logger.info(f'\tPrinting {len(pages)} HTML pages to PDF in one batch...')
+    render_pdfs_in_batch(pages, os.path.join(tmp_path, "batch.pdf"), renderer)
+
+
+def get_conversion_executor(file, io_pool, fitz_pool, image_pool=None):
+    # images are converted by PyMuPDF, in this process only in the thread of other PyMuPDF work
+    if get_converter_name(file) == 'pymupdf' and image_pool is None:
+        return fitz_pool
+    return io_pool
+
+
+def create_programme_pdf_in_pipeline(header, items, all_items, index_filepath, tmp_path, output_path, options,
+                                     office=None, cache=None, image_pool=None, digests=None, fitz_pool=None) -> str:
+    """Build programme PDF from tasks started as soon as their inputs are ready.
+
+    Conversions of attachments and wkhtmltopdf run in `jobs` threads, all
+    PyMuPDF work (fitz renderer, repair, assembly, joining) in one thread. So
+    item is assembled as soon as its attachments are converted and its page is
+    printed, while attachments of next items are converted and index and cover
+    are printed. Only changed `items` of `all_items` are built, their manifests
+    are saved with `digests` when given. PyMuPDF thread `fitz_pool` may be
+    shared by programmes built at once. Returns path of written PDF.
+    """
+    renderer = options.renderer
+    image_profile = IMAGE_PROFILES[options.profile]
+    graph = TaskGraph()
+    prepare_programme_item_htmls(header, items, tmp_path, renderer != 'fitz' or options.batch_render)
+    tmp_index_filepath = update_index_html(index_filepath, tmp_path, header, all_items)
+    cover_filepath = create_cover_html(tmp_path, header)
+    # shared PyMuPDF thread is not shut down at the end of programme
+    with ThreadPoolExecutor(max_workers=max(1, options.jobs)) as io_pool, \
+         nullcontext(fitz_pool) if fitz_pool is not None else ThreadPoolExecutor(max_workers=1) as fitz_pool:
+        render_pool = fitz_pool if renderer == 'fitz' else io_pool
+        if options.batch_render:
+            pages = get_pages_to_print(items, tmp_index_filepath, cover_filepath, tmp_path)
+            batch_filepath = os.path.join(tmp_path, "batch.pdf")
+            logger.info(f'\tPrinting {len(pages)} HTML pages to PDF in one batch...')
+            # wkhtmltopdf runs in I/O thread, its output is split in PyMuPDF thread
+            batch = graph.submit(render_pool, render_batch, pages, batch_filepath, renderer)
+            printed = graph.submit(fitz_pool, split_batch, pages, batch_filepath, renderer, deps=[batch])
+            index_printed = cover_printed = printed
+        else:
+            index_printed = graph.submit(render_pool, print_programme, header, tmp_path, tmp_index_filepath, renderer)
+            cover_printed = graph.submit(render_pool, render_pdf, cover_filepath, os.path.join(tmp_path, "cover.pdf"), renderer)
+
+        def assemble(item, conversions, item_printed):
+            converted_item = get_converted_item(item, iter([conversion.result() for conversion in conversions]))
+            pdf_file = get_programme_item_pdf_path(item, tmp_path) if options.batch_render else item_printed.result()
+            assemble_programme_item_pdf(converted_item, pdf_file, tmp_path, cache, image_profile, image_pool)
+            if digests is not None:
+                save_item_manifest(tmp_path, converted_item, digests[item.id])
+            return converted_item
+
+        files = [(k, attachment.files[0]) for k, item in enumerate(items) for attachment in item.attachments if len(attachment.files) == 1]
+        # conversions of all items start longest-first, so the longest do not delay the end of the run
+        all_conversions = {i: graph.submit(get_conversion_executor(files[i][1], io_pool, fitz_pool, image_pool), convert_attachment_file, files[i][1], tmp_path, office, image_pool, cache)
+                           for i in get_longest_first_order([get_file_conversion_time(file) for k, file in files])}
+        assembled = []
+        for k, item in enumerate(items):
+            conversions = [all_conversions[i] for i, (item_k, file) in enumerate(files) if item_k == k]
+            item_printed = printed if options.batch_render else graph.submit(render_pool, print_programme_item, item, tmp_path, renderer)
+            assembled.append(graph.submit(fitz_pool, assemble, item, conversions, item_printed, deps=conversions + [item_printed]))
+
+        def join():
+            rebuilt_items = {item.id: item for item in [task.result() for task in assembled]}
+            joined_items = [rebuilt_items.get(item.id, item) for item in all_items]
+            joined_doc = create_programme_index_pdf(index_filepath, tmp_path, header, joined_items, renderer, printed=True)
+            return insert_title_pdf_page(joined_doc, output_path, tmp_path, header, renderer, printed=True)
+
+        joined = graph.submit(fitz_pool, join, deps=assembled + [index_printed, cover_printed])
+        graph.wait()
+    return joined.result()
+
+
+def get_work_path(output_path, programme_path, options) -> str:
+    return options.work_dir or os.path.join(output_path, '.vera2pdf', os.path.basename(os.path.normpath(programme_path)))
+
+
+def create_office_pool(options):
+    try:
+        return LibreOfficePool(get_libre_office_path(), options.jobs, use_daemon=options.office_daemon, timeout=options.convert_timeout)
+    except LibreOfficeNotFoundError:
+        logger.warning('LibreOffice not found, office attachments could not be converted.')
+        return None
+
+
+def convert_programme(programme_path, output_path, options=None, office=None, cache=None, image_pool=None, fitz_pool=None) -> str:
+    """Convert eJednani export in `programme_path` to one PDF in `output_path`.
+
+    LibreOffice pool `office`, conversion `cache`, process `image_pool` and
+    PyMuPDF thread `fitz_pool` of pipeline may be shared by more programmes,
+    otherwise they are created for this one. Returns path of written PDF.
+    """
+    options = options or ConversionOptions()
+    jobs = max(1, options.jobs)
+    index_filepath = os.path.join(programme_path, "index.html")
+    tmp_dir = None
+    if options.incremental:
+        tmp_path = get_work_path(output_path, programme_path, options)
+        os.makedirs(tmp_path, exist_ok=True)
+        # left by killed run
+        shutil.rmtree(get_attachments_path(tmp_path), ignore_errors=True)
+        logger.info(f'Using work directory {tmp_path}...')
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        tmp_path = tmp_dir.name
+        logger.info(f'Creating temp directory {tmp_path}...')
+    own_office = None
+    own_image_pool = create_image_pool(jobs) if image_pool is None and jobs > 1 else None
+    timeout_token = render_timeout.set(options.render_timeout)
+    image_pool = image_pool or own_image_pool
+    try:
+        logger.info(f'Parsing programme...')
+        header, items = parse_programme(index_filepath, jobs)
+        lazy_logger.trace('{}', lambda: [item.resolution for item in items])
+        debug_print_items_attachments(items)
+
+        all_items = items
+        if options.incremental:
+            items, digests = split_items_to_rebuild(tmp_path, header, all_items, get_assets_digest(FILES_PATH), f'{options.renderer},{options.profile}')
+            logger.info(f'Reusing {len(all_items)-len(items)} unchanged programme items, rebuilding {len(items)} items...')
+
+        logger.info(f'Extracting *.ZIP attachments original files...')
+        items = extract_zip_files(items, tmp_path, options.zip_max_size or ZIP_MAX_SIZE, options.zip_max_ratio or ZIP_MAX_RATIO)
+        debug_print_items_attachments(items)
+
+        if office is None:
+            office = own_office = create_office_pool(options)
+        if options.pipeline:
+            logger.info(f'Converting attachments and creating PDFs for programme items, index and cover in pipeline...')
+            pdf_output_filepath = create_programme_pdf_in_pipeline(header, items, all_items, index_filepath, tmp_path, output_path, options,
+                                                                   office, cache, image_pool, digests if options.incremental else None, fitz_pool)
+        else:
+            logger.info(f'Converting attachments to PDF files...')
+            try:
+                items = convert_files_to_pdf(items, tmp_path, office, jobs, cache, image_pool)
+            finally:
+                if own_office is not None:
+                    own_office.stop()
+                    own_office = None
+            debug_print_items_attachments(items)
+
+            if options.batch_render:
+                logger.info(f'Printing HTML pages to PDF...')
+                print_pages_in_batch(header, items, index_filepath, tmp_path, options.renderer, all_items)
+            logger.info(f'Creating PDFs for programme items...')
+            image_profile = IMAGE_PROFILES[options.profile]
+            create_programme_item_pdfs(header, items, tmp_path, cache, options.renderer, options.batch_render, image_profile, image_pool)
+            if options.incremental:
+                for item in items:
+                    save_item_manifest(tmp_path, item, digests[item.id])
+                rebuilt_items = {item.id: item for item in items}
+                items = [rebuilt_items.get(item.id, item) for item in all_items]
+            logger.info(f'Creating PDF for index programme...')
+            joined_doc = create_programme_index_pdf(index_filepath, tmp_path, header, items, options.renderer, options.batch_render)
+            logger.info(f'Inserting title page...')
+            pdf_output_filepath = insert_title_pdf_page(joined_doc, output_path, tmp_path, header, options.renderer, options.batch_render)
+        if os.path.exists(pdf_output_filepath):
+            logger.success(f"Complete PDF file was written to {pdf_output_filepath}.")
+        else:
+            logger.error(f'Something wrong during writing complete PDF to {pdf_output_filepath}.')
+    finally:
+        render_timeout.reset(timeout_token)
+        if own_office is not None:
+            own_office.stop()
+        if own_image_pool is not None:
+            own_image_pool.shutdown()
+        # input("Press ENTER for cleanup temp dir")
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+        else:
+            # reused items need only their assembled PDFs
+            shutil.rmtree(get_attachments_path(tmp_path), ignore_errors=True)
+    return pdf_output_filepath
+
+
+def plan_programme(programme_path, options=None) -> dict:
+    """Parse programme and log estimated cost of its conversion without converting anything."""
+    options = options or ConversionOptions()
+    jobs = max(1, options.jobs)
+    header, items = parse_programme(os.path.join(programme_path, "index.html"), jobs)
+    estimates = estimate_programme_jobs(items)
+    summary = get_plan_summary(estimates, len(items), jobs, options.renderer)
+    logger.info(f'Plan of {programme_path}: {len(items)} programme items, {len(estimates)} attachment files, ~{summary["pages"]} pages')
+    for converter, values in summary['converters'].items():
+        logger.info(f'\t{converter}: {values["files"]} files, {values["bytes"]/1024/1024:.1f} MB, ~{values["pages"]} pages, conversion {values["time"]:.1f} s')
+    logger.info(f'\tThe costliest files:')
+    for estimate in sorted(estimates, key=lambda estimate: -(estimate.convert_time + estimate.assembly_time))[:PLAN_TOP_FILES]:
+        logger.info(f'\t\t{estimate.convert_time + estimate.assembly_time:6.1f} s  item {estimate.item_id}  {estimate.name} '
+                    f'({estimate.converter}, {estimate.size/1024/1024:.1f} MB, ~{estimate.pages} pages)')
+    logger.info(f'\tEstimated time with {jobs} workers: conversions {summary["convert_time"]:.1f} s (longest-first), '
+                f'printing {summary["render_time"]:.1f} s, assembly {summary["assembly_time"]:.1f} s, total ~{summary["total_time"]:.0f} s')
+    return summary
+
+
+def find_programme_paths(patterns) -> list:
+    # export folders given by paths or glob patterns, folders without index.html are skipped
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if len(matches) == 0:
+            logger.warning(f'No export folder matches {pattern}.')
+        for path in matches:
+            path = os.path.normpath(path)
+            if not os.path.isfile(os.path.join(path, 'index.html')):
+                logger.warning(f'Folder {path} is not eJednani export (no index.html), skipping.')
+            elif path not in paths:
+                paths.append(path)
+    return paths
+
+
+def get_error_message(e) -> str:
+    # AppError subclasses are raised mostly without message
+    return f'{type(e).__name__}: {e}' if str(e) else type(e).__name__
+
+
+def convert_programmes_in_batch(programme_paths, output_path, options=None, cache=None) -> list:
+    """Convert more eJednani exports by one LibreOffice pool and one image process pool.
+
+    PDF of each export is written to `output_path` under the path of export
+    relative to the common parent of all exports. Failure of one export is
+    logged and the batch continues. Returns list of BatchResult.
+    """
+    options = options or ConversionOptions()
+    jobs = max(1, options.jobs)
+    common_path = os.path.commonpath([os.path.abspath(path) for path in programme_paths])
+    results = []
+    office = create_office_pool(options)
+    image_pool = create_image_pool(jobs) if jobs > 1 else None
+    try:
+        for programme_path in programme_paths:
+            result = BatchResult(programme_path)
+            relative_path = os.path.relpath(os.path.abspath(programme_path), common_path)
+            programme_output_path = os.path.join(output_path, relative_path)
+            programme_options = options
+            if options.work_dir:
+                programme_options = dataclasses.replace(options, work_dir=os.path.join(options.work_dir, relative_path))
+            logger.info(f'Converting programme {programme_path}...')
+            start = time.perf_counter()
+            try:
+                with profile_stage('programme', programme=programme_path):
+                    os.makedirs(programme_output_path, exist_ok=True)
+                    result.output = convert_programme(programme_path, programme_output_path, programme_options, office, cache, image_pool)
+            except Exception as e:
+                logger.opt(exception=e).error(f'Programme {programme_path} was not converted: {get_error_message(e)}')
+                result.error = get_error_message(e)
+                if isinstance(e, BrokenProcessPool):
+                    # crashed image worker, next programmes get a new pool
+                    image_pool.shutdown(wait=False)
+                    image_pool = create_image_pool(jobs)
+            result.wall_time = time.perf_counter() - start
+            results.append(result)
+    finally:
+        if image_pool is not None:
+            image_pool.shutdown()
+        if office is not None:
+            office.stop()
+    return results
+
+
+def log_batch_summary(results):
+    failed = [result for result in results if result.error]
+    logger.info(f'Converted {len(results)-len(failed)} of {len(results)} programmes:')
+    for result in results:
+        if result.error:
+            logger.error(f'\tFAILED {result.programme}: {result.error}')
+        else:
+            logger.info(f'\tOK {result.programme} -> {result.output} ({result.wall_time:.1f} s)')
+
+
+def watch_programme(programme_path, output_path, options=None, cache=None, debounce=DEBOUNCE, watcher=None):
+    """Convert programme and convert it again whenever files of the export change.
+
+    Runs until interrupted or until `watcher` is stopped. Build is incremental,
+    only changed programme items are printed and assembled again, then index,
+    links and cover. Failed build (e.g. export still being written) is logged
+    and the next change is waited for.
+    """
+    options = dataclasses.replace(options or ConversionOptions(), incremental=True)
+    jobs = max(1, options.jobs)
+    # output and work folder may be inside of the export, own writes are not changes
+    excluded = [output_path, get_work_path(output_path, programme_path, options)]
+    if watcher is None:
+        watcher = ProgrammeWatcher(programme_path, debounce, excluded=excluded)
+    logger.info(f'Watching {programme_path} for changes ({"watchdog" if watcher.observer is not None else "polling"}, debounce {watcher.debounce} s)...')
+    office = create_office_pool(options)
+    image_pool = create_image_pool(jobs) if jobs > 1 else None
+    changed = []
+    try:
+        while changed is not None:
+            start = time.perf_counter()
+            try:
+                with profile_stage('programme', programme=programme_path, changed=len(changed)):
+                    output_filepath = convert_programme(programme_path, output_path, options, office, cache, image_pool)
+                logger.success(f'Programme rebuilt in {time.perf_counter() - start:.1f} s, waiting for changes...')
+            except Exception as e:
+                logger.opt(exception=e).error(f'Programme {programme_path} was not converted: {get_error_message(e)}')
+                if isinstance(e, BrokenProcessPool):
+                    image_pool.shutdown(wait=False)
+                    image_pool = create_image_pool(jobs)
+            changed = watcher.wait_for_changes()
+            if changed:
+                logger.info(f'{len(changed)} files changed ({", ".join(changed[:5])}{", ..." if len(changed) > 5 else ""}), rebuilding...')
+    except KeyboardInterrupt:
+        logger.info('Watching stopped.')
+    finally:
+        watcher.stop()
+        if image_pool is not None:
+            image_pool.shutdown()
+        if office is not None:
+            office.stop()
+
+
+def get_conversion_options(args) -> ConversionOptions:
+    return ConversionOptions(jobs=max(1, args.jobs), renderer=args.renderer, batch_render=args.batch_render,
+                             incremental=args.incremental, work_dir=args.work_dir, profile=args.profile, pipeline=args.pipeline,
+                             zip_max_size=args.zip_max_size*1024*1024, zip_max_ratio=args.zip_max_ratio,
+                             office_daemon=not args.no_office_daemon, convert_timeout=args.convert_timeout, render_timeout=args.render_timeout)
+
 
-    logger.remove()
-    logger.add(sys.stderr, format="{time} {level} {message}", level="WARNING")
-    logger.add(sys.stdout, colorize=True, format="<green>{time}</green> <level>{message}</level>", level="INFO")
-    logger.add("trace.log", backtrace=True, diagnose=True, rotation="10 minutes", retention="10 minutes", level="TRACE")  # Caution, may leak sensitive data
-    logger.add("last.log", rotation="10 minutes", retention="10 minutes", enqueue=True, level="DEBUG")
+if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("-p", "--programme", help = "path to VERA ejednani directory", type=str)
+    parser.add_argument("--batch", help = "convert more VERA ejednani directories (paths or glob patterns) in one process, PDFs are written to OUTPUT under their paths relative to common parent", type=str, nargs='+', metavar='PROGRAMME')
     parser.add_argument("-o", "--output", help = "ePub output folder path", type=str)
     parser.add_argument("--author", help = "the name of the city that generated eJednani export", type=str)
     parser.add_argument("--contributor", help = "your name", type=str)
     parser.add_argument("--source", help = "original resource URL", type=str)
+    parser.add_argument("--no-office-daemon", help = "convert office attachments by separate LibreOffice process for each file", action="store_true")
+    parser.add_argument("--convert-timeout", help = f"seconds of LibreOffice conversion of one attachment before it is killed and retried, attachment is replaced by placeholder page when retry fails too (default {CONVERT_TIMEOUT})", type=int, default=CONVERT_TIMEOUT)
+    parser.add_argument("--render-timeout", help = f"seconds of one wkhtmltopdf run before it is killed and retried (default {RENDER_TIMEOUT})", type=int, default=RENDER_TIMEOUT)
+    parser.add_argument("--cache-dir", help = "folder for cache of converted attachments shared between runs (or env VERA_CACHE_DIR)", type=str)
+    parser.add_argument("--cache-size", help = "maximal size of conversion cache in MB", type=int, default=1024)
+    parser.add_argument("--incremental", help = "keep programme items PDFs in work folder and rebuild only changed items", action="store_true")
+    parser.add_argument("--watch", help = "keep running and rebuild PDF incrementally whenever the programme directory changes", action="store_true")
+    parser.add_argument("--debounce", help = f"seconds without change of the watched directory before rebuild (default {DEBOUNCE})", type=float, default=DEBOUNCE)
+    parser.add_argument("--work-dir", help = "work folder for incremental build (default OUTPUT/.vera2pdf/PROGRAMME_FOLDER_NAME, parent of work folders with --batch)", type=str)
+    parser.add_argument("--renderer", help = "HTML to PDF renderer, fitz renders in-process without wkhtmltopdf", choices=RENDERERS, default='wkhtmltopdf')
+    parser.add_argument("--pipeline", help = "start conversions, printing and assembly of each programme item as soon as its inputs are ready instead of in global phases", action="store_true")
+    parser.add_argument("--batch-render", help = "print all HTML pages by one renderer invocation", action="store_true")
+    parser.add_argument("--zip-max-size", help = "maximal uncompressed size of ZIP attachment in MB", type=int, default=ZIP_MAX_SIZE//(1024*1024))
+    parser.add_argument("--zip-max-ratio", help = "maximal compression ratio of ZIP attachment", type=int, default=ZIP_MAX_RATIO)
+    parser.add_argument("--profile", help = "output profile, eink downsamples images to 200 dpi grayscale", choices=IMAGE_PROFILES, default='default')
+    parser.add_argument("--plan", help = "only print estimated cost of conversion of programme (files, pages, times), nothing is converted", action="store_true")
+    parser.add_argument("--profile-report", help = "write JSON report with time, memory, bytes and pages of each stage to file", type=str)
+    parser.add_argument("--trace", help = f"write detailed trace log of pages, links and attachments to file (default {TRACE_FILEPATH}), may contain sensitive data", nargs='?', const=TRACE_FILEPATH, type=str)
+    parser.add_argument("-j", "--jobs", help = "number of parallel workers for parsing of item pages and attachment conversions (LibreOffice instances and image workers)", type=int, default=1)
     args = parser.parse_args()
-
-    global input_path
+    setup_logging(args.trace)
+
+    if args.programme and args.batch:
+        logger.error("Input parameters '--programme' and '--batch' can't be used together. Exiting...")
+        exit(1)
+    if args.watch and args.batch:
+        logger.error("Input parameters '--watch' and '--batch' can't be used together. Exiting...")
+        exit(1)
     input_path = ''
     if args.programme:
         input_path = args.programme
         if not (os.path.exists(input_path) and os.path.isdir(input_path)):
             logger.error(f"Input parameter '--programme' doesn't contain valid folder path. Value: {input_path}. Exiting...")
             exit(1)
-    global output_path
     output_path = ''
     if args.output:
         output_path = args.output
@@ -921,38 +1427,56 @@ if __name__ == "__main__":
     if args.source:
         input_source = args.source
 
-    tmp_dir = tempfile.TemporaryDirectory()
-
-    logger.info(f'Creating temp directory {tmp_dir.name}...')
-    programme_path = get_programme_path()
-    index_filepath = os.path.join(programme_path, "index.html")
-
-    logger.info(f'Parsing programme...')
-    header, items = parse_programme(index_filepath)
-    logger.trace([item.resolution for item in items])
-    debug_print_items_attachments(items)
-
-    logger.info(f'Extracting *.ZIP attachments original files...')
-    items = extract_zip_files(items, tmp_dir)
-    debug_print_items_attachments(items)
-
-    logger.info(f'Converting attachments to PDF files...')
-    items = convert_files_to_pdf(items, tmp_dir.name)
-    debug_print_items_attachments(items)
-
-    logger.info(f'Creating PDFs for programme items...')
-    create_programme_item_pdfs(header, items, tmp_dir.name)
-    logger.info(f'Creating PDF for index programme...')
-    index_pdf = create_programme_index_pdf(index_filepath, tmp_dir.name, header, items)
-    logger.info(f'Inserting title page...')
-    pdf_output_filepath = insert_title_pdf_page(index_pdf, output_path, tmp_dir.name, header)
-    if os.path.exists(pdf_output_filepath):
-        logger.success(f"Complete PDF file was written to {pdf_output_filepath}.")
+    cache = None
+    cache_dir = args.cache_dir or os.environ.get('VERA_CACHE_DIR')
+    if cache_dir:
+        cache = ConversionCache(cache_dir, args.cache_size*1024*1024)
+
+    options = get_conversion_options(args)
+    if args.plan:
+        failed = False
+        for programme_path in (find_programme_paths(args.batch) if args.batch else [get_programme_path(input_path)]):
+            try:
+                plan_programme(programme_path, options)
+            except Exception as e:
+                logger.error(f'Programme {programme_path} could not be planned: {get_error_message(e)}')
+                failed = True
+        exit(1 if failed else 0)
+    if args.batch:
+        programme_paths = find_programme_paths(args.batch)
+        if len(programme_paths) == 0:
+            logger.error(f"Input parameter '--batch' doesn't match any eJednani export folder. Exiting...")
+            exit(1)
+        programme_info = programme_paths
     else:
-        logger.error(f'Something wrong during writing complete PDF to {pdf_output_filepath}.')
-
-    # input("Press ENTER for cleanup temp dir")
-    tmp_dir.cleanup()
-    tmp_dir = None
-
+        programme_info = get_programme_path(input_path)
+    profiler = None
+    if args.profile_report:
+        profiler = Profiler(programme=programme_info, jobs=args.jobs, renderer=args.renderer,
+                            batch_render=args.batch_render, incremental=args.incremental, profile=args.profile)
+        current_profiler.set(profiler)
+
+    failed = False
+    if args.batch:
+        results = convert_programmes_in_batch(programme_paths, output_path, options, cache)
+        log_batch_summary(results)
+        failed = any(result.error for result in results)
+        if profiler is not None:
+            profiler.info['output'] = [result.output for result in results if not result.error]
+            profiler.info['results'] = [dataclasses.asdict(result) for result in results]
+    elif args.watch:
+        # service managers stop the watcher by SIGTERM, it ends as on Ctrl+C
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        watch_programme(programme_info, output_path, options, cache, args.debounce)
+    else:
+        pdf_output_filepath = convert_programme(programme_info, output_path, options, cache=cache)
+        if profiler is not None:
+            profiler.info['output'] = pdf_output_filepath
+    if profiler is not None:
+        profiler.write_report(args.profile_report)
+        logger.info(f'Profile report was written to {args.profile_report}.')
+
+    if failed:
+        logger.error(f'Script ended. Some programmes were not converted.')
+        exit(1)
     logger.success(f'Script ended. All is done.')
@@ -23,6 +23,9 @@ class ProgrammeItem():
     temp_link: str = ""         # cesta k docasnemu html souboru s upravami
     pdf_temp_file: str = ""     # cesta k docasnemu pdf souboru s upravami
     pdf_start_page: int = 0     # cislo stranky se zacatkem bodu v pdf dokumentu
+    placeholders: int = 0       # pocet nahradnich stranek za neprevedene prilohy nebo stranku bodu
+    warnings: list = field(default_factory=list)        # ParseWarning ze stranky bodu
+    html_root: object = field(default=None, repr=False, compare=False)    # lxml strom stranky bodu
 
 
 @dataclass
@@ -31,4 +34,92 @@ class Attachment():
     name: str
     extension: str
     files: list = field(default_factory=list)
-    orig_files: list = field(default_factory=list)
\ No newline at end of file
+    orig_files: list = field(default_factory=list)
+
+
+@dataclass
+class ArchiveMember():
+    archive: str        # cesta k ZIP souboru
+    name: str           # nazev souboru v archivu
+    size: int = 0
+
+
+@dataclass
+class ParseWarning():
+    source: str         # cesta k parsovanemu souboru
+    field: str          # pole ProgrammeItem
+    message: str
+
+
+@dataclass
+class ImageProfile():
+    name: str
+    dpi: int = 200                  # cilove rozliseni obrazku pri zobrazeni na strance
+    grayscale: bool = False         # prevod do odstinu sedi
+    jpeg_quality: int = 75          # kvalita JPEG komprese
+    bilevel_share: float = 1.0      # podil cerne a bile, od ktereho je obrazek ulozen jako cernobily
+
+
+@dataclass
+class PageRange():
+    anchor: str         # pitem_N, pitem_N_attachment_M nebo programme_index
+    start: int = 0      # index prvni stranky v dokumentu
+    count: int = 0      # pocet stranek
+
+
+@dataclass
+class ConversionOptions():
+    jobs: int = 1                   # pocet paralelnich workeru
+    renderer: str = 'wkhtmltopdf'   # HTML -> PDF renderer
+    batch_render: bool = False      # tisk vsech stranek jednim volanim rendereru
+    incremental: bool = False       # znovu sestavit jen zmenene body
+    work_dir: str = None            # pracovni slozka pro inkrementalni sestaveni
+    profile: str = 'default'        # vystupni profil obrazku
+    zip_max_size: int = None        # maximalni rozbalena velikost ZIP v bajtech, jinak ZIP_MAX_SIZE
+    zip_max_ratio: int = None       # maximalni kompresni pomer ZIP, jinak ZIP_MAX_RATIO
+    office_daemon: bool = True      # prevod kancelarskych priloh LibreOffice listenerem
+    pipeline: bool = False          # prevod, tisk a sestaveni bodu hned po pripraveni jejich vstupu
+    convert_timeout: int = 300      # limit prevodu jedne prilohy LibreOffice v sekundach
+    render_timeout: int = 120       # limit jednoho behu wkhtmltopdf v sekundach
+
+
+@dataclass
+class BatchResult():
+    programme: str                  # cesta k exportu eJednani
+    output: str = ""                # cesta k vystupnimu PDF
+    error: str = ""                 # chyba, pokud prevod selhal
+    wall_time: float = 0.0          # doba prevodu v sekundach
+
+
+@dataclass
+class ConversionResult():
+    programme: str                  # cesta k exportu eJednani
+    output: str = ""                # cesta k vystupnimu PDF
+    wall_time: float = 0.0          # doba prevodu v sekundach
+    counters: dict = field(default_factory=dict)    # pocty timeoutu, opakovani a nahradnich stranek
+    stages: dict = field(default_factory=dict)      # souhrn casu, bajtu a stranek po fazich prevodu
+
+
+@dataclass
+class ConversionJob():
+    id: str                         # identifikator ulohy sluzby
+    path: str = ""                  # slozka ulohy s nahranym ZIP, exportem a vystupem
+    status: str = 'queued'          # queued, running, done, failed
+    created: float = 0.0            # cas prijeti ulohy (unix time)
+    started: float = 0.0            # cas zahajeni prevodu
+    finished: float = 0.0           # cas dokonceni prevodu
+    output: str = ""                # cesta k vystupnimu PDF
+    error: str = ""                 # chyba, pokud prevod selhal
+    counters: dict = field(default_factory=dict)    # pocty timeoutu, opakovani a nahradnich stranek
+
+
+@dataclass
+class JobEstimate():
+    item_id: str                    # cislo bodu
+    file: object                    # cesta k souboru nebo ArchiveMember
+    name: str                       # nazev souboru
+    converter: str                  # libreoffice, pymupdf nebo none
+    size: int = 0                   # velikost souboru v bajtech
+    pages: int = 0                  # pocet stranek, odhad pokud nejsou spocitany
+    convert_time: float = 0.0       # odhad doby prevodu v sekundach
+    assembly_time: float = 0.0      # odhad doby sestaveni stranek v sekundach
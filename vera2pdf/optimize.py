@@ -0,0 +1,125 @@
+import zlib
+
+import fitz
+
+from loguru import logger
+
+from .model import ImageProfile
+
+
+IMAGE_PROFILES = {
+    'default': None,
+    # A4 e-ink readers (Quaderno, reMarkable) have about 200 dpi grayscale panels
+    'eink': ImageProfile('eink', dpi=200, grayscale=True, jpeg_quality=60, bilevel_share=0.97),
+}
+# images smaller than this are kept, their recompression saves nothing
+MIN_OPTIMIZED_BYTES = 32*1024
+# keys of image dictionary which are not valid for recompressed image
+STALE_IMAGE_KEYS = ['DecodeParms', 'Intent']
+
+# lookup tables for translate: gray values far from black and white, and threshold to black and white
+MIDTONES_TABLE = bytes(1 if 64 <= v < 192 else 0 for v in range(256))
+BILEVEL_TABLE = bytes(0 if v < 128 else 255 for v in range(256))
+
+
+def get_image_scales(doc, dpi) -> dict:
+    """Return scale of each image xref needed for `dpi` at its largest placement in `doc`."""
+    scales = {}
+    for page in doc:
+        for xref, smask, width, height, bpc, colorspace, *rest in page.get_images(full=True):
+            if smask:
+                scales[xref] = None     # transparency would be lost by JPEG
+            if xref in scales and scales[xref] is None:
+                continue
+            scale = 0
+            for rect in page.get_image_rects(xref):
+                scale = max(scale, rect.width/72*dpi/width, rect.height/72*dpi/height)
+            scales[xref] = max(scales.get(xref, 0), scale or 1)
+    return scales
+
+
+def is_optimizable(doc, xref) -> bool:
+    # masks, color keyed, inverted and already bilevel images are left as they are
+    if doc.xref_get_key(xref, 'ImageMask')[1] == 'true':
+        return False
+    if doc.xref_get_key(xref, 'Mask')[0] != 'null' or doc.xref_get_key(xref, 'Decode')[0] != 'null':
+        return False
+    if doc.xref_get_key(xref, 'BitsPerComponent')[1] == '1':
+        return False
+    return len(doc.xref_stream_raw(xref) or b'') >= MIN_OPTIMIZED_BYTES
+
+
+def optimize_image(image, scale, profile):
+    """Downsample, convert to grayscale and recompress one image.
+
+    Runs in process pool, so it takes and returns bytes only. Returns tuple
+    (filter, width, height, colorspace, compressed data).
+    """
+    pix = fitz.Pixmap(image)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if profile.grayscale and pix.colorspace.n != 1:
+        pix = fitz.Pixmap(fitz.csGRAY, pix)
+    elif pix.colorspace.n == 4:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    # line art is recognized before downsampling, which blurs its edges to midtones
+    samples = pix.samples
+    bilevel = pix.colorspace.n == 1 and len(samples.translate(MIDTONES_TABLE).replace(b'\0', b'')) <= len(samples)*(1-profile.bilevel_share)
+    if scale < 1:
+        pix = fitz.Pixmap(pix, max(1, round(pix.width*scale)), max(1, round(pix.height*scale)), None)
+    if bilevel:
+        # line art and text scans stay sharp in black and white, Flate compresses them well
+        data = zlib.compress(pix.samples.translate(BILEVEL_TABLE))
+        return 'FlateDecode', pix.width, pix.height, 'DeviceGray', data
+    data = pix.tobytes('jpg', jpg_quality=profile.jpeg_quality)
+    return 'DCTDecode', pix.width, pix.height, 'DeviceGray' if pix.colorspace.n == 1 else 'DeviceRGB', data
+
+
+def replace_image_stream(doc, xref, result):
+    image_filter, width, height, colorspace, data = result
+    doc.update_stream(xref, data, compress=False)
+    doc.xref_set_key(xref, 'Filter', f'/{image_filter}')
+    doc.xref_set_key(xref, 'Width', str(width))
+    doc.xref_set_key(xref, 'Height', str(height))
+    doc.xref_set_key(xref, 'ColorSpace', f'/{colorspace}')
+    doc.xref_set_key(xref, 'BitsPerComponent', '8')
+    for key in STALE_IMAGE_KEYS:
+        if doc.xref_get_key(xref, key)[0] != 'null':
+            doc.xref_set_key(xref, key, 'null')
+
+
+def optimize_pdf_images(doc, profile, pool=None) -> tuple:
+    """Optimize images of `doc` in place by `profile`.
+
+    Images are recompressed in `pool` in parallel when given. Images whose
+    recompressed stream is not smaller are kept. Returns tuple of sizes of
+    image streams before and after.
+    """
+    images = []
+    for xref, scale in get_image_scales(doc, profile.dpi).items():
+        if scale is None or not is_optimizable(doc, xref):
+            continue
+        images.append((xref, doc.extract_image(xref)['image'], scale))
+    if pool is not None:
+        # the largest images start first, so they do not keep one worker busy at the end
+        images.sort(key=lambda image: -len(image[1]))
+    xrefs = [xref for xref, image, scale in images]
+    if pool is not None:
+        tasks = [pool.submit(optimize_image, image, scale, profile) for xref, image, scale in images]
+    else:
+        tasks = [(image, scale) for xref, image, scale in images]
+    size_before = size_after = 0
+    for xref, task in zip(xrefs, tasks):
+        try:
+            result = task.result() if pool is not None else optimize_image(*task, profile)
+        except (RuntimeError, ValueError) as e:
+            logger.warning(f'\t\tImage {xref} could not be optimized: {e}')
+            continue
+        raw_size = len(doc.xref_stream_raw(xref))
+        size_before += raw_size
+        if len(result[-1]) < raw_size:
+            replace_image_stream(doc, xref, result)
+            size_after += len(doc.xref_stream_raw(xref))
+        else:
+            size_after += raw_size
+    return size_before, size_after
@@ -0,0 +1,59 @@
+import os
+
+from urllib.parse import urlparse, unquote
+
+from .model import PageRange
+
+
+def get_link_target(link) -> str:
+    """Return normalized local path the link of rendered page points to, or None."""
+    target = link.get('file') or link.get('uri')
+    if not target:
+        return None
+    if target.startswith('file:'):
+        target = urlparse(target).path
+    elif '://' in target or target.startswith('mailto:'):
+        return None
+    # renderers write names with spaces and diacritics escaped, in file uris and launch paths alike
+    return os.path.normpath(unquote(target.split('#')[0]))
+
+
+class PageMap():
+    """Page ranges of assembled document in order, with lookups by anchor and link target.
+
+    Ranges are appended as parts are joined, so start of each range is known
+    without summing page counts of previous parts.
+    """
+
+    def __init__(self):
+        self.ranges = []
+        self.anchors = {}
+        self.targets = {}
+        self.page_count = 0
+
+    def add(self, anchor, count, targets=()) -> PageRange:
+        page_range = PageRange(anchor, self.page_count, count)
+        self.ranges.append(page_range)
+        self.anchors[anchor] = page_range
+        for target in targets:
+            # the first part wins, e.g. all attachments extracted from one ZIP are linked by its first file
+            self.targets.setdefault(os.path.normpath(target), page_range)
+        self.page_count += count
+        return page_range
+
+    def get(self, anchor) -> PageRange:
+        return self.anchors.get(anchor)
+
+    def find_link(self, link) -> PageRange:
+        target = get_link_target(link)
+        return self.targets.get(target) if target is not None else None
+
+    def get_target_page(self, page_range) -> int:
+        # empty range at the end points to the last page
+        return min(page_range.start, self.page_count-1)
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def __len__(self):
+        return len(self.ranges)
@@ -0,0 +1,72 @@
+import heapq
+
+from .model import JobEstimate
+
+
+# rough costs in seconds measured on eJednani exports, they set order of jobs and estimate of run time
+CONVERSION_COSTS = {        # converter: (per file, per MB)
+    'libreoffice': (0.5, 2.0),     # with listener, separate process starts for 2-3 s more
+    'pymupdf': (0.03, 0.05),
+    'none': (0.0, 0.0),
+}
+SPREADSHEET_EXTENSIONS = ['.xls', '.xlsx', '.ods']
+SPREADSHEET_FACTOR = 3      # spreadsheets are paginated by LibreOffice, small file may have hundreds of pages
+RENDER_COSTS = {'wkhtmltopdf': 0.25, 'fitz': 0.1}    # per printed page of item, index and cover
+ASSEMBLY_COST_PER_PAGE = 0.02   # repair, rotation, header, links and saving of attachment page
+PAGE_BYTES = {              # bytes per page, for files whose pages are not counted
+    'pdf': 100*1024,
+    'libreoffice': 20*1024,
+}
+MB = 1024*1024
+
+
+def get_conversion_time(converter, size, extension='') -> float:
+    per_file, per_mb = CONVERSION_COSTS.get(converter, CONVERSION_COSTS['none'])
+    time = per_file + per_mb*size/MB
+    return time*SPREADSHEET_FACTOR if extension.lower() in SPREADSHEET_EXTENSIONS else time
+
+
+def estimate_job(item_id, file, name, converter, size, pages=None, extension='') -> JobEstimate:
+    if pages is None:
+        pages = 1 if converter == 'pymupdf' else max(1, size // PAGE_BYTES.get(converter, PAGE_BYTES['pdf']))
+    return JobEstimate(item_id, file, name, converter, size, pages,
+                       get_conversion_time(converter, size, extension), pages*ASSEMBLY_COST_PER_PAGE)
+
+
+def get_longest_first_order(costs) -> list:
+    """Return indexes of `costs` from the largest, so the longest jobs do not finish last."""
+    return sorted(range(len(costs)), key=lambda i: -costs[i])
+
+
+def get_makespan(costs, workers) -> float:
+    # time of jobs started longest-first, each on the first free of `workers`
+    finish_times = [0.0]*max(1, workers)
+    for i in get_longest_first_order(costs):
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + costs[i])
+    return max(finish_times)
+
+
+def get_plan_summary(estimates, items_count, workers=1, renderer='wkhtmltopdf') -> dict:
+    """Estimate run time of programme from job estimates.
+
+    Conversions run on `workers` longest-first, printing of pages and assembly
+    of items are sequential.
+    """
+    converters = {}
+    for estimate in estimates:
+        summary = converters.setdefault(estimate.converter, {'files': 0, 'bytes': 0, 'pages': 0, 'time': 0.0})
+        summary['files'] += 1
+        summary['bytes'] += estimate.size
+        summary['pages'] += estimate.pages
+        summary['time'] += estimate.convert_time
+    convert_time = get_makespan([estimate.convert_time for estimate in estimates], workers)
+    render_time = (items_count + 2)*RENDER_COSTS.get(renderer, RENDER_COSTS['wkhtmltopdf'])
+    assembly_time = sum(estimate.assembly_time for estimate in estimates)
+    return {
+        'converters': converters,
+        'pages': sum(estimate.pages for estimate in estimates),
+        'convert_time': convert_time,
+        'render_time': render_time,
+        'assembly_time': assembly_time,
+        'total_time': convert_time + render_time + assembly_time,
+    }
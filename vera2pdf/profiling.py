@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import threading
+import contextvars
+
+from datetime import datetime
+from contextlib import contextmanager
+
+try:
+    import resource     # not available on Windows
+except ImportError:
+    resource = None
+
+
+REPORT_VERSION = 1
+SUMMED_KEYS = ['wall_time', 'cpu_time', 'input_bytes', 'output_bytes', 'pages']
+
+current_profiler = contextvars.ContextVar('current_profiler', default=None)
+current_record = contextvars.ContextVar('current_record', default=None)
+
+
+def get_peak_rss():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss*1024    # bytes on MacOS, kilobytes on Linux
+
+
+def get_file_size(filepath):
+    try:
+        return os.path.getsize(filepath)
+    except (OSError, TypeError):
+        return None
+
+
+class Profiler():
+    """Collects timing, memory, bytes and pages of pipeline stages of one run.
+
+    Records are added by `profile_stage` in any thread running in context
+    where the profiler is current.
+    """
+
+    def __init__(self, **info):
+        self.info = info
+        self.records = []
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.started = datetime.now()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def get_summary(self) -> dict:
+        stages = {}
+        with self.lock:
+            records = list(self.records)
+        for record in records:
+            stage = stages.setdefault(record['stage'], {'count': 0})
+            stage['count'] += 1
+            for key in SUMMED_KEYS:
+                if record.get(key) is not None:
+                    stage[key] = stage.get(key, 0) + record[key]
+        return stages
+
+    def get_report(self) -> dict:
+        return {
+            'version': REPORT_VERSION,
+            'started': self.started.isoformat(),
+            'info': self.info,
+            'wall_time': time.perf_counter() - self.start_wall,
+            'cpu_time': time.process_time() - self.start_cpu,
+            'peak_rss': get_peak_rss(),
+            'stages': self.get_summary(),
+            'counters': dict(self.counters),
+            'records': list(self.records),
+        }
+
+    def write_report(self, filepath):
+        with open(filepath, mode='w', encoding='utf-8') as f:
+            json.dump(self.get_report(), f, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def profile_stage(stage, **tags):
+    """Measure block as one record of `stage`.
+
+    Yields dict of the record, the block may add `input_bytes`,
+    `output_bytes`, `pages` or other tags. Without current profiler it costs
+    nothing but the dict.
+    """
+    profiler = current_profiler.get()
+    record = {'stage': stage, **tags}
+    if profiler is None:
+        yield record
+        return
+    token = current_record.set(record)
+    start_wall = time.perf_counter()
+    start_cpu = time.thread_time()
+    try:
+        yield record
+    finally:
+        record['wall_time'] = time.perf_counter() - start_wall
+        record['cpu_time'] = time.thread_time() - start_cpu     # CPU of this thread, not of LibreOffice or wkhtmltopdf
+        record['peak_rss'] = get_peak_rss()
+        current_record.reset(token)
+        profiler.add(record)
+
+
+def tag_stage(**tags):
+    # add tags to record of innermost profiled stage
+    record = current_record.get()
+    if record is not None:
+        record.update(tags)
+
+
+def count_event(name):
+    # event of run (converter timeout, retry...) counted in report and in record of innermost profiled stage
+    profiler = current_profiler.get()
+    if profiler is None:
+        return
+    profiler.count(name)
+    record = current_record.get()
+    if record is not None:
+        record[name] = record.get(name, 0) + 1
+
+
+def submit_in_context(pool, fn, *args):
+    # worker thread records into profiler of submitting context
+    return pool.submit(contextvars.copy_context().run, fn, *args)
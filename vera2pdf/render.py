@@ -0,0 +1,224 @@
+import os
+import re
+import functools
+import pathlib
+import contextvars
+
+import pdfkit
+import fitz
+
+from urllib.parse import unquote
+from lxml import etree
+from loguru import logger
+
+from .exceptions import *
+
+from .profiling import profile_stage, get_file_size
+from .supervise import convert_supervised, RETRIES
+
+
+RENDERERS = ['wkhtmltopdf', 'fitz']
+RENDER_TIMEOUT = 120    # seconds of one wkhtmltopdf run before it is killed
+
+# set for the run from its options, threads started by submit_in_context or TaskGraph share it
+render_timeout = contextvars.ContextVar('render_timeout', default=RENDER_TIMEOUT)
+
+PDFKIT_OPTIONS = {
+    'page-size': 'A4',
+    'margin-top': '0.5in',
+    'margin-right': '0.5in',
+    'margin-bottom': '0.5in',
+    'margin-left': '0.5in',
+    'encoding': "UTF-8",
+    'enable-local-file-access': None,
+    'no-outline': None,
+    'orientation': 'Portrait',
+    'header-font-name': 'Literata, Times New Roman',
+    'header-font-size': 13,
+}
+
+FITZ_MARGIN = 36    # 0.5in as in wkhtmltopdf options
+# wkhtmltopdf shrinks fixed width of #content to A4, MuPDF would overflow the page,
+# MuPDF also ignores @media blocks with fonts settings of body and needs bold/italic faces of Literata family
+FITZ_EXTRA_CSS = '''
+#content{width:auto;}
+body{font-family:Literata, serif;font-size:13pt;}
+@font-face{font-family:Literata;font-weight:bold;src:url("literata-bold.otf");}
+@font-face{font-family:Literata;font-style:italic;src:url("literata-italic.otf");}
+'''
+
+
+@functools.lru_cache(maxsize=16)
+def load_stylesheet_for_fitz(css_filepath, mtime):
+    # MuPDF archive can't follow ../ urls, referenced fonts are passed as flat archive entries
+    with open(css_filepath, encoding='utf-8') as f:
+        css = f.read()
+    resources = []
+    def replace_url(match):
+        url = match.group(1)
+        filepath = os.path.normpath(os.path.join(os.path.dirname(css_filepath), url))
+        if not os.path.isfile(filepath):
+            return match.group(0)
+        name = os.path.basename(filepath)
+        with open(filepath, 'rb') as f:
+            resources.append((f.read(), name))
+        return f'url("{name}")'
+    css = re.sub(r'local\([^)]*\)\s*,\s*', '', css)     # MuPDF does not know local() fonts
+    css = re.sub(r'[^{}]*:nth-child\([^)]*\)[^{}]*\{[^}]*\}', '', css)    # nor :nth-child() selectors
+    css = re.sub(r'url\(\s*["\']?([^"\')]+)["\']?\s*\)', replace_url, css)
+    return css, tuple(resources)
+
+
+def prepare_html_for_fitz(html_text, html_filepath, root=None):
+    # stylesheets linked in page are moved to user css of Story, links are removed from given root
+    if root is None:
+        root = etree.fromstring(html_text, etree.HTMLParser())
+    css = ''
+    archive = fitz.Archive(os.path.dirname(os.path.abspath(html_filepath)))
+    for link in list(root.iter('link')):
+        href = link.attrib.get('href', '')
+        if href.lower().endswith('.css'):
+            css_filepath = os.path.normpath(os.path.join(os.path.dirname(html_filepath), href))
+            if os.path.isfile(css_filepath):
+                link_css, resources = load_stylesheet_for_fitz(css_filepath, os.path.getmtime(css_filepath))
+                css += link_css
+                for resource in resources:
+                    archive.add(resource)
+            else:
+                logger.warning(f'Stylesheet {href} of {os.path.basename(html_filepath)} not found.')
+        link.getparent().remove(link)
+    html_text = etree.tostring(root, method='html', encoding='unicode')
+    if len(css) > 0:
+        css += FITZ_EXTRA_CSS
+    return html_text, css, archive
+
+
+def set_named_destinations(doc, anchors):
+    # anchors {name: (page number, point)} are written to catalog /Dests as wkhtmltopdf does for ids
+    dests = []
+    for name, (pno, point) in anchors.items():
+        if not re.fullmatch(r'[A-Za-z0-9_.\-]+', name):
+            continue
+        page = doc[pno]
+        dests.append(f'/{name} [{page.xref} 0 R /XYZ {point.x:g} {page.rect.height-point.y:g} 0]')
+    if len(dests) > 0:
+        doc.xref_set_key(doc.pdf_catalog(), 'Dests', f'<<{" ".join(dests)}>>')
+
+
+def merge_word_links(doc, html_filepath):
+    # MuPDF emits link for each word and relative hrefs as launch links,
+    # wkhtmltopdf one link per line of anchor with absolute file:// uri
+    for page in doc:
+        merged = {}
+        for link in page.get_links():
+            if link['kind'] not in (fitz.LINK_URI, fitz.LINK_LAUNCH):
+                continue
+            key = (link.get('uri') or link.get('file'), round(link['from'].y0))
+            merged[key] = merged[key] | link['from'] if key in merged else link['from']
+            page.delete_link(link)
+        for (uri, y), rect in merged.items():
+            if '://' not in uri and not uri.startswith(('mailto:', '#')):
+                # serialized page has hrefs escaped, file names with spaces or diacritics are unescaped before as_uri
+                uri = pathlib.Path(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(html_filepath)), unquote(uri)))).as_uri()
+            page.insert_link({'kind': fitz.LINK_URI, 'from': rect, 'uri': uri})
+
+
+def render_pdf_by_fitz(html_filepath, pdf_filepath, root=None):
+    html_text = None
+    if root is None:
+        with open(html_filepath, encoding='utf-8') as f:
+            html_text = f.read()
+    html_text, css, archive = prepare_html_for_fitz(html_text, html_filepath, root)
+    story = fitz.Story(html=html_text, user_css=css, archive=archive)
+    mediabox = fitz.paper_rect('a4')
+    where = mediabox + (FITZ_MARGIN, FITZ_MARGIN, -FITZ_MARGIN, -FITZ_MARGIN)
+    anchors = {}
+    def positionfn(position):
+        if position.id and position.open_close & 1 and position.id not in anchors:
+            anchors[position.id] = (position.page_num - 1, fitz.Point(position.rect[0], position.rect[1]))
+    doc = story.write_with_links(lambda rect_num, filled: (mediabox, where, None), positionfn)
+    doc = fitz.open('pdf', doc.tobytes())    # links of Story document can't be replaced in place
+    merge_word_links(doc, html_filepath)
+    set_named_destinations(doc, anchors)
+    doc.save(pdf_filepath, garbage=3, deflate=True)
+    doc.close()
+    return pdf_filepath
+
+
+def render_pdf_by_wkhtmltopdf(html_filepaths, pdf_filepath, retries=RETRIES):
+    # pdfkit builds the command, wkhtmltopdf is run supervised instead of pdfkit's unbounded wait
+    command = pdfkit.PDFKit(html_filepaths, 'file', options=PDFKIT_OPTIONS, verbose=False).command(pdf_filepath)
+    return convert_supervised(command, pdf_filepath, render_timeout.get(), 'wkhtmltopdf', retries=retries)
+
+
+def render_pdf(html_filepath, pdf_filepath, renderer='wkhtmltopdf', root=None):
+    # root is parsed page to render by fitz instead of file, html_filepath is still base for its resources
+    with profile_stage('render', file=os.path.basename(html_filepath), renderer=renderer) as record:
+        if renderer == 'fitz':
+            render_pdf_by_fitz(html_filepath, pdf_filepath, root)
+        else:
+            render_pdf_by_wkhtmltopdf(html_filepath, pdf_filepath)
+        record['output_bytes'] = get_file_size(pdf_filepath)
+    return pdf_filepath
+
+
+def split_pdf_by_anchors(pdf_filepath, pages) -> bool:
+    # each page of batch starts with its anchor, page ranges are found by named destinations
+    doc = fitz.open(pdf_filepath)
+    names = doc.resolve_names()
+    starts = [names.get(anchor, {}).get('page', -1) for html_filepath, pdf_filepath, anchor in pages]
+    if starts[0] != 0 or any(start >= next_start for start, next_start in zip(starts, starts[1:])):
+        logger.warning(f'\tAnchors of batch not found in {os.path.basename(pdf_filepath)}, pages {starts}.')
+        doc.close()
+        return False
+    ends = starts[1:] + [len(doc)]
+    for (html_filepath, page_pdf_filepath, anchor), start, end in zip(pages, starts, ends):
+        page_doc = fitz.open()
+        page_doc.insert_pdf(doc, from_page=start, to_page=end-1)
+        page_doc.save(page_pdf_filepath, garbage=3, deflate=True)
+        page_doc.close()
+    doc.close()
+    return True
+
+
+def is_batch_rendered(pages, renderer) -> bool:
+    # in-process renderer has no startup costs to save
+    return renderer == 'wkhtmltopdf' and len(pages) > 1
+
+
+def render_batch(pages, batch_filepath, renderer='wkhtmltopdf'):
+    # only external renderer runs here, the batch is split by `split_batch` in PyMuPDF thread
+    if not is_batch_rendered(pages, renderer):
+        return
+    with profile_stage('render', file=os.path.basename(batch_filepath), renderer=renderer, pages=len(pages)) as record:
+        try:
+            # failed batch is not retried, pages are printed one by one
+            render_pdf_by_wkhtmltopdf([html_filepath for html_filepath, pdf_filepath, anchor in pages], batch_filepath, retries=0)
+        except ConversionError as e:
+            logger.warning(f'\t{e}')
+        record['output_bytes'] = get_file_size(batch_filepath)
+
+
+def split_batch(pages, batch_filepath, renderer='wkhtmltopdf') -> list:
+    if is_batch_rendered(pages, renderer):
+        if os.path.exists(batch_filepath) and split_pdf_by_anchors(batch_filepath, pages):
+            return [pdf_filepath for html_filepath, pdf_filepath, anchor in pages]
+        logger.warning('\tBatch rendering failed, rendering pages one by one...')
+    rendered = []
+    for html_filepath, pdf_filepath, anchor in pages:
+        try:
+            rendered.append(render_pdf(html_filepath, pdf_filepath, renderer))
+        except ConversionError as e:
+            logger.error(f'\t{e}')
+    return rendered
+
+
+def render_pdfs_in_batch(pages, batch_filepath, renderer='wkhtmltopdf'):
+    """Render list of (html_filepath, pdf_filepath, anchor) by one renderer invocation.
+
+    Output is split back to the pdf files by anchors. When the batch fails or
+    the anchors can't be resolved, pages are rendered one by one, page that
+    can't be rendered is left missing.
+    """
+    render_batch(pages, batch_filepath, renderer)
+    return split_batch(pages, batch_filepath, renderer)
@@ -0,0 +1,131 @@
+import re
+
+from urllib.parse import unquote
+
+from lxml import etree
+from lxml.html import fragments_fromstring
+from loguru import logger
+
+
+REMOVE_ATTRIBUTES = ['style','font','face','size','color']
+VOTING_HTML = '<table class="podpisy"><tr><td>Hlasování:</td><td>Pro ____ </td><td>Proti ____ </td><td>Zdržel se: ____ </td><td>Nehlasoval: ____ </td></tr></table><table class="podpisy"><tr><td width="30%">Usnesení přijato:</td><td width="20%">&#9634; ANO</td><td width="20%">&#9634; NE</td><td width="30%">&#9634; Staženo</td></tr></table><hr class="cela">'
+NOTES_HTML = '<table cellspacing="10" class="akteri"><tr><td>Poznámky:</td><td><br><br><br></td></tr></table>'
+ATTACHMENTS_LABEL = 'Materiál obsahuje:'
+# libxml2 escapes spaces and diacritics of these attributes when it writes HTML
+URI_ATTRIBUTE = re.compile(r'(\s(?:href|src)=")([^"]*)(")')
+
+
+def has_class(el, name) -> bool:
+    return name in el.get('class', '').split()
+
+
+def insert_before(el, new_elements):
+    parent = el.getparent()
+    index = parent.index(el)
+    for i, new_el in enumerate(new_elements):
+        parent.insert(index+i, new_el)
+
+
+def insert_after(el, new_elements):
+    parent = el.getparent()
+    index = parent.index(el)
+    new_elements[-1].tail = el.tail
+    el.tail = None
+    for i, new_el in enumerate(new_elements):
+        parent.insert(index+1+i, new_el)
+
+
+def replace_with(el, new_elements):
+    insert_after(el, new_elements)
+    el.getparent().remove(el)
+
+
+def strip_attributes(el):
+    for key in REMOVE_ATTRIBUTES:
+        el.attrib.pop(key, None)
+
+
+def edit_programme_item_tree(root, item):
+    """Apply edits of programme item page to its parsed tree.
+
+    Elements to edit are found and attributes stripped in one traversal, the
+    edits are applied after it. Inserted elements carry no stripped attributes.
+    """
+    podpisy = nadpis = content = akteri = attachments_label = None
+    last_hr = None
+    hr_after_podpisy = False
+    for el in root.iter(etree.Element):
+        strip_attributes(el)
+        if el.tag == 'table' and podpisy is None and has_class(el, 'podpisy'):
+            podpisy = el
+        elif el.tag == 'hr' and has_class(el, 'cela'):
+            last_hr = el
+            hr_after_podpisy = podpisy is not None
+        elif el.tag == 'div' and nadpis is None and has_class(el, 'nadpis'):
+            nadpis = el
+        elif el.tag == 'div' and content is None and el.get('id') == 'content':
+            content = el
+        elif el.tag == 'table' and akteri is None and has_class(el, 'akteri'):
+            akteri = el
+        elif attachments_label is None and akteri is not None and el.text == ATTACHMENTS_LABEL and akteri in el.iterancestors():
+            attachments_label = el
+    # change podpisy to voting
+    if podpisy is None:
+        logger.error(f'Table class podpisy not found in item {item.id}.')
+    else:
+        voting = fragments_fromstring(VOTING_HTML)
+        replace_with(podpisy, voting)
+        if not hr_after_podpisy:
+            last_hr = voting[-1]
+    # add notes to the end
+    if last_hr is not None:
+        insert_after(last_hr, fragments_fromstring(NOTES_HTML))
+    # add programme item number to title
+    if nadpis is not None:
+        nadpis.text = f'{item.id}. {nadpis.text or ""}'
+    # add bookmark to top of page
+    bookmark = etree.Element('div', id=f'pitem_{item.id}')
+    if content is not None:
+        insert_before(content, [bookmark])
+    else:
+        root.find('body').insert(0, bookmark)
+    # add bookmark to attachment section
+    if attachments_label is None:
+        logger.error(f'Could not find Přílohy part of page. Skipping adding bookmark.')
+    else:
+        attachments_label.insert(0, etree.Element('div', id=f'pitem_{item.id}_attachments'))
+    return root
+
+
+def edit_index_tree(root, items):
+    """Link programme `items` without own page to generated pages and strip attributes."""
+    popisek = None
+    cells = []
+    for el in root.iter(etree.Element):
+        strip_attributes(el)
+        if el.tag == 'tr' and popisek is None and has_class(el, 'popisek'):
+            popisek = el
+        elif el.tag == 'td' and popisek is not None and has_class(el, 'left'):
+            cells.append(el)
+    # first cell is in header row of programme table, the others are rows of items in programme order
+    for cell, item in zip(cells[1:], items):
+        if next(cell.iter('a'), None) is not None:
+            continue
+        tag = etree.Element('a', href=f'html/pitem_{item.id}.html')
+        if cell.text:
+            tag.text = cell.text
+            cell.text = None
+            cell.insert(0, tag)
+        elif len(cell) > 0:
+            first = cell[0]
+            replace_with(first, [tag])
+            tag.append(first)
+    # add bookmark to top of programme
+    root.find('body').insert(0, etree.Element('div', id='programme_index'))
+    return root
+
+
+def tree_to_html(root) -> str:
+    # links are written as in export, wkhtmltopdf escapes file paths itself and would escape them twice
+    html = etree.tostring(root.getroottree(), method='html', encoding='unicode')
+    return URI_ATTRIBUTE.sub(lambda m: m.group(1) + unquote(m.group(2)).replace('"', '&quot;') + m.group(3), html)
@@ -0,0 +1,70 @@
+import threading
+import contextvars
+
+from concurrent.futures import Future, wait
+
+
+class TaskGraph():
+    """Tasks run in their executors as soon as the tasks they depend on finish.
+
+    Task is submitted with futures of its dependencies and gets its own future
+    back at once, so the whole graph is submitted before anything runs. Task
+    whose dependency failed is not run and fails with the same exception.
+    Tasks run in context of submitting thread, e.g. with its profiler.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.futures = []
+
+    def submit(self, executor, fn, *args, deps=()) -> Future:
+        future = Future()
+        context = contextvars.copy_context()
+        pending = [len(deps)]
+        with self.lock:
+            self.futures.append(future)
+
+        def start():
+            failed = next((dep for dep in deps if dep.exception() is not None), None)
+            if failed is not None:
+                future.set_exception(failed.exception())
+                return
+            try:
+                task = executor.submit(context.run, fn, *args)
+            except RuntimeError as e:      # executor shut down
+                future.set_exception(e)
+                return
+            task.add_done_callback(lambda task: copy_result(task, future))
+
+        def dependency_done(dep):
+            with self.lock:
+                pending[0] -= 1
+                ready = pending[0] == 0
+            if ready:
+                start()
+
+        if len(deps) == 0:
+            start()
+        for dep in deps:
+            dep.add_done_callback(dependency_done)
+        return future
+
+    def wait(self):
+        """Wait for all tasks, then raise exception of the first failed one."""
+        while True:
+            with self.lock:
+                futures = list(self.futures)
+            wait(futures)
+            with self.lock:
+                if len(futures) == len(self.futures):
+                    break
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+
+
+def copy_result(task, future):
+    if task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
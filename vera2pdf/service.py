@@ -0,0 +1,379 @@
+import os
+import json
+import glob
+import time
+import uuid
+import queue
+import shutil
+import signal
+import zipfile
+import argparse
+import tempfile
+import threading
+
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from loguru import logger
+
+from .exceptions import *
+from .model import ConversionOptions, ConversionJob
+from .cache import ConversionCache
+from .converter import Converter
+from .main import get_error_message, ZIP_MAX_SIZE, ZIP_MAX_RATIO, ZIP_MIN_RATIO_SIZE, ZIP_BUFFER_SIZE
+from .libreoffice import CONVERT_TIMEOUT
+from .render import RENDERERS, RENDER_TIMEOUT
+from .optimize import IMAGE_PROFILES
+from .tracing import setup_logging, TRACE_FILEPATH
+
+
+SERVICE_HOST = '127.0.0.1'      # service is reachable only from this machine
+SERVICE_PORT = 8077
+SERVICE_WORKERS = 1             # meetings converted at once
+QUEUE_SIZE = 16                 # jobs waiting for conversion
+UPLOAD_MAX_SIZE = 1024*1024*1024
+JOB_RETENTION = 24*60*60        # seconds finished job and its PDF are kept
+UPLOAD_FILENAME = 'export.zip'
+RETRY_AFTER = 30                # seconds suggested to client of full queue
+
+
+def extract_export_zip(zip_filepath, path, max_size=ZIP_MAX_SIZE, max_ratio=ZIP_MAX_RATIO):
+    # folders of export are kept, sizes and paths of all members are checked before anything is written
+    root = os.path.abspath(path)
+    zip_size = os.path.getsize(zip_filepath)
+    with zipfile.ZipFile(zip_filepath, 'r') as zipobject:
+        infos = zipobject.infolist()
+        total_size = sum(info.file_size for info in infos)
+        if total_size > max_size:
+            raise ZipLimitExceededError(f'Uncompressed size of uploaded export exceeds {max_size} bytes.')
+        if total_size > max(max_ratio * zip_size, ZIP_MIN_RATIO_SIZE):
+            raise ZipLimitExceededError(f'Compression ratio of uploaded export exceeds {max_ratio}.')
+        for info in infos:
+            if not os.path.abspath(os.path.join(root, info.filename)).startswith(root + os.sep):
+                raise UnsafeArchiveError(f'Member {info.filename} of uploaded export is outside of its folder.')
+        for info in infos:
+            filepath = os.path.join(root, info.filename)
+            if info.is_dir():
+                os.makedirs(filepath, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            with zipobject.open(info) as src, open(filepath, 'wb') as dst:
+                shutil.copyfileobj(src, dst, ZIP_BUFFER_SIZE)
+
+
+def find_export_path(path) -> str:
+    # index.html is in the root of ZIP or in its folder
+    for export_path in [path] + sorted(glob.glob(os.path.join(path, '*'))):
+        if os.path.isfile(os.path.join(export_path, 'index.html')):
+            return export_path
+    raise WrongProgrammeFormatError('Uploaded ZIP does not contain index.html of eJednani export.')
+
+
+def get_job_status(job) -> dict:
+    # paths on server are not shown to clients
+    status = {
+        'id': job.id,
+        'status': job.status,
+        'created': job.created,
+        'started': job.started,
+        'finished': job.finished,
+        'error': job.error,
+        'counters': job.counters,
+    }
+    if job.status == 'done':
+        status['pdf'] = f'/jobs/{job.id}/pdf'
+    return status
+
+
+class ConversionService():
+    """Bounded queue of conversion jobs for one warm `converter`.
+
+    `workers` meetings are converted at once, at most `queue_size` jobs wait.
+    Each job has own folder under `jobs_path` with uploaded ZIP, extracted
+    export and PDF. Finished jobs are removed after `retention` seconds.
+    """
+
+    def __init__(self, converter, jobs_path, workers=SERVICE_WORKERS, queue_size=QUEUE_SIZE, retention=JOB_RETENTION,
+                 upload_max_size=UPLOAD_MAX_SIZE):
+        self.converter = converter
+        self.jobs_path = jobs_path
+        self.workers = max(1, workers)
+        self.retention = retention
+        self.upload_max_size = upload_max_size
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        os.makedirs(self.jobs_path, exist_ok=True)
+        self.threads = [threading.Thread(target=self.run, name=f'vera2pdf_job_{i}', daemon=True) for i in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        # waiting jobs are failed, running ones are finished
+        self.stopped.set()
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def is_busy(self) -> bool:
+        return self.queue.full()
+
+    def create_job(self) -> ConversionJob:
+        job = ConversionJob(uuid.uuid4().hex)
+        job.path = os.path.join(self.jobs_path, job.id)
+        os.makedirs(job.path)
+        return job
+
+    def submit(self, job):
+        """Queue job whose export was uploaded to its folder, raise ServiceBusyError when the queue is full."""
+        self.remove_expired_jobs()
+        job.created = time.time()
+        with self.lock:
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                shutil.rmtree(job.path, ignore_errors=True)
+                raise ServiceBusyError('Conversion queue is full.')
+            self.jobs[job.id] = job
+        logger.info(f'Job {job.id} queued.')
+
+    def get_job(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def delete_job(self, job_id) -> bool:
+        # only finished jobs are removed
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status not in ('done', 'failed'):
+                return False
+            del self.jobs[job_id]
+        shutil.rmtree(job.path, ignore_errors=True)
+        return True
+
+    def remove_expired_jobs(self):
+        now = time.time()
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items() if job.finished and now - job.finished > self.retention]
+        for job_id in expired:
+            logger.debug(f'\tRemoving expired job {job_id}...')
+            self.delete_job(job_id)
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            if self.stopped.is_set():
+                job.error = 'Service stopped.'
+                job.finished = time.time()
+                job.status = 'failed'
+                continue
+            self.convert(job)
+
+    def convert(self, job):
+        logger.info(f'Converting job {job.id}...')
+        job.started = time.time()
+        job.status = 'running'
+        export_path = os.path.join(job.path, 'export')
+        status = 'failed'
+        try:
+            zip_filepath = os.path.join(job.path, UPLOAD_FILENAME)
+            options = self.converter.options
+            extract_export_zip(zip_filepath, export_path, options.zip_max_size or ZIP_MAX_SIZE, options.zip_max_ratio or ZIP_MAX_RATIO)
+            os.remove(zip_filepath)
+            result = self.converter.convert(find_export_path(export_path), os.path.join(job.path, 'output'))
+            job.output = result.output
+            job.counters = result.counters
+            status = 'done'
+            logger.success(f'Job {job.id} converted in {result.wall_time:.1f} s.')
+        except Exception as e:
+            logger.opt(exception=e).error(f'Job {job.id} was not converted: {get_error_message(e)}')
+            job.error = get_error_message(e)
+        finally:
+            # only PDF is kept
+            shutil.rmtree(export_path, ignore_errors=True)
+            job.finished = time.time()
+            job.status = status
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """HTTP API of conversion service.
+
+    POST /jobs with zipped export as body queues new job, GET /jobs/ID
+    returns its status, GET /jobs/ID/pdf the PDF when done and DELETE /jobs/ID
+    removes finished job.
+    """
+
+    server_version = 'vera2pdf'
+
+    def log_message(self, format, *args):
+        logger.debug(f'\t{self.address_string()} {format % args}')
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message, headers=None):
+        self.send_json(status, {'error': message}, headers)
+
+    def get_route(self):
+        # ['jobs'], ['jobs', ID] or ['jobs', ID, 'pdf']
+        return [part for part in self.path.split('?')[0].split('/') if part]
+
+    def get_routed_job(self, route):
+        job = self.server.service.get_job(route[1]) if len(route) > 1 and route[0] == 'jobs' else None
+        if job is None:
+            self.send_error_json(HTTPStatus.NOT_FOUND, 'Job not found.')
+        return job
+
+    def do_POST(self):
+        service = self.server.service
+        if self.get_route() != ['jobs']:
+            self.send_error_json(HTTPStatus.NOT_FOUND, 'Not found.')
+            return
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.close_connection = True
+            self.send_error_json(HTTPStatus.LENGTH_REQUIRED, 'Content-Length of zipped export is required.')
+            return
+        # body of rejected request is not read
+        if length <= 0 or length > service.upload_max_size:
+            self.close_connection = True
+            self.send_error_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE if length > 0 else HTTPStatus.BAD_REQUEST,
+                                 f'Zipped export of 1 to {service.upload_max_size} bytes is expected.')
+            return
+        if service.is_busy():
+            self.close_connection = True
+            self.send_error_json(HTTPStatus.SERVICE_UNAVAILABLE, 'Conversion queue is full.', {'Retry-After': str(RETRY_AFTER)})
+            return
+        job = service.create_job()
+        left = length
+        with open(os.path.join(job.path, UPLOAD_FILENAME), 'wb') as f:
+            while left > 0:
+                chunk = self.rfile.read(min(left, ZIP_BUFFER_SIZE))
+                if not chunk:
+                    break
+                f.write(chunk)
+                left -= len(chunk)
+        if left > 0:
+            shutil.rmtree(job.path, ignore_errors=True)
+            self.close_connection = True
+            self.send_error_json(HTTPStatus.BAD_REQUEST, 'Upload was not complete.')
+            return
+        try:
+            service.submit(job)
+        except ServiceBusyError as e:
+            self.send_error_json(HTTPStatus.SERVICE_UNAVAILABLE, str(e), {'Retry-After': str(RETRY_AFTER)})
+            return
+        self.send_json(HTTPStatus.ACCEPTED, get_job_status(job), {'Location': f'/jobs/{job.id}'})
+
+    def do_GET(self):
+        route = self.get_route()
+        if len(route) not in (2, 3) or route[2:] not in ([], ['pdf']):
+            self.send_error_json(HTTPStatus.NOT_FOUND, 'Not found.')
+            return
+        job = self.get_routed_job(route)
+        if job is None:
+            return
+        if len(route) == 2:
+            self.send_json(HTTPStatus.OK, get_job_status(job))
+            return
+        if job.status != 'done':
+            self.send_error_json(HTTPStatus.CONFLICT, f'Job is {job.status}.')
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(os.path.getsize(job.output)))
+        self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(job.output)}"')
+        self.end_headers()
+        with open(job.output, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile, ZIP_BUFFER_SIZE)
+
+    def do_DELETE(self):
+        route = self.get_route()
+        if len(route) != 2:
+            self.send_error_json(HTTPStatus.NOT_FOUND, 'Not found.')
+            return
+        job = self.get_routed_job(route)
+        if job is None:
+            return
+        if not self.server.service.delete_job(job.id):
+            self.send_error_json(HTTPStatus.CONFLICT, f'Job is {job.status}.')
+            return
+        self.send_json(HTTPStatus.OK, {'id': job.id, 'status': 'deleted'})
+
+
+def create_server(service, port=SERVICE_PORT) -> ThreadingHTTPServer:
+    # status requests are answered while uploads are being received
+    server = ThreadingHTTPServer((SERVICE_HOST, port), ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Local HTTP service converting zipped VERA eJednani exports to PDF.')
+    parser.add_argument("--port", help = f"port of the service on {SERVICE_HOST} (default {SERVICE_PORT})", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", help = f"meetings converted at once (default {SERVICE_WORKERS})", type=int, default=SERVICE_WORKERS)
+    parser.add_argument("--queue-size", help = f"jobs waiting for conversion, more uploads are rejected with 503 (default {QUEUE_SIZE})", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--jobs-dir", help = "folder for uploaded exports and PDFs of jobs (default temp folder removed on exit)", type=str)
+    parser.add_argument("--retention", help = f"seconds finished jobs and their PDFs are kept (default {JOB_RETENTION})", type=int, default=JOB_RETENTION)
+    parser.add_argument("--upload-max-size", help = f"maximal size of uploaded ZIP in MB (default {UPLOAD_MAX_SIZE//(1024*1024)})", type=int, default=UPLOAD_MAX_SIZE//(1024*1024))
+    parser.add_argument("-j", "--jobs", help = "LibreOffice instances and image workers shared by all meetings", type=int, default=1)
+    parser.add_argument("--renderer", help = "HTML to PDF renderer, fitz renders in-process without wkhtmltopdf", choices=RENDERERS, default='wkhtmltopdf')
+    parser.add_argument("--profile", help = "output profile, eink downsamples images to 200 dpi grayscale", choices=IMAGE_PROFILES, default='default')
+    parser.add_argument("--no-office-daemon", help = "convert office attachments by separate LibreOffice process for each file", action="store_true")
+    parser.add_argument("--convert-timeout", help = f"seconds of LibreOffice conversion of one attachment before it is killed (default {CONVERT_TIMEOUT})", type=int, default=CONVERT_TIMEOUT)
+    parser.add_argument("--render-timeout", help = f"seconds of one wkhtmltopdf run before it is killed (default {RENDER_TIMEOUT})", type=int, default=RENDER_TIMEOUT)
+    parser.add_argument("--cache-dir", help = "folder for cache of converted attachments shared between jobs (or env VERA_CACHE_DIR)", type=str)
+    parser.add_argument("--cache-size", help = "maximal size of conversion cache in MB", type=int, default=1024)
+    parser.add_argument("--trace", help = f"write detailed trace log to file (default {TRACE_FILEPATH}), may contain sensitive data", nargs='?', const=TRACE_FILEPATH, type=str)
+    args = parser.parse_args()
+    setup_logging(args.trace)
+
+    cache = None
+    cache_dir = args.cache_dir or os.environ.get('VERA_CACHE_DIR')
+    if cache_dir:
+        cache = ConversionCache(cache_dir, args.cache_size*1024*1024)
+    options = ConversionOptions(jobs=max(1, args.jobs), renderer=args.renderer, profile=args.profile, office_daemon=not args.no_office_daemon,
+                                convert_timeout=args.convert_timeout, render_timeout=args.render_timeout)
+    jobs_dir = None if args.jobs_dir else tempfile.TemporaryDirectory(prefix='vera2pdf_jobs_')
+    jobs_path = args.jobs_dir or jobs_dir.name
+
+    # service managers stop the service by SIGTERM, it ends as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with Converter(options, cache) as converter, \
+         ConversionService(converter, jobs_path, args.workers, args.queue_size, args.retention, args.upload_max_size*1024*1024) as service:
+        server = create_server(service, args.port)
+        logger.info(f'Serving on http://{SERVICE_HOST}:{server.server_port}/jobs, jobs in {jobs_path}...')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info('Stopping service...')
+        finally:
+            server.server_close()
+    if jobs_dir is not None:
+        jobs_dir.cleanup()
+    logger.info('Service stopped.')
@@ -0,0 +1,144 @@
+import os
+
+from functools import lru_cache
+
+import fitz
+
+from unidecode import unidecode
+
+
+# templates, css and fonts next to the package, independent of working directory
+FILES_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'files'))
+STAMP_FONT_PATH = os.path.join(FILES_PATH, 'fonts', 'literata-regular.otf')
+STAMP_HEIGHT = 18       # footer height on A4 page
+STAMP_MARGIN = 36
+STAMP_FONTSIZE = 11
+STAMP_FONT_NAME = 'vStampF'
+# one balancing stream shared by all stamped pages of document, see Stamp.apply
+WRAP_BEGIN = b'q\n'
+
+
+@lru_cache
+def get_stamp_font(font_path):
+    # the same font file is embedded to all attachments, final save with garbage=4 keeps one copy of it
+    with open(font_path, 'rb') as f:
+        buffer = f.read()
+    return fitz.Font(fontbuffer=buffer), buffer
+
+
+class Stamp():
+    """Footer of attachment pages drawn from one Form XObject.
+
+    Frame and text of the footer are built once for each page width of the
+    attachment, only page number is written to each page. Font is embedded once
+    into the document. Stamp of page is one content stream appended to the page.
+    """
+
+    def __init__(self, doc, text, font_path=STAMP_FONT_PATH):
+        self.doc = doc
+        self.text = text
+        self.font, buffer = get_stamp_font(font_path)
+        self.font_name = STAMP_FONT_NAME
+        self.font_xref = doc[0].insert_font(fontname=self.font_name, fontbuffer=buffer)
+        self.wrap_xref = None
+        self.resources = set()   # xrefs of resources with stamp already added
+        self.digits = {d: self.font.text_length(d, fontsize=1) for d in '0123456789'}
+        self.forms = {}     # footer width: (xrefs of forms before and after page number, fontsize, end of page number, baseline)
+
+    def encode(self, text) -> str:
+        # Identity-H font, glyph ids written as hex string
+        gids = []
+        for c in text:
+            gid = self.font.has_glyph(ord(c))
+            if gid == 0:
+                gids += [self.font.has_glyph(ord(a)) for a in unidecode(c)]
+            else:
+                gids.append(gid)
+        return '<' + ''.join(f'{gid:04x}' for gid in gids) + '>'
+
+    def get_text_length(self, text, fontsize) -> float:
+        return self.font.text_length(text, fontsize=fontsize)
+
+    def get_number_length(self, number, fontsize) -> float:
+        return sum(self.digits[d] for d in number)*fontsize
+
+    def get_form(self, width):
+        key = round(width, 1)
+        if key in self.forms:
+            return self.forms[key]
+        pages = f' z {len(self.doc)} # {self.text}'
+        number_width = self.get_number_length('0'*len(str(len(self.doc))), 1)
+        fontsize = min(STAMP_FONTSIZE, (width - 2*STAMP_MARGIN)/(self.get_text_length(f'Strana {pages}', 1) + number_width))
+        number_x = STAMP_MARGIN + self.get_text_length('Strana ', fontsize)
+        baseline = (STAMP_HEIGHT - fontsize*(self.font.ascender - self.font.descender))/2 - fontsize*self.font.descender
+        # text before and after page number are two forms, so the text is extracted in reading order
+        before = self.add_form(width, f'1 g 0 G 0 w 0 0 {width:g} {STAMP_HEIGHT} re B 0 g\n'
+                                      f'BT /{self.font_name} {fontsize:g} Tf {STAMP_MARGIN} {baseline:g} Td {self.encode("Strana")} Tj ET\n')
+        after = self.add_form(width, f'0 g BT /{self.font_name} {fontsize:g} Tf {number_x + number_width*fontsize:g} {baseline:g} Td {self.encode(pages)} Tj ET\n')
+        self.forms[key] = (before, after, fontsize, number_x + number_width*fontsize, baseline)
+        return self.forms[key]
+
+    def add_form(self, width, content):
+        xref = self.doc.get_new_xref()
+        self.doc.update_object(xref, f'<</Type/XObject/Subtype/Form/BBox[0 0 {width:g} {STAMP_HEIGHT}]'
+                                     f'/Resources<</Font<</{self.font_name} {self.font_xref} 0 R>>>>>>')
+        self.doc.update_stream(xref, content.encode())
+        return xref
+
+    def get_resources_xref(self, page_xref):
+        # resources of the page, inherited ones are copied to the page first
+        kind, value = self.doc.xref_get_key(page_xref, 'Resources')
+        if kind == 'xref':
+            return int(value.split()[0])
+        if kind != 'dict':
+            parent = page_xref
+            while kind not in ('xref', 'dict') and parent:
+                kind, parent_ref = self.doc.xref_get_key(parent, 'Parent')
+                parent = int(parent_ref.split()[0]) if kind == 'xref' else 0
+                if parent:
+                    kind, value = self.doc.xref_get_key(parent, 'Resources')
+            if kind == 'xref':
+                value = self.doc.xref_object(int(value.split()[0]), compressed=True)
+            elif kind != 'dict':
+                value = '<<>>'
+        # resources become indirect object, so they are updated the same way for all pages
+        xref = self.doc.get_new_xref()
+        self.doc.update_object(xref, value)
+        self.doc.xref_set_key(page_xref, 'Resources', f'{xref} 0 R')
+        return xref
+
+    def apply(self, page, number):
+        """Draw footer with page `number` to bottom of `page` as it is displayed."""
+        rect = page.rect
+        scale = rect.height/fitz.paper_size('a4')[1]
+        before, after, fontsize, number_end, baseline = self.get_form(rect.width/scale)
+        page_xref = page.xref
+        resources = self.get_resources_xref(page_xref)
+        if (resources, before) not in self.resources:
+            self.doc.xref_set_key(resources, f'XObject/vStamp{before}', f'{before} 0 R')
+            self.doc.xref_set_key(resources, f'XObject/vStamp{after}', f'{after} 0 R')
+            self.doc.xref_set_key(resources, f'Font/{self.font_name}', f'{self.font_xref} 0 R')
+            self.resources.add((resources, before))
+        # footer coordinates -> displayed page -> unrotated page -> PDF coordinates
+        matrix = fitz.Matrix(1, 0, 0, -1, 0, STAMP_HEIGHT)
+        matrix *= fitz.Matrix(scale, 0, 0, scale, 0, rect.height - STAMP_HEIGHT*scale)
+        matrix *= page.derotation_matrix
+        matrix *= ~page.transformation_matrix
+        number = str(number)
+        number_x = number_end - self.get_number_length(number, fontsize)
+        # drawing of the page may leave changed graphics state, it is closed by Q
+        content = (f'Q q {matrix.a:g} {matrix.b:g} {matrix.c:g} {matrix.d:g} {matrix.e:g} {matrix.f:g} cm /vStamp{before} Do\n'
+                   f'0 g BT /{self.font_name} {fontsize:g} Tf {number_x:g} {baseline:g} Td {self.encode(number)} Tj ET /vStamp{after} Do Q\n')
+        xref = self.doc.get_new_xref()
+        self.doc.update_object(xref, '<<>>')
+        self.doc.update_stream(xref, content.encode())
+        if self.wrap_xref is None:
+            self.wrap_xref = self.doc.get_new_xref()
+            self.doc.update_object(self.wrap_xref, '<<>>')
+            self.doc.update_stream(self.wrap_xref, WRAP_BEGIN)
+        kind, contents = self.doc.xref_get_key(page_xref, 'Contents')
+        if kind == 'array':
+            contents = contents[1:-1]
+        elif kind != 'xref':
+            contents = ''
+        self.doc.xref_set_key(page_xref, 'Contents', f'[{self.wrap_xref} 0 R {contents} {xref} 0 R]')
@@ -0,0 +1,77 @@
+import os
+import sys
+import signal
+import subprocess
+
+from loguru import logger
+
+from .exceptions import *
+from .profiling import count_event, get_file_size
+
+
+RETRIES = 1     # attempts after failed or killed conversion
+
+
+def kill_process_group(process, terminate=False):
+    # converters start helper processes (LibreOffice oosplash -> soffice.bin), the whole group is killed
+    try:
+        if sys.platform == 'win32':
+            process.terminate() if terminate else process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGTERM if terminate else signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_supervised(command, timeout=None, name=None):
+    """Run external converter `command` in its own process group.
+
+    When it does not finish in `timeout` seconds, the group is killed and
+    ConverterTimeoutError raised. Returns exit code and stderr of the command.
+    """
+    name = name or os.path.basename(command[0])
+    with subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          start_new_session=sys.platform != 'win32') as process:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_process_group(process)
+            process.wait()
+            count_event('timeouts')
+            raise ConverterTimeoutError(f'{name} did not finish in {timeout} s and was killed.')
+        except BaseException:
+            # Ctrl+C or error of this process does not leave converter running
+            kill_process_group(process)
+            raise
+    return process.returncode, stderr.decode('utf-8', errors='replace')
+
+
+def convert_supervised(command, output_filepath, timeout=None, name=None, before_retry=None, retries=RETRIES) -> str:
+    """Run converter `command` writing `output_filepath`, retry when it fails.
+
+    Conversion fails by timeout or missing output, exit code alone is not
+    a failure, wkhtmltopdf returns 1 for missing image of complete page.
+    `before_retry` is called to prepare fresh state, e.g. LibreOffice profile.
+    Raises ConversionError when the last attempt fails.
+    """
+    name = name or os.path.basename(command[0])
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            logger.warning(f'\tRetrying conversion to {os.path.basename(output_filepath)} by {name}...')
+            count_event('retries')
+            if before_retry is not None:
+                before_retry()
+        if os.path.exists(output_filepath):
+            os.remove(output_filepath)
+        try:
+            returncode, stderr = run_supervised(command, timeout, name)
+        except ConverterTimeoutError as e:
+            logger.warning(f'\t{e}')
+            continue
+        if get_file_size(output_filepath):
+            if returncode != 0:
+                logger.debug(f'\t{name} exited with code {returncode}: {stderr.strip()[-500:]}')
+            return output_filepath
+        logger.warning(f'\t{name} exited with code {returncode} without writing {os.path.basename(output_filepath)}.')
+        logger.debug(f'\t{name}: {stderr.strip()[-500:]}')
+    raise ConversionError(f'{name} could not write {os.path.basename(output_filepath)}.')
@@ -0,0 +1,23 @@
+import sys
+
+from loguru import logger
+
+
+TRACE_FILEPATH = 'trace.log'
+
+# arguments of messages are callables, they are called only when some sink accepts the level
+lazy_logger = logger.opt(lazy=True)
+
+
+def setup_logging(trace_filepath=None):
+    """Add log sinks of command line run.
+
+    Trace sink is opt-in, without it trace messages of `lazy_logger` cost
+    one level check and their arguments are never evaluated.
+    """
+    logger.remove()
+    logger.add(sys.stderr, format="{time} {level} {message}", level="WARNING")
+    logger.add(sys.stdout, colorize=True, format="<green>{time}</green> <level>{message}</level>", level="INFO")
+    if trace_filepath:
+        logger.add(trace_filepath, backtrace=True, diagnose=True, rotation="10 minutes", retention="10 minutes", level="TRACE")  # Caution, may leak sensitive data
+    logger.add("last.log", rotation="10 minutes", retention="10 minutes", enqueue=True, level="DEBUG")
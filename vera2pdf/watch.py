@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+
+from loguru import logger
+
+try:
+    # inotify on Linux, FSEvents on MacOS, optional package watchdog
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+POLL_INTERVAL = 2       # seconds between snapshots without watchdog
+DEBOUNCE = 5            # seconds without change before rebuild
+
+
+def is_watchdog_available() -> bool:
+    return Observer is not None
+
+
+def is_excluded(path, excluded) -> bool:
+    return any(path == e or path.startswith(e + os.sep) for e in excluded)
+
+
+def get_snapshot(root, excluded=()) -> dict:
+    """Return {relative path: (mtime, size)} of all files under `root`."""
+    snapshot = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not is_excluded(os.path.join(dirpath, d), excluded)]
+        for name in filenames:
+            filepath = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(filepath)
+            except FileNotFoundError:     # removed while walking
+                continue
+            snapshot[os.path.relpath(filepath, root)] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def get_changed_files(old, new) -> list:
+    return sorted(path for path in old.keys() | new.keys() if old.get(path) != new.get(path))
+
+
+class ChangeHandler(FileSystemEventHandler):
+
+    def __init__(self, event):
+        self.event = event
+
+    def on_any_event(self, event):
+        self.event.set()
+
+
+class ProgrammeWatcher():
+    """Waits for changes of files in export folder.
+
+    Changes are found by comparing snapshots of the folder, watchdog only wakes
+    the watcher up instead of polling every `interval` seconds. Burst of
+    changes is reported once after `debounce` seconds without change.
+    """
+
+    def __init__(self, path, debounce=DEBOUNCE, interval=POLL_INTERVAL, excluded=(), use_watchdog=True):
+        self.path = os.path.abspath(path)
+        self.debounce = debounce
+        self.interval = interval
+        # only folders inside of the watched one, output folder may be its parent
+        self.excluded = [os.path.abspath(e) for e in excluded if is_excluded(os.path.abspath(e), [self.path]) and os.path.abspath(e) != self.path]
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.observer = None
+        if use_watchdog and is_watchdog_available():
+            self.observer = Observer()
+            self.observer.schedule(ChangeHandler(self.wakeup), self.path, recursive=True)
+            self.observer.start()
+        self.snapshot = get_snapshot(self.path, self.excluded)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def sleep(self, timeout):
+        # wakes up on watchdog event or stop
+        if self.observer is not None:
+            self.wakeup.wait(timeout)
+            self.wakeup.clear()
+        else:
+            self.stopped.wait(timeout)
+
+    def wait_for_changes(self) -> list:
+        """Block until files change and stay unchanged for `debounce` seconds.
+
+        Returns relative paths of changed files, or None when stopped.
+        """
+        changed = set()
+        last_change = None
+        while not self.stopped.is_set():
+            # without event watchdog wakes up rarely, the snapshot catches missed events
+            self.sleep(self.interval if self.observer is None or last_change is not None else self.interval*30)
+            snapshot = get_snapshot(self.path, self.excluded)
+            files = get_changed_files(self.snapshot, snapshot)
+            self.snapshot = snapshot
+            if files:
+                changed.update(files)
+                last_change = time.monotonic()
+                logger.trace(f'Changed files in {self.path}: {files}')
+            elif last_change is not None and time.monotonic() - last_change >= self.debounce:
+                return sorted(changed)
+        return None
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None